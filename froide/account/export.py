@@ -1,8 +1,13 @@
 import json
+import logging
 import os
+import resource
 import tempfile
-import zipfile
+import time
+from dataclasses import dataclass, field
 from datetime import timedelta
+from pathlib import Path
+from typing import List
 
 from django.conf import settings
 from django.core.files.storage import default_storage
@@ -15,10 +20,13 @@ from django.utils.translation import override
 from crossdomainmedia import CrossDomainMediaAuth
 
 from froide.helper.csv_utils import get_dict
+from froide.helper.zip_utils import iter_file_chunks, write_zip
 
 from .tasks import start_export_task
 from .utils import send_mail_user
 
+logger = logging.getLogger(__name__)
+
 PURPOSE = "dataexport"
 EXPORT_MEDIA_PREFIX = "export"
 EXPORT_MAX_AGE = timedelta(days=7)
@@ -29,16 +37,97 @@ def get_path(token):
     return os.path.join(EXPORT_MEDIA_PREFIX, "{}.zip".format(token))
 
 
+def get_max_rss():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+@dataclass
+class ExporterStats:
+    name: str
+    files: int = 0
+    memory_bytes: int = 0
+    largest_memory_file: int = 0
+    streamed_bytes: int = 0
+    # Time spent producing entries and reading streamed sources
+    seconds: float = 0.0
+
+    def add_source(self, source):
+        self.files += 1
+        if isinstance(source, str):
+            source = source.encode("utf-8")
+        if isinstance(source, bytes):
+            self.memory_bytes += len(source)
+            self.largest_memory_file = max(self.largest_memory_file, len(source))
+            return source
+        if isinstance(source, os.PathLike):
+            source = iter_file_chunks(source)
+        return self.count_chunks(source)
+
+    def count_chunks(self, chunks):
+        for chunk in self.timed(chunks):
+            self.streamed_bytes += len(chunk)
+            yield chunk
+
+    def timed(self, iterable):
+        iterator = iter(iterable)
+        while True:
+            start = time.monotonic()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                self.seconds += time.monotonic() - start
+            yield item
+
+
+@dataclass
+class ExportReport:
+    exporters: List[ExporterStats] = field(default_factory=list)
+    # High-water mark of the whole process, not of a single exporter
+    peak_rss: int = 0
+
+    def __str__(self):
+        lines = [
+            "{name}: {files} files, {memory_bytes} bytes in memory (largest "
+            "{largest_memory_file}), {streamed_bytes} bytes streamed, "
+            "{seconds:.2f}s".format(**vars(stats))
+            for stats in sorted(self.exporters, key=lambda s: -s.seconds)
+        ]
+        lines.append("Peak process RSS: {} KiB".format(self.peak_rss))
+        return "\n".join(lines)
+
+
 class ExportRegistry:
+    """
+    Export callbacks take a user and yield (path, source) tuples.
+    The source can be bytes, text, a path-like object of a local file
+    or an iterable of bytes chunks. Files and chunks are streamed into the export.
+    """
+
     def __init__(self):
         self.callbacks = []
 
     def register(self, func):
         self.callbacks.append(func)
 
-    def get_export_files(self, user):
+    def unregister(self, func):
+        self.callbacks.remove(func)
+
+    def get_export_files(self, user, report=None):
         for callback in self.callbacks:
-            yield from callback(user)
+            if report is None:
+                yield from callback(user)
+            else:
+                yield from self.get_reported_files(callback, user, report)
+
+    def get_reported_files(self, callback, user, report):
+        stats = ExporterStats(
+            name="{}.{}".format(callback.__module__, callback.__qualname__)
+        )
+        report.exporters.append(stats)
+        for path, source in stats.timed(callback(user)):
+            yield path, stats.add_source(source)
 
 
 def request_export(user):
@@ -121,21 +210,23 @@ def create_export(user, notification_user=None):
         delete_export(token)
         token = AccessToken.objects.reset(user, purpose=PURPOSE)
 
+    report = ExportReport()
     export_file = tempfile.NamedTemporaryFile(delete=False)
     try:
-        zfile = zipfile.ZipFile(export_file, "w")
-        for path, filebytes in registry.get_export_files(user):
-            zfile.writestr(os.path.join("export", path), filebytes)
+        write_zip(
+            export_file,
+            (
+                (os.path.join("export", path), source)
+                for path, source in registry.get_export_files(user, report=report)
+            ),
+        )
     except Exception:
-        zfile.close()
         export_file.close()
         os.remove(export_file.name)
         raise
-    finally:
-        try:
-            zfile.close()
-        except ValueError:
-            pass
+
+    report.peak_rss = get_max_rss()
+    logger.info("Export of user %s created:\n%s", user.id, report)
 
     export_file.flush()
     export_file.seek(0)
@@ -164,6 +255,7 @@ def create_export(user, notification_user=None):
         },
     )
     send_mail_user(_("Your data export is ready"), body, notification_user)
+    return report
 
 
 registry = ExportRegistry()
@@ -205,8 +297,7 @@ def export_user_data(user):
     yield ("account.json", json.dumps(user_data).encode("utf-8"))
     if user.profile_photo:
         filename = os.path.basename(user.profile_photo.path)
-        with open(user.profile_photo.path, "rb") as f:
-            yield (filename, f.read())
+        yield (filename, Path(user.profile_photo.path))
 
     apps = Application.objects.filter(user=user)
     if apps:
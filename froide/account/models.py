@@ -22,7 +22,7 @@ from oauth2_provider.models import AbstractApplication
 from taggit.managers import TaggableManager
 from taggit.models import TagBase, TaggedItemBase
 
-from froide.helper.csv_utils import export_csv, get_dict
+from froide.helper.csv_utils import ExportField, export_csv, get_dict
 from froide.helper.storage import HashedFilenameStorage, delete_file_if_last_reference
 
 
@@ -258,8 +258,17 @@ class User(AbstractBaseUser, PermissionsMixin):
                 "is_staff",
                 "address",
                 "terms",
-                "request_count",
-                ("tags", lambda x: ",".join(str(t) for t in x.tags.all())),
+                ExportField(
+                    "request_count",
+                    annotations={
+                        "request_count": models.Count("foirequest", distinct=True)
+                    },
+                ),
+                ExportField(
+                    "tags",
+                    lambda x: ",".join(str(t) for t in x.tags.all()),
+                    prefetch_related=("tags",),
+                ),
             )
         return export_csv(queryset, fields)
 
@@ -0,0 +1,76 @@
+import tempfile
+import time
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from ..export import ExportRegistry, ExportReport
+
+
+class ExportRegistryTest(SimpleTestCase):
+    def setUp(self):
+        self.registry = ExportRegistry()
+
+    def register(self, func):
+        self.registry.register(func)
+        self.addCleanup(self.registry.unregister, func)
+
+    def test_report_sources(self):
+        registry = self.registry
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(b"0" * 100)
+            f.flush()
+
+            def export_bytes(user):
+                yield ("a.json", b"{}")
+                yield ("b.json", "[1, 2]")
+
+            def export_streams(user):
+                yield ("c.bin", Path(f.name))
+                yield ("d.bin", iter([b"123", b"45"]))
+
+            self.register(export_bytes)
+            self.register(export_streams)
+
+            report = ExportReport()
+            files = registry.get_export_files(None, report=report)
+            contents = [
+                (path, source if isinstance(source, bytes) else b"".join(source))
+                for path, source in files
+            ]
+
+        self.assertEqual(
+            contents,
+            [
+                ("a.json", b"{}"),
+                ("b.json", b"[1, 2]"),
+                ("c.bin", b"0" * 100),
+                ("d.bin", b"12345"),
+            ],
+        )
+        bytes_stats, stream_stats = report.exporters
+        self.assertEqual(bytes_stats.files, 2)
+        self.assertEqual(bytes_stats.memory_bytes, 8)
+        self.assertEqual(bytes_stats.largest_memory_file, 6)
+        self.assertEqual(stream_stats.files, 2)
+        self.assertEqual(stream_stats.memory_bytes, 0)
+        self.assertEqual(stream_stats.streamed_bytes, 105)
+        self.assertIn("export_streams", str(report))
+
+    def test_report_read_time(self):
+        def slow_chunks():
+            time.sleep(0.05)
+            yield b"123"
+
+        def export_slow(user):
+            yield ("a.bin", slow_chunks())
+
+        self.register(export_slow)
+        report = ExportReport()
+        for _path, source in self.registry.get_export_files(None, report=report):
+            # Sources are only read when the zip entry is written
+            self.assertLess(report.exporters[0].seconds, 0.05)
+            b"".join(source)
+
+        self.assertGreaterEqual(report.exporters[0].seconds, 0.05)
+        self.assertIn("Peak process RSS", str(report))
@@ -7,8 +7,14 @@ class CampaignConfig(AppConfig):
     verbose_name = _("Campaign")
 
     def ready(self):
+        from django.db.models.signals import post_delete, post_save
+
         from froide.foirequest.models import FoiRequest
 
         from .listeners import connect_campaign
+        from .matcher import invalidate_campaign_matcher
+        from .models import Campaign
 
         FoiRequest.request_sent.connect(connect_campaign)
+        post_save.connect(invalidate_campaign_matcher, sender=Campaign)
+        post_delete.connect(invalidate_campaign_matcher, sender=Campaign)
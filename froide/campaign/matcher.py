@@ -0,0 +1,111 @@
+import logging
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Pattern
+
+from django.db import transaction
+
+from froide.helper.cache import bump_cache_generation, get_cache_generation
+
+from .models import Campaign
+
+logger = logging.getLogger(__name__)
+
+MATCHER_GENERATION_NAME = "campaign_matcher"
+
+
+@dataclass
+class CampaignPattern:
+    campaign_id: int
+    request_hint: str
+    regexes: List[Pattern[str]]
+
+    def match(self, text: str) -> bool:
+        return all(regex.search(text) for regex in self.regexes)
+
+
+class CampaignMatcher:
+    """
+    Compiled request matches of active public campaigns and
+    campaign ids by ident.
+    """
+
+    def __init__(self, patterns: List[CampaignPattern], idents: Dict[str, int]):
+        self.patterns = patterns
+        self.idents = idents
+
+    @classmethod
+    def from_database(cls) -> "CampaignMatcher":
+        patterns = []
+        campaigns = (
+            Campaign.objects.filter(active=True, public=True)
+            .exclude(request_match="")
+            .order_by("id")
+        )
+        for campaign in campaigns:
+            lines = campaign.request_match.splitlines()
+            try:
+                regexes = [re.compile(line, re.I | re.S) for line in lines]
+            except re.error as e:
+                logger.warning("Invalid request match of campaign %s: %s", campaign, e)
+                continue
+            patterns.append(
+                CampaignPattern(
+                    campaign_id=campaign.id,
+                    request_hint=campaign.request_hint,
+                    regexes=regexes,
+                )
+            )
+        idents = dict(
+            Campaign.objects.exclude(ident="")
+            .values_list("ident", "id")
+            .order_by("-id")
+        )
+        return cls(patterns, idents)
+
+    def match(self, text: str) -> Optional[CampaignPattern]:
+        for pattern in self.patterns:
+            if pattern.match(text):
+                return pattern
+        return None
+
+    def get_campaign_id(self, ident: str) -> Optional[int]:
+        return self.idents.get(ident)
+
+
+_matcher: Optional[CampaignMatcher] = None
+_matcher_generation = None
+_matcher_lock = threading.Lock()
+
+
+def get_campaign_matcher() -> CampaignMatcher:
+    """
+    Returns the matcher of this process and rebuilds it if campaigns
+    have changed in any process since it was built.
+    """
+    global _matcher, _matcher_generation
+
+    generation = get_cache_generation(MATCHER_GENERATION_NAME)
+    if generation is None:
+        # Cache cannot share generations, build on every use
+        return CampaignMatcher.from_database()
+    with _matcher_lock:
+        if _matcher is None or _matcher_generation != generation:
+            _matcher = CampaignMatcher.from_database()
+            _matcher_generation = generation
+        return _matcher
+
+
+def bump_matcher_generation() -> None:
+    global _matcher
+
+    with _matcher_lock:
+        _matcher = None
+    bump_cache_generation(MATCHER_GENERATION_NAME)
+
+
+def invalidate_campaign_matcher(**kwargs) -> None:
+    bump_matcher_generation()
+    # Other processes may have rebuilt from uncommitted data in between
+    transaction.on_commit(bump_matcher_generation)
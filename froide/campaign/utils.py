@@ -1,9 +1,13 @@
 from froide.foirequest.models.request import FoiRequest
 
+from .matcher import get_campaign_matcher
 from .models import Campaign
 
 
 def connect_foirequest(foirequest: FoiRequest, ident: str) -> None:
+    # Most references do not name a campaign, skip the query for those
+    if get_campaign_matcher().get_campaign_id(ident) is None:
+        return
     try:
         campaign = Campaign.objects.get(ident=ident)
     except Campaign.DoesNotExist:
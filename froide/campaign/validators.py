@@ -5,7 +5,7 @@ from django.utils.translation import gettext_lazy as _
 
 from froide.foirequest.models.draft import RequestDraft
 
-from .models import Campaign
+from .matcher import get_campaign_matcher
 
 Data = Dict[str, Optional[Union[str, bool, RequestDraft]]]
 
@@ -15,15 +15,12 @@ def validate_not_campaign(data: Data) -> None:
     body = data.get("body", "")
     text = "\n".join((subject, body)).strip()
 
-    campaigns = Campaign.objects.filter(active=True, public=True).exclude(
-        request_match=""
-    )
-    for campaign in campaigns:
-        if campaign.match_text(text):
-            raise ValidationError(
-                campaign.request_hint
-                or _(
-                    "This request seems like it should belong to a campaign. "
-                    "Please use the campaign interface to make the request."
-                )
+    pattern = get_campaign_matcher().match(text)
+    if pattern is not None:
+        raise ValidationError(
+            pattern.request_hint
+            or _(
+                "This request seems like it should belong to a campaign. "
+                "Please use the campaign interface to make the request."
             )
+        )
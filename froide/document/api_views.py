@@ -14,6 +14,7 @@ from filingcabinet.api_views import DocumentViewSet as FCDocumentViewSet
 from filingcabinet.api_views import PageAnnotationViewSet as FCPageAnnotationViewSet
 from filingcabinet.models import Page, PageAnnotation
 from rest_framework import permissions, serializers, viewsets
+from rest_framework.decorators import action
 
 from froide.helper.api_utils import SearchFacetListSerializer
 from froide.helper.auth import can_write_object, get_read_queryset, get_write_queryset
@@ -95,6 +96,10 @@ class PageViewSet(ESQueryMixin, viewsets.GenericViewSet):
     def list(self, request, *args, **kwargs):
         return self.search_view(request)
 
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        return self.export_view(request)
+
     def override_sqs(self):
         has_query = self.request.GET.get("q")
         if has_query and self.request.GET.get("format") == "rss":
@@ -63,48 +63,94 @@ class PageDocument(Document):
             )
         )
 
+    def get_document_values(self, obj):
+        """
+        Returns the values of fields that only depend on the page's
+        document, computed once for consecutive pages of the same document.
+        """
+        memo = getattr(self, "_document_values", None)
+        if memo is not None and memo[0] == obj.document_id:
+            return memo[1]
+        values = self.prepare_document_values(obj.document)
+        self._document_values = (obj.document_id, values)
+        return values
+
+    def prepare_document_values(self, document):
+        foirequest = document.foirequest
+        publicbody = document.publicbody
+        return {
+            "title": "" if document.title.endswith(".pdf") else document.title,
+            "description": document.description,
+            "tags": [tag.id for tag in document.tags.all()],
+            "created_at": document.published_at or document.created_at,
+            "publicbody": document.publicbody_id,
+            "jurisdiction": publicbody.jurisdiction_id if publicbody else None,
+            "foirequest": document.foirequest_id,
+            "campaign": foirequest.campaign_id if foirequest else None,
+            "collections": list(
+                document.document_documentcollection.all().values_list("id", flat=True)
+            ),
+            "directories": list(self._get_ancestor_directories(document)),
+            "portal": document.portal_id or 0,
+            "data": document.data,
+            "user": document.user_id,
+            "team": document.team_id or None,
+            "public": document.is_public(),
+            "listed": document.listed,
+        }
+
     def prepare_title(self, obj):
         if obj.number == 1:
-            if obj.document.title.endswith(".pdf"):
-                return ""
-            return obj.document.title
+            return self.get_document_values(obj)["title"]
         return ""
 
     def prepare_description(self, obj):
         if obj.number == 1:
-            return obj.document.description
+            return self.get_document_values(obj)["description"]
         return ""
 
     def prepare_tags(self, obj):
-        return [tag.id for tag in obj.document.tags.all()]
+        return self.get_document_values(obj)["tags"]
 
     def prepare_created_at(self, obj):
-        return obj.document.published_at or obj.document.created_at
+        return self.get_document_values(obj)["created_at"]
+
+    def prepare_publicbody(self, obj):
+        return self.get_document_values(obj)["publicbody"]
+
+    def prepare_jurisdiction(self, obj):
+        return self.get_document_values(obj)["jurisdiction"]
+
+    def prepare_foirequest(self, obj):
+        return self.get_document_values(obj)["foirequest"]
+
+    def prepare_campaign(self, obj):
+        return self.get_document_values(obj)["campaign"]
+
+    def prepare_user(self, obj):
+        return self.get_document_values(obj)["user"]
 
     def prepare_public(self, obj):
-        return obj.document.is_public()
+        return self.get_document_values(obj)["public"]
 
     def prepare_listed(self, obj):
-        return obj.document.listed
+        return self.get_document_values(obj)["listed"]
 
     def prepare_data(self, obj):
-        return obj.document.data
+        return self.get_document_values(obj)["data"]
 
     def prepare_team(self, obj):
-        if obj.document.team_id:
-            return obj.document.team_id
-        return None
+        return self.get_document_values(obj)["team"]
 
     def prepare_collections(self, obj):
-        collections = obj.document.document_documentcollection.all()
-        return list(collections.values_list("id", flat=True))
+        return self.get_document_values(obj)["collections"]
 
     def prepare_directories(self, obj):
-        return list(self._get_ancestor_directories(obj))
+        return self.get_document_values(obj)["directories"]
 
-    def _get_ancestor_directories(self, obj):
+    def _get_ancestor_directories(self, document):
         directory_ids = (
-            CollectionDocument.objects.filter(document=obj.document)
+            CollectionDocument.objects.filter(document=document)
             .exclude(directory=None)
             .values_list("directory_id", flat=True)
         )
@@ -114,6 +160,4 @@ class PageDocument(Document):
             yield from [d.id for d in directory.get_ancestors()]
 
     def prepare_portal(self, obj):
-        if obj.document.portal_id:
-            return obj.document.portal_id
-        return 0
+        return self.get_document_values(obj)["portal"]
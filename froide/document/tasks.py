@@ -1,12 +1,22 @@
+import logging
+
 from django.contrib.auth import get_user_model
 
+from django_elasticsearch_dsl.apps import DEDConfig
+from django_elasticsearch_dsl.registries import registry
+from elasticsearch.exceptions import ConnectionTimeout
+from filingcabinet.models import Page
+
 from froide.celery import app as celery_app
+from froide.helper.tasks import bump_search_generations
 
 from .models import DocumentCollection
 from .services import UploadDocumentStorer
 
 User = get_user_model()
 
+logger = logging.getLogger(__name__)
+
 
 @celery_app.task(name="froide.document.tasks.store_document_uploads")
 def store_document_upload(upload_urls, user_id, form_data, collection_id):
@@ -28,3 +38,26 @@ def store_document_upload(upload_urls, user_id, form_data, collection_id):
 
     for upload_url in upload_urls:
         storer.create_from_upload_url(upload_url)
+
+
+@celery_app.task(autoretry_for=(ConnectionTimeout,), retry_backoff=True)
+def index_document_pages(document_id):
+    """
+    Index all pages of a document in bulk so that document level
+    fields are prepared only once.
+    """
+    if not DEDConfig.autosync_enabled():
+        return
+    docs = list(registry.get_documents(models=[Page]))
+    for doc in docs:
+        doc_instance = doc()
+        pages = (
+            doc_instance.get_queryset()
+            .filter(document_id=document_id)
+            .order_by("number")
+        )
+        try:
+            doc_instance.update(pages.iterator())
+        except Exception as e:
+            logger.exception(e)
+    bump_search_generations(docs)
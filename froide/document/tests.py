@@ -2,12 +2,14 @@ from django.test import TestCase
 from django.urls import reverse
 
 import factory
+from filingcabinet.models import CollectionDocument, Page
 
 from froide.foirequest.tests import factories
 from froide.helper.text_utils import slugify
 from froide.team.models import TeamMembership
 from froide.team.tests import TeamFactory, TeamMembershipFactory
 
+from .documents import PageDocument
 from .models import Document, DocumentCollection
 
 
@@ -194,3 +196,25 @@ class DocumentAccessTest(TestCase):
         self.assertEqual(response.status_code, 302)
         document.refresh_from_db()
         self.assertEqual(document.description, "MARKER")
+
+
+class PageDocumentTest(TestCase):
+    def test_document_values_prepared_once(self):
+        collection = DocumentCollectionFactory.create()
+        document = DocumentFactory.create(public=True, title="Report")
+        CollectionDocument.objects.create(collection=collection, document=document)
+        for number in range(1, 4):
+            Page.objects.create(document=document, number=number, content="Text")
+
+        doc = PageDocument()
+        pages = list(doc.get_queryset().filter(document=document).order_by("number"))
+        prepared = [doc.prepare(pages[0])]
+        with self.assertNumQueries(0):
+            prepared.extend(doc.prepare(page) for page in pages[1:])
+
+        self.assertEqual(prepared[0]["title"], "Report")
+        self.assertEqual(prepared[1]["title"], "")
+        for data in prepared:
+            self.assertEqual(data["collections"], [collection.id])
+            self.assertEqual(data["team"], document.team_id)
+            self.assertTrue(data["public"])
@@ -5,6 +5,7 @@ from typing import Optional
 from django import forms
 from django.contrib import admin
 from django.contrib.admin import helpers
+from django.contrib.admin.options import IncorrectLookupParameters
 from django.contrib.admin.views.main import ChangeList
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.sites.models import Site
@@ -12,7 +13,7 @@ from django.core.exceptions import PermissionDenied
 from django.db import models
 from django.db.models.functions import RowNumber
 from django.db.models.query import QuerySet
-from django.http import HttpRequest, HttpResponse
+from django.http import HttpRequest, HttpResponse, JsonResponse
 from django.shortcuts import redirect
 from django.template.response import TemplateResponse
 from django.urls import path, reverse, reverse_lazy
@@ -34,13 +35,19 @@ from froide.helper.admin_utils import (
     make_greaterzerofilter,
     make_nullfilter,
 )
-from froide.helper.csv_utils import dict_to_csv_stream, export_csv_response
+from froide.helper.csv_utils import (
+    EXPORT_CHUNK_SIZE,
+    buffer_stream,
+    dict_to_csv_stream,
+    export_csv_response,
+)
 from froide.helper.email_parsing import parse_email
 from froide.helper.forms import get_fake_fk_form_class
 from froide.helper.widgets import TagAutocompleteWidget
 from froide.publicbody.models import FoiLaw
 from froide.team.models import Team
 
+from .admin_stats import get_filter_signature, request_stats
 from .models import (
     DeferredMessage,
     DeliveryStatus,
@@ -142,19 +149,43 @@ class FoiRequestTagsFilter(TaggitListFilter):
 class FoiRequestChangeList(ChangeList):
     def get_results(self, *args, **kwargs):
         ret = super().get_results(*args, **kwargs)
-        q = self.queryset.aggregate(
-            user_count=models.Count("user", distinct=True),
-            publicbody_count=models.Count("public_body", distinct=True),
-            jurisdiction_count=models.Count("jurisdiction", distinct=True),
-            campaign_count=models.Count("campaign", distinct=True),
+        # Stats that are not available yet are loaded after the page
+        self.stats = request_stats.get_available(
+            self.get_stats_signature(), self.is_filtered()
         )
-        self.user_count = q["user_count"]
-        self.publicbody_count = q["publicbody_count"]
-        self.jurisdiction_count = q["jurisdiction_count"]
-        self.campaign_count = q["campaign_count"]
-
         return ret
 
+    def get_stats_signature(self):
+        return get_filter_signature(self.get_filters_params(), self.query)
+
+    def is_filtered(self):
+        return bool(self.get_filters_params() or self.query)
+
+    def get_stats_url(self):
+        return reverse("admin:foirequest-foirequest-stats") + self.get_query_string()
+
+    def get_stats(self, request):
+        # Without the follower annotation of the admin queryset
+        root_queryset = self.root_queryset
+        self.root_queryset = self.model_admin.get_stats_queryset(request)
+        try:
+            queryset = self.get_queryset(request)
+        finally:
+            self.root_queryset = root_queryset
+        return request_stats.get_stats(
+            queryset, self.get_stats_signature(), self.is_filtered()
+        )
+
+
+class FoiRequestStatsChangeList(FoiRequestChangeList):
+    """
+    Only builds the filtered queryset for the stats view,
+    without counting and fetching a page of results
+    """
+
+    def get_results(self, request):
+        self.stats = None
+
 
 class LawRelatedFieldListFilter(admin.RelatedFieldListFilter):
     """
@@ -252,8 +283,34 @@ class FoiRequestAdmin(admin.ModelAdmin):
     )
 
     def get_changelist(self, request):
+        match = request.resolver_match
+        if match is not None and match.url_name == "foirequest-foirequest-stats":
+            return FoiRequestStatsChangeList
         return FoiRequestChangeList
 
+    def get_urls(self):
+        urls = super().get_urls()
+        my_urls = [
+            path(
+                "stats/",
+                self.admin_site.admin_view(self.changelist_stats),
+                name="foirequest-foirequest-stats",
+            ),
+        ]
+        return my_urls + urls
+
+    def changelist_stats(self, request):
+        if not self.has_view_or_change_permission(request):
+            raise PermissionDenied
+        try:
+            cl = self.get_changelist_instance(request)
+        except IncorrectLookupParameters:
+            return JsonResponse({}, status=400)
+        return JsonResponse(cl.get_stats(request).as_data())
+
+    def get_stats_queryset(self, request):
+        return super().get_queryset(request)
+
     def get_queryset(self, request):
         qs = super().get_queryset(request)
         qs = qs.prefetch_related("public_body")
@@ -757,24 +814,30 @@ class MessageTagAdmin(admin.ModelAdmin):
 
     @admin.action(description=_("Export public body tag stats to CSV"))
     def export_csv(self, request, queryset):
-        from froide.publicbody.models import PublicBody
-
-        def get_stream(queryset):
-            for tag in queryset:
-                pbs = PublicBody.objects.filter(send_messages__tags=tag).annotate(
-                    tag_count=models.Count(
-                        "send_messages", filter=models.Q(send_messages__tags=tag)
-                    )
-                )
-                for pb in pbs:
-                    yield {
-                        "tag": tag.name,
-                        "publicbody_id": pb.id,
-                        "publicbody_name": pb.name,
-                        "tag_count": pb.tag_count,
-                    }
-
-        csv_stream = dict_to_csv_stream(get_stream(queryset))
+        # Count messages per tag and sending public body in one query
+        stats = (
+            TaggedMessage.objects.filter(
+                tag__in=queryset, content_object__sender_public_body__isnull=False
+            )
+            .values(
+                "tag__name",
+                "content_object__sender_public_body_id",
+                "content_object__sender_public_body__name",
+            )
+            .annotate(tag_count=models.Count("id"))
+            .order_by("tag__name", "content_object__sender_public_body__name")
+        )
+
+        def get_stream(stats):
+            for row in stats.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+                yield {
+                    "tag": row["tag__name"],
+                    "publicbody_id": row["content_object__sender_public_body_id"],
+                    "publicbody_name": row["content_object__sender_public_body__name"],
+                    "tag_count": row["tag_count"],
+                }
+
+        csv_stream = buffer_stream(dict_to_csv_stream(get_stream(stats)))
         return export_csv_response(csv_stream, name="tag_stats.csv")
 
 
@@ -0,0 +1,154 @@
+import hashlib
+import json
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, models, router
+
+from .models import FoiRequest
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ADMIN_REQUEST_STATS_CONFIG = {
+    # Seconds the counts of a filtered list are kept
+    "timeout": 60,
+    # Use planner estimates of PostgreSQL for the unfiltered list
+    "approximate": True,
+}
+
+# Stat name and the request field whose distinct values are counted
+REQUEST_STATS_FIELDS = (
+    ("user_count", "user"),
+    ("publicbody_count", "public_body"),
+    ("jurisdiction_count", "jurisdiction"),
+    ("campaign_count", "campaign"),
+)
+
+
+def get_admin_request_stats_config():
+    config = dict(DEFAULT_ADMIN_REQUEST_STATS_CONFIG)
+    config.update(settings.FROIDE_CONFIG.get("admin_request_stats") or {})
+    return config
+
+
+@dataclass
+class RequestStats:
+    counts: Dict[str, int]
+    approximate: bool = False
+
+    def as_data(self):
+        return {"counts": self.counts, "approximate": self.approximate}
+
+
+def get_filter_signature(filter_params: Dict[str, str], search_query: str) -> str:
+    data = json.dumps(
+        [sorted(filter_params.items()), search_query], separators=(",", ":")
+    )
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+
+def get_estimated_distinct_counts(model, fields: List[str]) -> Optional[Dict]:
+    """
+    Returns the number of distinct values of the fields over the whole
+    table from the statistics of the PostgreSQL planner, or None if the
+    table has not been analyzed.
+    """
+    connection = connections[router.db_for_read(model)]
+    if connection.vendor != "postgresql":
+        return None
+    table = model._meta.db_table
+    columns = {model._meta.get_field(name).column: name for name in fields}
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples FROM pg_class WHERE oid = to_regclass(%s)", [table]
+        )
+        row = cursor.fetchone()
+        if row is None or row[0] < 0:
+            return None
+        row_count = row[0]
+        cursor.execute(
+            "SELECT attname, n_distinct FROM pg_stats"
+            " WHERE schemaname = current_schema() AND tablename = %s"
+            " AND attname = ANY(%s)",
+            [table, list(columns)],
+        )
+        n_distinct = dict(cursor.fetchall())
+    if set(n_distinct) != set(columns):
+        return None
+    counts = {}
+    for column, name in columns.items():
+        # Negative values are the ratio of distinct values to rows
+        value = n_distinct[column]
+        counts[name] = round(-value * row_count if value < 0 else value)
+    return counts
+
+
+class RequestStatsProvider:
+    """
+    Counts of distinct users, public bodies, jurisdictions and campaigns
+    of the request admin list, cached per filter signature. The unfiltered
+    list uses planner estimates where available.
+    """
+
+    def __init__(self, model):
+        self.model = model
+
+    def get_key(self, signature: str) -> str:
+        return "foirequest_admin_stats:%s" % signature
+
+    def get_cached(self, signature: str) -> Optional[RequestStats]:
+        return cache.get(self.get_key(signature))
+
+    def get_approximate(self) -> Optional[RequestStats]:
+        if not get_admin_request_stats_config()["approximate"]:
+            return None
+        fields = [field for _name, field in REQUEST_STATS_FIELDS]
+        try:
+            estimates = get_estimated_distinct_counts(self.model, fields)
+        except Exception as e:
+            logger.warning("Could not estimate request stats: %s", e)
+            return None
+        if estimates is None:
+            return None
+        counts = {name: estimates[field] for name, field in REQUEST_STATS_FIELDS}
+        return RequestStats(counts=counts, approximate=True)
+
+    def get_available(self, signature: str, filtered: bool) -> Optional[RequestStats]:
+        """
+        Returns stats that do not need to aggregate the list.
+        """
+        stats = self.get_cached(signature)
+        if stats is None and not filtered:
+            stats = self.get_approximate()
+            if stats is not None:
+                self.set(signature, stats)
+        return stats
+
+    def get_stats(
+        self, queryset: models.QuerySet, signature: str, filtered: bool
+    ) -> RequestStats:
+        stats = self.get_available(signature, filtered)
+        if stats is not None:
+            return stats
+        counts = queryset.order_by().aggregate(
+            **{
+                name: models.Count(field, distinct=True)
+                for name, field in REQUEST_STATS_FIELDS
+            }
+        )
+        stats = RequestStats(counts=counts)
+        self.set(signature, stats)
+        return stats
+
+    def set(self, signature: str, stats: RequestStats):
+        cache.set(
+            self.get_key(signature),
+            stats,
+            timeout=get_admin_request_stats_config()["timeout"],
+        )
+
+
+request_stats = RequestStatsProvider(FoiRequest)
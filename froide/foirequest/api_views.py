@@ -562,6 +562,15 @@ class FoiRequestViewSet(
     def search(self, request):
         return self.search_view(request)
 
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="search/export",
+        url_name="search-export",
+    )
+    def search_export(self, request):
+        return self.export_view(request)
+
     @action(
         detail=False,
         methods=["get"],
@@ -12,6 +12,7 @@ class FoiRequestConfig(AppConfig):
 
     def ready(self):
         from django_comments.signals import comment_will_be_posted
+        from taggit.models import Tag
 
         from froide.account import (
             account_canceled,
@@ -22,6 +23,7 @@ class FoiRequestConfig(AppConfig):
         from froide.account.export import registry
         from froide.foirequest import signals  # noqa
         from froide.helper.search import search_registry
+        from froide.helper.search.facets import facet_object_cache
         from froide.team import team_changed
 
         from .utils import (
@@ -39,6 +41,7 @@ class FoiRequestConfig(AppConfig):
         comment_will_be_posted.connect(signals.pre_comment_foimessage)
         team_changed.connect(keep_foiproject_teams_synced_with_requests)
         account_confirmed.connect(send_request_when_account_confirmed)
+        facet_object_cache.watch(Tag)
 
 
 def add_search(request):
@@ -9,6 +9,7 @@ from froide.helper.search import (
     get_search_quote_analyzer,
     get_text_analyzer,
 )
+from froide.publicbody.utils import category_ancestors, classification_ancestors
 
 from .models import FoiRequest
 
@@ -54,13 +55,21 @@ class FoiRequestDocument(Document):
     class Django:
         model = FoiRequest
         queryset_chunk_size = 50
+        # Chunked iteration lets prefetch_related work during indexing
+        queryset_pagination = 50
 
     def get_queryset(self):
         """Not mandatory but to improve performance we can select related in one sql request"""
         return FoiRequest.objects.select_related(
             "jurisdiction",
             "public_body",
-        )
+        ).prefetch_related("tags", "public_body__categories")
+
+    def get_indexing_queryset(self):
+        # Pick up tree changes once per indexing run
+        classification_ancestors.invalidate()
+        category_ancestors.invalidate()
+        return super().get_indexing_queryset()
 
     def prepare_content(self, obj):
         return render_to_string(
@@ -79,17 +88,16 @@ class FoiRequestDocument(Document):
     def prepare_classification(self, obj):
         if obj.public_body_id is None:
             return []
-        if obj.public_body.classification is None:
+        if obj.public_body.classification_id is None:
             return []
-        classification = obj.public_body.classification
-        return [classification.id] + [c.id for c in classification.get_ancestors()]
+        return classification_ancestors.get_ids_with_ancestors(
+            [obj.public_body.classification_id]
+        )
 
     def prepare_categories(self, obj):
         if obj.public_body:
             cats = obj.public_body.categories.all()
-            return [o.id for o in cats] + [
-                c.id for o in cats for c in o.get_ancestors()
-            ]
+            return category_ancestors.get_ids_with_ancestors(o.id for o in cats)
         return []
 
     def prepare_team(self, obj):
@@ -1,29 +1,38 @@
-import base64
+import logging
 import random
-import zipfile
 from contextlib import closing, contextmanager
+from functools import partial
 from io import BytesIO
-from typing import Iterator, Optional, Tuple
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
 
 from django.conf import settings
-from django.core.mail import EmailMessage, get_connection, mail_managers
+from django.core.mail import EmailMessage, mail_managers
+from django.db import transaction
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 from django.utils.translation import override
 
 from froide.foirequest.models import DeferredMessage, FoiMessage, FoiRequest
 from froide.helper.email_parsing import ParsedEmail, parse_email, parse_email_address
+from froide.helper.email_sending import get_mail_connection
 from froide.helper.email_utils import (
     get_mail_client,
+    get_unread_mail_batches,
     get_unread_mails,
     make_address,
     unflag_mail,
+    unflag_mails,
 )
 from froide.helper.name_generator import get_name_from_number
+from froide.helper.zip_utils import make_spooled_zip
 from froide.publicbody.models import PublicBody
 
+from .mail_store import delete_mail, load_mail, store_deferred_mail
 from .utils import get_foi_mail_domains, get_publicbody_for_email
 
+logger = logging.getLogger(__name__)
+
 unknown_foimail_subject = _("Unknown FoI-Mail Recipient")
 unknown_foimail_message = _(
     """We received an FoI mail from <%(from_address)s> to this address: %(address)s.
@@ -39,6 +48,21 @@ Please investigate! %(url)s
 
 DSN_RCPT_OPTIONS = ["NOTIFY=SUCCESS,DELAY,FAILURE"]
 
+DEFAULT_MAIL_FETCH_CONFIG = {
+    # Fetch, flag and unflag mails in UID chunks
+    "batch": False,
+    "chunk_size": 50,
+    "max_bytes": 20 * 1024 * 1024,
+    # Days after which stored mails of unfinished deliveries are removed
+    "stored_mail_max_age": 7,
+}
+
+
+def get_mail_fetch_config():
+    config = dict(DEFAULT_MAIL_FETCH_CONFIG)
+    config.update(settings.FROIDE_CONFIG.get("mail_fetch") or {})
+    return config
+
 
 def send_foi_mail(
     subject,
@@ -53,8 +77,7 @@ def send_foi_mail(
     if kwargs.get("dsn"):
         backend_kwargs["rcpt_options"] = DSN_RCPT_OPTIONS
 
-    connection = get_connection(
-        backend=settings.EMAIL_BACKEND,
+    connection = get_mail_connection(
         username=settings.FOI_EMAIL_HOST_USER,
         password=settings.FOI_EMAIL_HOST_PASSWORD,
         host=settings.FOI_EMAIL_HOST,
@@ -95,7 +118,40 @@ def send_foi_mail(
     return email.send()
 
 
-def _process_mail(mail_bytes, mail_uid=None, manual=False):
+def _process_mail_batch(mails: List[Tuple[Optional[str], str]]):
+    """
+    Deliver a batch of stored mails given as (uid, key) and unflag
+    the delivered ones with a single IMAP session afterwards
+    """
+    delivered_uids = []
+    for mail_uid, mail_key in mails:
+        try:
+            with transaction.atomic():
+                _process_mail(mail_key=mail_key)
+        except Exception as e:
+            # Leave mail flagged for inspection
+            logger.exception(e)
+            continue
+        if mail_uid is not None:
+            delivered_uids.append(mail_uid)
+
+    if delivered_uids:
+        with get_foi_mail_client() as mailbox:
+            unflag_mails(mailbox, delivered_uids)
+    return len(delivered_uids)
+
+
+def _process_mail(mail_bytes=None, mail_uid=None, manual=False, mail_key=None):
+    """
+    Deliver a mail given as bytes or as key of a stored mail
+    """
+    if mail_key is not None:
+        try:
+            mail_bytes = load_mail(mail_key)
+        except FileNotFoundError:
+            # Stored mails are deleted once their delivery is committed
+            logger.info("Stored mail %s was already delivered", mail_key)
+            return
     email = None
 
     with closing(BytesIO(mail_bytes)) as stream:
@@ -103,6 +159,8 @@ def _process_mail(mail_bytes, mail_uid=None, manual=False):
     assert email is not None
 
     _deliver_mail(email, mail_bytes=mail_bytes, manual=manual)
+    if mail_key is not None:
+        transaction.on_commit(partial(delete_mail, mail_key))
 
     # Unflag mail after delivery is complete
     if mail_uid is not None:
@@ -119,13 +177,13 @@ def create_deferred(
     body=unknown_foimail_message,
     foirequest: Optional[FoiRequest] = None,
 ):
-    mail_string = ""
+    mail_digest = None
     if mail_bytes is not None:
-        mail_string = base64.b64encode(mail_bytes).decode("utf-8")
+        mail_digest = store_deferred_mail(mail_bytes)
     DeferredMessage.objects.create(
         recipient=secret_mail,
         sender=sender_email or "",
-        mail=mail_string,
+        mail_digest=mail_digest or "",
         spam=spam,
         request=foirequest,
     )
@@ -339,6 +397,19 @@ def _fetch_mail(flag_in_process=True) -> Iterator[Tuple[Optional[str], bytes]]:
         yield from get_unread_mails(mailbox, flag=flag_in_process)
 
 
+def _fetch_mail_batches(
+    flag_in_process=True,
+) -> Iterator[List[Tuple[Optional[str], bytes]]]:
+    config = get_mail_fetch_config()
+    with get_foi_mail_client() as mailbox:
+        yield from get_unread_mail_batches(
+            mailbox,
+            flag=flag_in_process,
+            chunk_size=config["chunk_size"],
+            max_bytes=config["max_bytes"],
+        )
+
+
 def fetch_and_process():
     count = 0
     for _mail_uid, rfc_data in _fetch_mail(flag_in_process=False):
@@ -356,9 +427,10 @@ def generate_foirequest_files(foirequest):
     yield from get_message_attachments_for_package(foirequest)
 
 
-def get_message_and_attachments(
-    foimessage: FoiMessage, date_prefix: Optional[str] = None
-):
+def get_message_files(foimessage: FoiMessage, date_prefix: Optional[str] = None):
+    """
+    Yields message PDF as bytes and attachments as file paths (Path)
+    """
     from .pdf_generator import FoiRequestMessagePDFGenerator
 
     if date_prefix is None:
@@ -375,23 +447,42 @@ def get_message_and_attachments(
         if not attachment.file:
             continue
         filename = "%s-%s" % (date_prefix, attachment.name)
-        with open(attachment.file.path, "rb") as f:
-            yield (filename, f.read(), attachment.filetype)
+        yield (filename, Path(attachment.file.path), attachment.filetype)
 
 
-def package_message(foimessage: FoiMessage):
-    zfile_obj = BytesIO()
+def read_file_sources(files):
+    for filename, source, filetype in files:
+        if not isinstance(source, bytes):
+            with open(source, "rb") as f:
+                source = f.read()
+        yield (filename, source, filetype)
+
+
+def get_message_and_attachments(
+    foimessage: FoiMessage, date_prefix: Optional[str] = None
+):
+    yield from read_file_sources(get_message_files(foimessage, date_prefix=date_prefix))
+
+
+def package_message_file(foimessage: FoiMessage):
+    """
+    Returns a temporary file with the zipped message,
+    memory use is bounded regardless of attachment size
+    """
+    path = str(foimessage.request_id)
     with override(settings.LANGUAGE_CODE):
-        zfile = zipfile.ZipFile(zfile_obj, "w")
-        path = str(foimessage.request_id)
-        atts = get_message_and_attachments(foimessage)
-        for filename, filebytes, _ct in atts:
-            zfile.writestr("%s/%s" % (path, filename), filebytes)
-        zfile.close()
-    return zfile_obj.getvalue()
+        return make_spooled_zip(
+            ("%s/%s" % (path, filename), source)
+            for filename, source, _ct in get_message_files(foimessage)
+        )
 
 
-def get_message_attachments_for_package(foirequest):
+def package_message(foimessage: FoiMessage):
+    with closing(package_message_file(foimessage)) as zfile_obj:
+        return zfile_obj.read()
+
+
+def get_message_files_for_package(foirequest):
     last_date = None
     date_count = 1
 
@@ -406,21 +497,33 @@ def get_message_attachments_for_package(foirequest):
             date_prefix += "_%d" % date_count
 
         last_date = current_date
-        yield from get_message_and_attachments(foimessage, date_prefix=date_prefix)
+        yield from get_message_files(foimessage, date_prefix=date_prefix)
 
 
-def package_foirequest(foirequest: FoiRequest):
+def get_message_attachments_for_package(foirequest):
+    yield from read_file_sources(get_message_files_for_package(foirequest))
+
+
+def get_foirequest_package_entries(foirequest: FoiRequest):
     from .pdf_generator import FoiRequestPDFGenerator
 
-    zfile_obj = BytesIO()
+    path = str(foirequest.pk)
+    pdf_generator = FoiRequestPDFGenerator(foirequest)
+    correspondence_bytes = pdf_generator.get_pdf_bytes()
+    yield ("%s/_%s.pdf" % (path, foirequest.pk), correspondence_bytes)
+    for filename, source, _ct in get_message_files_for_package(foirequest):
+        yield ("%s/%s" % (path, filename), source)
+
+
+def package_foirequest_file(foirequest: FoiRequest):
+    """
+    Returns a temporary file with the zipped request,
+    memory use is bounded regardless of attachment size
+    """
     with override(settings.LANGUAGE_CODE):
-        zfile = zipfile.ZipFile(zfile_obj, "w")
-        path = str(foirequest.pk)
-        pdf_generator = FoiRequestPDFGenerator(foirequest)
-        correspondence_bytes = pdf_generator.get_pdf_bytes()
-        zfile.writestr("%s/_%s.pdf" % (path, foirequest.pk), correspondence_bytes)
-        atts = get_message_attachments_for_package(foirequest)
-        for filename, filebytes, _ct in atts:
-            zfile.writestr("%s/%s" % (path, filename), filebytes)
-        zfile.close()
-    return zfile_obj.getvalue()
+        return make_spooled_zip(get_foirequest_package_entries(foirequest))
+
+
+def package_foirequest(foirequest: FoiRequest):
+    with closing(package_foirequest_file(foirequest)) as zfile_obj:
+        return zfile_obj.read()
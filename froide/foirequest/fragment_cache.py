@@ -0,0 +1,101 @@
+import logging
+import threading
+from collections import Counter
+from typing import Callable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import translation
+from django.utils.safestring import SafeString, mark_safe
+
+from froide.helper.cache import bump_cache_generation, get_cache_generation
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FRAGMENT_CACHE_CONFIG = {
+    "enabled": True,
+    # Seconds a rendered fragment is kept if its request does not change
+    "timeout": 24 * 60 * 60,
+}
+
+
+def get_fragment_cache_config():
+    config = dict(DEFAULT_FRAGMENT_CACHE_CONFIG)
+    config.update(settings.FROIDE_CONFIG.get("request_fragment_cache") or {})
+    return config
+
+
+def get_version_name(foirequest_id: int) -> str:
+    return "foirequest:%s" % foirequest_id
+
+
+def get_request_version(foirequest) -> int:
+    # Look up the version only once per request object
+    version = getattr(foirequest, "_fragment_version", None)
+    if version is None:
+        version = get_cache_generation(get_version_name(foirequest.id))
+        foirequest._fragment_version = version
+    return version
+
+
+def bump_request_version(foirequest_id: int):
+    if foirequest_id is None:
+        return
+    bump_cache_generation(get_version_name(foirequest_id))
+
+
+class RequestFragmentCache:
+    """
+    Rendered fragments of request pages, separate for authenticated and
+    anonymous reads. Keys contain a version of the request that is bumped
+    whenever the request, its messages or attachments change.
+    """
+
+    def __init__(self):
+        self.stats = Counter()
+        self.lock = threading.Lock()
+
+    def get_key(self, foirequest, name: str, obj_id: int, authenticated_read: bool):
+        return "foirequest_fragment:{}:{}:{}:{}:{}:{}".format(
+            foirequest.id,
+            get_request_version(foirequest),
+            name,
+            obj_id,
+            "auth" if authenticated_read else "anon",
+            translation.get_language(),
+        )
+
+    def render(
+        self,
+        foirequest,
+        name: str,
+        obj_id: int,
+        authenticated_read: bool,
+        render_func: Callable[[], SafeString],
+    ) -> SafeString:
+        config = get_fragment_cache_config()
+        if not config["enabled"] or foirequest.id is None:
+            return render_func()
+        key = self.get_key(foirequest, name, obj_id, authenticated_read)
+        content = cache.get(key)
+        if content is not None:
+            self.record("hit")
+            return mark_safe(content)
+        self.record("miss")
+        content = render_func()
+        cache.set(key, str(content), timeout=config["timeout"])
+        return content
+
+    def record(self, name):
+        with self.lock:
+            self.stats[name] += 1
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+        lookups = stats.get("hit", 0) + stats.get("miss", 0)
+        stats["hit_ratio"] = stats.get("hit", 0) / lookups if lookups else 0.0
+        return stats
+
+
+fragment_cache = RequestFragmentCache()
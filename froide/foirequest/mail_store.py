@@ -0,0 +1,117 @@
+import hashlib
+import logging
+import os
+import uuid
+from datetime import timedelta
+from typing import Iterator, Tuple
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+MAIL_STORE_DIRECTORY = "raw-mail"
+
+
+def get_mail_digest(mail_bytes: bytes) -> str:
+    return hashlib.sha256(mail_bytes).hexdigest()
+
+
+def get_mail_name(key: str) -> str:
+    # Same directory layout as HashedFilenameStorage
+    return os.path.join(
+        settings.FOI_MEDIA_PATH,
+        MAIL_STORE_DIRECTORY,
+        key[:2],
+        key[2:4],
+        "{}.eml".format(key),
+    )
+
+
+def store_mail(mail_bytes: bytes) -> str:
+    """
+    Stores raw mail bytes for one processing task and returns their key.
+    Every call stores its own copy, so tasks with the same mail do not
+    delete the copy of another task.
+    """
+    key = "{}-{}".format(get_mail_digest(mail_bytes), uuid.uuid4().hex)
+    default_storage.save(get_mail_name(key), ContentFile(mail_bytes))
+    return key
+
+
+def store_deferred_mail(mail_bytes: bytes) -> str:
+    """
+    Stores the mail of a deferred message under its SHA-256 digest and
+    returns it. Deferred messages with the same mail share one copy.
+    """
+    digest = get_mail_digest(mail_bytes)
+    name = get_mail_name(digest)
+    if not default_storage.exists(name):
+        default_storage.save(name, ContentFile(mail_bytes))
+    return digest
+
+
+def load_mail(key: str) -> bytes:
+    with default_storage.open(get_mail_name(key), "rb") as f:
+        return f.read()
+
+
+def delete_mail(key: str):
+    name = get_mail_name(key)
+    if default_storage.exists(name):
+        default_storage.delete(name)
+
+
+def delete_mail_if_unreferenced(digest: str):
+    """
+    Deletes the mail of a deferred message unless another undelivered
+    message still needs it.
+    """
+    from .models import DeferredMessage
+
+    if not digest:
+        return
+    if DeferredMessage.objects.filter(mail_digest=digest).exists():
+        return
+    delete_mail(digest)
+
+
+def iter_stored_mails() -> Iterator[Tuple[str, str]]:
+    """
+    Yields (key, name) of all stored mails.
+    """
+    directory = os.path.join(settings.FOI_MEDIA_PATH, MAIL_STORE_DIRECTORY)
+    if not default_storage.exists(directory):
+        return
+    first_dirs, _files = default_storage.listdir(directory)
+    for first in first_dirs:
+        second_dirs, _files = default_storage.listdir(os.path.join(directory, first))
+        for second in second_dirs:
+            path = os.path.join(directory, first, second)
+            _dirs, files = default_storage.listdir(path)
+            for filename in files:
+                key, ext = os.path.splitext(filename)
+                if ext == ".eml":
+                    yield key, os.path.join(path, filename)
+
+
+def remove_stale_mails(max_age: timedelta) -> int:
+    """
+    Removes mails of tasks that never finished and mails of deferred
+    messages that no longer exist, if they are older than max_age.
+    """
+    from .models import DeferredMessage
+
+    cutoff = timezone.now() - max_age
+    count = 0
+    for key, name in iter_stored_mails():
+        if default_storage.get_modified_time(name) > cutoff:
+            continue
+        if DeferredMessage.objects.filter(mail_digest=key).exists():
+            continue
+        logger.info("Removing stale stored mail %s", key)
+        default_storage.delete(name)
+        count += 1
+    return count
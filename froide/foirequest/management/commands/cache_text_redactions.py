@@ -1,38 +1,167 @@
+import multiprocessing
+import os
+import time
+
 from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.db import connections
 from django.db.models import Q, QuerySet
 from django.db.models.functions import Length
 from django.utils import translation
 
+DEFAULT_CHUNK_SIZE = 200
+
+
+def get_message_queryset():
+    from froide.foirequest.models import FoiMessage
+
+    needs_calculation = (
+        Q(content_rendered_auth__isnull=True)
+        | Q(content_rendered_anon__isnull=True)
+        | Q(redacted_content_auth__isnull=True)
+        | Q(redacted_content_anon__isnull=True)
+    )
+
+    msgs: QuerySet[FoiMessage] = (
+        FoiMessage.objects.annotate(plaintext_length=Length("plaintext"))
+        .filter(plaintext_length__gt=FoiMessage.CONTENT_CACHE_THRESHOLD)
+        .filter(needs_calculation)
+    )
+    return msgs
+
+
+def iter_id_chunks(queryset, chunk_size, start_id=0):
+    """
+    Yields lists of ids ordered by id, paginated by the last id
+    instead of an offset.
+    """
+    last_id = start_id
+    while True:
+        ids = list(
+            queryset.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", flat=True)[:chunk_size]
+        )
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+
+def process_chunk(message_ids):
+    from froide.foirequest.tasks import cache_message_redactions
+
+    return message_ids[-1], cache_message_redactions(message_ids)
+
 
 class Command(BaseCommand):
     help = "Pre-calculate redaction diffs and markup for long texts."
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help="Messages per chunk",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of worker processes",
+        )
+        parser.add_argument(
+            "--celery",
+            action="store_true",
+            help=(
+                "Enqueue chunks as Celery tasks instead of processing them."
+                " Does not write the checkpoint as chunks finish later."
+            ),
+        )
+        parser.add_argument(
+            "--checkpoint",
+            help=(
+                "File that stores the last finished message id to resume from."
+                " Only written when chunks are processed by this command."
+            ),
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore an existing checkpoint",
+        )
+
     def handle(self, *args, **options):
         translation.activate(settings.LANGUAGE_CODE)
-        from froide.foirequest.models import FoiMessage
-        from froide.foirequest.templatetags.foirequest_tags import (
-            render_message_content,
+
+        self.checkpoint = options["checkpoint"]
+        start_id = 0
+        if self.checkpoint and not options["restart"]:
+            start_id = self.read_checkpoint()
+            if start_id:
+                self.stdout.write("Resuming after message id %s" % start_id)
+
+        chunks = iter_id_chunks(
+            get_message_queryset(), options["chunk_size"], start_id=start_id
         )
+        self.start_time = time.monotonic()
+        self.count = 0
+
+        if options["celery"]:
+            self.enqueue_chunks(chunks)
+        elif options["workers"] > 1:
+            self.process_in_pool(chunks, options["workers"])
+        else:
+            for chunk in chunks:
+                self.finish_chunk(*process_chunk(chunk))
 
-        needs_calculation = (
-            Q(content_rendered_auth__isnull=True)
-            | Q(content_rendered_anon__isnull=True)
-            | Q(redacted_content_auth__isnull=True)
-            | Q(redacted_content_anon__isnull=True)
+        self.stdout.write(
+            "Done: {} messages in {:.1f}s".format(
+                self.count, time.monotonic() - self.start_time
+            )
         )
 
-        msgs: QuerySet[FoiMessage] = (
-            FoiMessage.objects.annotate(plaintext_length=Length("plaintext"))
-            .filter(plaintext_length__gt=FoiMessage.CONTENT_CACHE_THRESHOLD)
-            .filter(needs_calculation)
+    def enqueue_chunks(self, chunks):
+        """
+        Enqueued chunks are not finished yet, so the checkpoint is not
+        written. Messages of failed tasks still need calculation and are
+        found again by the next run.
+        """
+        from froide.foirequest.tasks import cache_text_redactions_task
+
+        for chunk in chunks:
+            cache_text_redactions_task.delay(chunk)
+            self.finish_chunk(chunk[-1], len(chunk), verb="Enqueued", checkpoint=False)
+
+    def process_in_pool(self, chunks, workers):
+        # Workers must not share the database connection of this process
+        connections.close_all()
+        with multiprocessing.Pool(workers) as pool:
+            # Results come back in order so the checkpoint never skips a chunk
+            for last_id, count in pool.imap(process_chunk, chunks):
+                self.finish_chunk(last_id, count)
+
+    def finish_chunk(self, last_id, count, verb="Processed", checkpoint=True):
+        self.count += count
+        if checkpoint:
+            self.write_checkpoint(last_id)
+        elapsed = time.monotonic() - self.start_time
+        self.stdout.write(
+            "{} {} messages ({:.1f}/s), last id {}".format(
+                verb, self.count, self.count / elapsed if elapsed else 0.0, last_id
+            )
         )
 
-        for message in msgs:
-            # Cache the `redacted_content` property for the api
-            message.get_redacted_content(True)
-            message.get_redacted_content(False)
+    def read_checkpoint(self):
+        if not os.path.exists(self.checkpoint):
+            return 0
+        with open(self.checkpoint) as f:
+            return int(f.read().strip() or 0)
 
-            # Cache the rendered message content for the foi request page
-            render_message_content(message, True)
-            render_message_content(message, False)
+    def write_checkpoint(self, last_id):
+        if not self.checkpoint:
+            return
+        temp_path = "%s.tmp" % self.checkpoint
+        with open(temp_path, "w") as f:
+            f.write(str(last_id))
+        os.replace(temp_path, self.checkpoint)
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.4 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("foirequest", "0067_alter_foiproject_options"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="deferredmessage",
+            name="sender",
+            field=models.CharField(blank=True, db_index=True, max_length=255),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.4 on 2026-10-18 14:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("foirequest", "0068_alter_deferredmessage_sender"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="deferredmessage",
+            name="mail_digest",
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+    ]
@@ -209,6 +209,13 @@ class FoiAttachment(models.Model):
         finally:
             self.file.close()
 
+    def get_chunks(self):
+        self.file.open(mode="rb")
+        try:
+            yield from self.file.chunks()
+        finally:
+            self.file.close()
+
     @property
     def can_redact(self):
         return self.redacted is not None or (self.can_approve and self.is_pdf)
@@ -3,6 +3,7 @@ import base64
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
+from ..mail_store import load_mail, store_mail
 from .request import FoiRequest
 
 
@@ -20,12 +21,14 @@ class DeferredMessageManager(models.Manager):
 
 class DeferredMessage(models.Model):
     recipient = models.CharField(max_length=255, blank=True)
-    sender = models.CharField(max_length=255, blank=True)
+    sender = models.CharField(max_length=255, blank=True, db_index=True)
     timestamp = models.DateTimeField(auto_now_add=True)
     request = models.ForeignKey(
         FoiRequest, null=True, blank=True, on_delete=models.CASCADE
     )
+    # Base64 encoded mail of messages deferred before mails were stored
     mail = models.TextField(blank=True)
+    mail_digest = models.CharField(max_length=64, blank=True, db_index=True)
     spam = models.BooleanField(null=True, default=False)
     delivered = models.BooleanField(default=False)
 
@@ -44,6 +47,8 @@ class DeferredMessage(models.Model):
         }
 
     def encoded_mail(self):
+        if self.mail_digest:
+            return load_mail(self.mail_digest)
         return base64.b64decode(self.mail)
 
     def decoded_mail(self):
@@ -56,8 +61,8 @@ class DeferredMessage(models.Model):
         self.delivered = True
         self.spam = False
         self.save()
-        mail = base64.b64decode(self.mail)
+        mail = self.encoded_mail()
         mail = mail.replace(
             self.recipient.encode("utf-8"), self.request.secret_address.encode("utf-8")
         )
-        process_mail.delay(mail, manual=True)
+        process_mail.delay(mail_key=store_mail(mail), manual=True)
@@ -0,0 +1,190 @@
+import logging
+import os
+from io import BytesIO
+from typing import List, Optional
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from pypdf import PdfReader, PdfWriter
+
+logger = logging.getLogger(__name__)
+
+OCR_CHUNK_PREFIX = "ocr-chunks"
+
+DEFAULT_OCR_CHUNK_CONFIG = {
+    # PDFs with more pages are OCRed in chunks of this many pages
+    "pages": 20,
+    # Seconds tesseract may spend on one chunk
+    "timeout": 180,
+    # Retries of a chunk that timed out before its original pages are kept
+    "max_retries": 2,
+    # Seconds without any finished chunk after which the remaining chunks
+    # count as failed, e.g. when their worker was killed
+    "watchdog_interval": 60 * 20,
+}
+
+
+def get_ocr_chunk_config():
+    config = dict(DEFAULT_OCR_CHUNK_CONFIG)
+    config.update(settings.FROIDE_CONFIG.get("ocr_chunk") or {})
+    return config
+
+
+def get_ocr_language():
+    if settings.TESSERACT_LANGUAGE:
+        return settings.TESSERACT_LANGUAGE
+    return settings.LANGUAGE_CODE
+
+
+def get_pdf_page_count(path) -> Optional[int]:
+    try:
+        return len(PdfReader(path).pages)
+    except Exception:
+        logger.warning("Could not count pages of %s", path, exc_info=True)
+        return None
+
+
+class OCRChunkJob:
+    """
+    OCR of a large PDF split into page range chunks.
+
+    Chunk inputs and results are kept in the default storage so that every
+    chunk can run on a different worker and a retried chunk does not redo
+    the chunks that are already finished.
+    """
+
+    def __init__(self, target_id: int, chunk_count: int):
+        self.target_id = target_id
+        self.chunk_count = chunk_count
+
+    @property
+    def directory(self):
+        return "{}/{}".format(OCR_CHUNK_PREFIX, self.target_id)
+
+    def get_input_name(self, index: int):
+        return "{}/{:04d}.pdf".format(self.directory, index)
+
+    def get_result_name(self, index: int):
+        return "{}/{:04d}.ocr.pdf".format(self.directory, index)
+
+    def get_failed_name(self, index: int):
+        return "{}/{:04d}.failed".format(self.directory, index)
+
+    def get_claim_name(self):
+        return "{}/merge.claim".format(self.directory)
+
+    def get_input_path(self, index: int):
+        return default_storage.path(self.get_input_name(index))
+
+    @classmethod
+    def create(cls, target_id: int, path, pages_per_chunk: int) -> "OCRChunkJob":
+        reader = PdfReader(path)
+        page_count = len(reader.pages)
+        chunk_count = (page_count + pages_per_chunk - 1) // pages_per_chunk
+        job = cls(target_id, chunk_count)
+        # Leftovers of an earlier run for the same target
+        job.reset()
+        for index in range(chunk_count):
+            start = index * pages_per_chunk
+            writer = PdfWriter()
+            for page in reader.pages[start : start + pages_per_chunk]:
+                writer.add_page(page)
+            out = BytesIO()
+            writer.write(out)
+            default_storage.save(job.get_input_name(index), ContentFile(out.getvalue()))
+        return job
+
+    def has_inputs(self) -> bool:
+        """
+        Inputs are removed once the job has been merged.
+        """
+        return default_storage.exists(self.get_input_name(0))
+
+    def has_result(self, index: int) -> bool:
+        return default_storage.exists(self.get_result_name(index))
+
+    def has_failed(self, index: int) -> bool:
+        return default_storage.exists(self.get_failed_name(index))
+
+    def save_result(self, index: int, pdf_bytes: bytes):
+        name = self.get_result_name(index)
+        if default_storage.exists(name):
+            default_storage.delete(name)
+        default_storage.save(name, ContentFile(pdf_bytes))
+
+    def mark_failed(self, index: int):
+        name = self.get_failed_name(index)
+        if not default_storage.exists(name):
+            default_storage.save(name, ContentFile(b""))
+
+    def is_done(self, index: int) -> bool:
+        return self.has_result(index) or self.has_failed(index)
+
+    def get_done_count(self) -> int:
+        return sum(1 for index in range(self.chunk_count) if self.is_done(index))
+
+    def is_complete(self) -> bool:
+        return all(self.is_done(index) for index in range(self.chunk_count))
+
+    def fail_missing(self):
+        for index in range(self.chunk_count):
+            if not self.is_done(index):
+                self.mark_failed(index)
+
+    def claim_merge(self) -> bool:
+        """
+        Only the first task that sees the job complete may merge.
+
+        The claim is a file created exclusively next to the chunks. It
+        outlives cleanup so that late chunk tasks cannot merge again.
+        """
+        path = default_storage.path(self.get_claim_name())
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        os.close(fd)
+        return True
+
+    def get_merge_sources(self) -> List[str]:
+        sources = []
+        for index in range(self.chunk_count):
+            if self.has_result(index):
+                sources.append(default_storage.path(self.get_result_name(index)))
+            else:
+                # Keep the original pages where OCR failed
+                sources.append(self.get_input_path(index))
+        return sources
+
+    def merge(self) -> Optional[bytes]:
+        """
+        Returns the OCRed PDF or None if no chunk could be OCRed.
+        """
+        if not any(self.has_result(index) for index in range(self.chunk_count)):
+            return None
+        writer = PdfWriter()
+        for source in self.get_merge_sources():
+            writer.append(source)
+        out = BytesIO()
+        writer.write(out)
+        return out.getvalue()
+
+    def cleanup(self):
+        """
+        Removes inputs and results, keeps the merge claim.
+        """
+        if not default_storage.exists(self.directory):
+            return
+        claim = os.path.basename(self.get_claim_name())
+        _dirs, files = default_storage.listdir(self.directory)
+        for filename in files:
+            if filename != claim:
+                default_storage.delete(os.path.join(self.directory, filename))
+
+    def reset(self):
+        self.cleanup()
+        if default_storage.exists(self.get_claim_name()):
+            default_storage.delete(self.get_claim_name())
@@ -9,7 +9,10 @@ from froide.helper.email_sending import mail_registry
 from froide.helper.signals import email_left_queue
 from froide.problem.models import ProblemReport
 
+from .fragment_cache import bump_request_version
+from .mail_store import delete_mail_if_unreferenced
 from .models import (
+    DeferredMessage,
     DeliveryStatus,
     FoiAttachment,
     FoiEvent,
@@ -222,6 +225,24 @@ def decrement_request_count(sender, instance=None, **kwargs):
     instance.public_body.save()
 
 
+# Rendered fragments
+
+
+@receiver(signals.post_save, sender=FoiRequest, dispatch_uid="foirequest_bump_version")
+def foirequest_bump_version(instance=None, **kwargs):
+    # Message and attachment changes save the request, see below
+    bump_request_version(instance.id)
+
+
+@receiver(
+    signals.post_delete,
+    sender=DeferredMessage,
+    dispatch_uid="deferredmessage_delete_mail",
+)
+def deferredmessage_delete_mail(instance=None, **kwargs):
+    delete_mail_if_unreferenced(instance.mail_digest)
+
+
 # Indexing
 
 
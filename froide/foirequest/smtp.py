@@ -7,6 +7,7 @@ from django.core.mail.backends.smtp import EmailBackend as DjangoEmailBackend
 from django.core.mail.message import sanitize_address
 
 from froide.bounce.utils import handle_smtp_error
+from froide.helper.smtp_pool import connection_pool, get_pool_config
 
 FIX_RE = re.compile(r'^([^"].*) <(.*)>$')
 
@@ -18,10 +19,70 @@ def fix_address(a):
 
 
 class EmailBackend(DjangoEmailBackend):
+    """
+    SMTP backend that checks out connections from the per-process
+    connection pool instead of opening a new session for every send.
+    """
+
     def __init__(self, **kwargs):
         self.rcpt_options = kwargs.pop("rcpt_options", [])
         self.return_path = kwargs.pop("return_path", None)
+        use_pool = kwargs.pop("use_pool", None)
         super().__init__(**kwargs)
+        if use_pool is None:
+            use_pool = get_pool_config()["enabled"]
+        self.use_pool = use_pool
+        self.pooled = None
+
+    def get_pool_key(self):
+        return (
+            self.host,
+            self.port,
+            self.username,
+            self.use_tls,
+            self.use_ssl,
+            self.ssl_keyfile,
+            self.ssl_certfile,
+        )
+
+    def _connect(self):
+        self.connection = None
+        if super().open() is None:
+            return None
+        connection = self.connection
+        self.connection = None
+        return connection
+
+    def open(self):
+        if not self.use_pool:
+            return super().open()
+        if self.connection:
+            return False
+        pooled = connection_pool.acquire(self.get_pool_key(), self._connect)
+        if pooled is None:
+            # We failed silently on connecting
+            return None
+        self.pooled = pooled
+        self.connection = pooled.connection
+        return True
+
+    def close(self):
+        if not self.use_pool or self.pooled is None:
+            return super().close()
+        pooled = self.pooled
+        self.pooled = None
+        self.connection = None
+        connection_pool.release(pooled)
+
+    def reconnect(self):
+        """
+        Throw away a broken pooled connection and open a fresh one
+        """
+        if self.pooled is not None:
+            connection_pool.discard(self.pooled)
+            self.pooled = None
+        self.connection = None
+        return self.open()
 
     def _send(self, email_message):
         """A helper method that does the actual sending."""
@@ -38,12 +99,7 @@ class EmailBackend(DjangoEmailBackend):
         ]
         try:
             message = email_message.message()
-            self.connection.sendmail(
-                from_email,
-                recipients,
-                message.as_bytes(linesep="\r\n"),
-                rcpt_options=self.rcpt_options,
-            )
+            self._sendmail(from_email, recipients, message.as_bytes(linesep="\r\n"))
         except smtplib.SMTPRecipientsRefused as e:
             handle_smtp_error(e)
             logger.warn("SMTPRecipientsRefused: %s", e)
@@ -55,3 +111,24 @@ class EmailBackend(DjangoEmailBackend):
             logger.exception(e)
             return False
         return True
+
+    def _sendmail(self, from_email, recipients, message_bytes):
+        try:
+            self.connection.sendmail(
+                from_email,
+                recipients,
+                message_bytes,
+                rcpt_options=self.rcpt_options,
+            )
+        except smtplib.SMTPServerDisconnected:
+            # Pooled connection was dropped by server, retry once
+            if self.pooled is None or not self.reconnect():
+                raise
+            self.connection.sendmail(
+                from_email,
+                recipients,
+                message_bytes,
+                rcpt_options=self.rcpt_options,
+            )
+        if self.pooled is not None:
+            connection_pool.record_sent(self.pooled)
@@ -1,9 +1,11 @@
 import logging
 import os
+from datetime import timedelta
 from functools import partial
 
 from django.conf import settings
 from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from django.db import transaction
 from django.utils import translation
 from django.utils.translation import gettext_lazy as _
@@ -13,9 +15,17 @@ from froide.celery import app as celery_app
 from froide.publicbody.models import PublicBody
 from froide.upload.models import Upload
 
-from .foi_mail import _fetch_mail, _process_mail
-from .models import FoiAttachment, FoiProject, FoiRequest
+from .foi_mail import (
+    _fetch_mail,
+    _fetch_mail_batches,
+    _process_mail,
+    _process_mail_batch,
+    get_mail_fetch_config,
+)
+from .mail_store import remove_stale_mails, store_mail
+from .models import FoiAttachment, FoiMessage, FoiProject, FoiRequest
 from .notifications import batch_update_requester, send_classification_reminder
+from .ocr import OCRChunkJob, get_ocr_chunk_config, get_ocr_language, get_pdf_page_count
 
 logger = logging.getLogger(__name__)
 
@@ -28,10 +38,33 @@ def process_mail(*args, **kwargs):
         _process_mail(*args, **kwargs)
 
 
+@celery_app.task(name="froide.foirequest.tasks.process_mail_batch", acks_late=True)
+def process_mail_batch(mails):
+    translation.activate(settings.LANGUAGE_CODE)
+
+    _process_mail_batch(mails)
+
+
 @celery_app.task(name="froide.foirequest.tasks.fetch_mail", expires=60)
 def fetch_mail():
+    # Tasks only get the key of their stored copy of the mail
+    if get_mail_fetch_config()["batch"]:
+        for mails in _fetch_mail_batches():
+            process_mail_batch.delay(
+                [(mail_uid, store_mail(rfc_data)) for mail_uid, rfc_data in mails]
+            )
+        return
+
     for mail_uid, rfc_data in _fetch_mail():
-        process_mail.delay(rfc_data, mail_uid=mail_uid)
+        process_mail.delay(mail_key=store_mail(rfc_data), mail_uid=mail_uid)
+
+
+@celery_app.task(name="froide.foirequest.tasks.remove_stale_mails_task")
+def remove_stale_mails_task():
+    max_age = timedelta(days=get_mail_fetch_config()["stored_mail_max_age"])
+    count = remove_stale_mails(max_age)
+    if count:
+        logger.info("Removed %s stale stored mails", count)
 
 
 @celery_app.task
@@ -279,6 +312,61 @@ def convert_images_to_pdf_task(att_ids, target_id, instructions, can_approve=Tru
     target.save()
 
 
+def finish_ocr_pdf(attachment, target, pdf_bytes, can_approve=True):
+    if pdf_bytes is None:
+        attachment.can_approve = can_approve
+        attachment.save()
+        target.delete()
+        return
+
+    new_file = ContentFile(pdf_bytes)
+    target.size = new_file.size
+    target.file.save(target.name, new_file)
+    target.save()
+
+
+def finish_redaction_ocr(target, pdf_bytes):
+    if pdf_bytes is not None:
+        logger.info("OCR successful %s", target.id)
+        pdf_file = ContentFile(pdf_bytes)
+        target.size = pdf_file.size
+        target.file.save(target.name, pdf_file, save=False)
+    else:
+        logger.info("OCR failed %s", target.id)
+
+    target.can_approve = True
+    target.pending = False
+    target.approve_and_save()
+    FoiAttachment.attachment_approved.send(sender=target, user=None, redacted=True)
+
+
+def start_chunked_ocr(path, target_id, on_done) -> bool:
+    """
+    Splits large PDFs into page chunks that are OCRed by separate tasks.
+    Returns False if the PDF is small enough to be OCRed in one go.
+    on_done is passed on to ocr_pdf_merge_task.
+    """
+    config = get_ocr_chunk_config()
+    page_count = get_pdf_page_count(path)
+    if page_count is None or page_count <= config["pages"]:
+        return False
+
+    job = OCRChunkJob.create(target_id, path, config["pages"])
+    logger.info(
+        "OCR of %s in %s chunks of %s pages",
+        target_id,
+        job.chunk_count,
+        config["pages"],
+    )
+    for index in range(job.chunk_count):
+        ocr_pdf_chunk_task.delay(target_id, index, job.chunk_count, on_done)
+    ocr_pdf_watchdog_task.apply_async(
+        (target_id, job.chunk_count, on_done),
+        countdown=config["watchdog_interval"],
+    )
+    return True
+
+
 @celery_app.task(
     name="froide.foirequest.tasks.ocr_pdf_task",
     time_limit=60 * 5,
@@ -296,27 +384,128 @@ def ocr_pdf_task(att_id, target_id, can_approve=True):
     except FoiAttachment.DoesNotExist:
         return
 
+    on_done = {"mode": "ocr", "att_id": att_id, "can_approve": can_approve}
+    if start_chunked_ocr(attachment.file.path, target.id, on_done):
+        return
+
     try:
         pdf_bytes = run_ocr(
             attachment.file.path,
-            language=settings.TESSERACT_LANGUAGE
-            if settings.TESSERACT_LANGUAGE
-            else settings.LANGUAGE_CODE,
+            language=get_ocr_language(),
             timeout=180,
         )
     except SoftTimeLimitExceeded:
         pdf_bytes = None
 
-    if pdf_bytes is None:
-        attachment.can_approve = can_approve
-        attachment.save()
-        target.delete()
+    finish_ocr_pdf(attachment, target, pdf_bytes, can_approve=can_approve)
+
+
+@celery_app.task(
+    name="froide.foirequest.tasks.ocr_pdf_chunk_task",
+    bind=True,
+    time_limit=60 * 5,
+    soft_time_limit=60 * 4,
+)
+def ocr_pdf_chunk_task(self, target_id, index, chunk_count, on_done):
+    from filingcabinet.pdf_utils import run_ocr
+
+    config = get_ocr_chunk_config()
+    job = OCRChunkJob(target_id, chunk_count)
+    if not default_storage.exists(job.get_input_name(index)):
+        # Job was already merged or cleaned up
         return
 
-    new_file = ContentFile(pdf_bytes)
-    target.size = new_file.size
-    target.file.save(target.name, new_file)
-    target.save()
+    if not job.is_done(index):
+        try:
+            pdf_bytes = run_ocr(
+                job.get_input_path(index),
+                language=get_ocr_language(),
+                timeout=config["timeout"],
+            )
+            if pdf_bytes is not None:
+                job.save_result(index, pdf_bytes)
+        except Exception:
+            # Includes SoftTimeLimitExceeded
+            logger.warning(
+                "OCR of chunk %s of %s raised", index, target_id, exc_info=True
+            )
+            pdf_bytes = None
+
+        if pdf_bytes is None:
+            if self.request.retries < config["max_retries"]:
+                logger.info("OCR of chunk %s of %s failed, retrying", index, target_id)
+                raise self.retry(countdown=30, max_retries=config["max_retries"])
+            logger.info("OCR of chunk %s of %s failed", index, target_id)
+            job.mark_failed(index)
+
+    if job.is_complete() and job.claim_merge():
+        ocr_pdf_merge_task.delay(target_id, chunk_count, on_done)
+
+
+@celery_app.task(name="froide.foirequest.tasks.ocr_pdf_watchdog_task")
+def ocr_pdf_watchdog_task(target_id, chunk_count, on_done, done_count=0):
+    """
+    Merges chunked OCR jobs whose chunk tasks died without finishing.
+    Waits as long as chunks keep finishing, then counts the missing
+    chunks as failed.
+    """
+    config = get_ocr_chunk_config()
+    job = OCRChunkJob(target_id, chunk_count)
+    if not job.has_inputs():
+        # Already merged
+        return
+    current_count = job.get_done_count()
+    if current_count < chunk_count and current_count > done_count:
+        ocr_pdf_watchdog_task.apply_async(
+            (target_id, chunk_count, on_done, current_count),
+            countdown=config["watchdog_interval"],
+        )
+        return
+    if current_count < chunk_count:
+        logger.warning(
+            "OCR of %s: %s of %s chunks did not finish",
+            target_id,
+            chunk_count - current_count,
+            chunk_count,
+        )
+        job.fail_missing()
+    if job.claim_merge():
+        ocr_pdf_merge_task.delay(target_id, chunk_count, on_done)
+
+
+@celery_app.task(
+    name="froide.foirequest.tasks.ocr_pdf_merge_task",
+    time_limit=60 * 5,
+    soft_time_limit=60 * 4,
+)
+def ocr_pdf_merge_task(target_id, chunk_count, on_done):
+    job = OCRChunkJob(target_id, chunk_count)
+    if not job.has_inputs():
+        # Merged by an earlier task, do not treat as failed OCR
+        return
+    try:
+        target = FoiAttachment.objects.get(pk=target_id)
+    except FoiAttachment.DoesNotExist:
+        job.cleanup()
+        return
+
+    try:
+        pdf_bytes = job.merge()
+    except Exception:
+        logger.error("Merging OCR chunks of %s failed", target_id, exc_info=True)
+        pdf_bytes = None
+    finally:
+        job.cleanup()
+
+    if on_done["mode"] == "redact":
+        finish_redaction_ocr(target, pdf_bytes)
+        return
+
+    try:
+        attachment = FoiAttachment.objects.get(pk=on_done["att_id"])
+    except FoiAttachment.DoesNotExist:
+        return
+    finish_ocr_pdf(attachment, target, pdf_bytes, can_approve=on_done["can_approve"])
 
 
 @celery_app.task(
@@ -372,29 +561,22 @@ def redact_attachment_task(att_id, target_id, instructions):
 
     logger.info("Trying OCR %s", target.id)
 
+    on_done = {"mode": "redact"}
+    if start_chunked_ocr(target.file.path, target.id, on_done):
+        # Keep the redacted file while the chunks are OCRed
+        target.save()
+        return
+
     try:
         pdf_bytes = run_ocr(
             target.file.path,
-            language=settings.TESSERACT_LANGUAGE
-            if settings.TESSERACT_LANGUAGE
-            else settings.LANGUAGE_CODE,
+            language=get_ocr_language(),
             timeout=60 * 4,
         )
     except SoftTimeLimitExceeded:
         pdf_bytes = None
 
-    if pdf_bytes is not None:
-        logger.info("OCR successful %s", target.id)
-        pdf_file = ContentFile(pdf_bytes)
-        target.size = pdf_file.size
-        target.file.save(target.name, pdf_file, save=False)
-    else:
-        logger.info("OCR failed %s", target.id)
-
-    target.can_approve = True
-    target.pending = False
-    target.approve_and_save()
-    FoiAttachment.attachment_approved.send(sender=target, user=None, redacted=True)
+    finish_redaction_ocr(target, pdf_bytes)
 
 
 @celery_app.task(name="froide.foirequest.tasks.move_upload_to_attachment")
@@ -432,3 +614,30 @@ def unpack_zipfile_attachment_task(instance_id):
         return
 
     unpack_zipfile_attachment(att)
+
+
+def cache_message_redactions(message_ids):
+    """
+    Pre-calculate redaction diffs and rendered content of messages.
+    Returns the number of messages processed.
+    """
+    from .templatetags.foirequest_tags import render_message_content
+
+    messages = FoiMessage.objects.filter(id__in=message_ids).order_by("id")
+    count = 0
+    with translation.override(settings.LANGUAGE_CODE):
+        for message in messages:
+            # Cache the `redacted_content` property for the api
+            message.get_redacted_content(True)
+            message.get_redacted_content(False)
+
+            # Cache the rendered message content for the foi request page
+            render_message_content(message, True)
+            render_message_content(message, False)
+            count += 1
+    return count
+
+
+@celery_app.task(name="froide.foirequest.tasks.cache_text_redactions_task")
+def cache_text_redactions_task(message_ids):
+    cache_message_redactions(message_ids)
@@ -33,6 +33,7 @@ from ..auth import (
 )
 from ..foi_mail import get_alternative_mail
 from ..forms import AssignProjectForm, EditMessageForm
+from ..fragment_cache import fragment_cache
 from ..models import DeliveryStatus, FoiMessage, FoiRequest
 from ..moderation import get_moderation_triggers
 from ..utils import get_minimum_redaction_replacements
@@ -56,7 +57,16 @@ def is_authenticated_read(message, request):
 @register.simple_tag
 def highlight_request(message, request):
     auth_read = is_authenticated_read(message, request)
+    return fragment_cache.render(
+        message.request,
+        "highlight",
+        message.id,
+        auth_read,
+        lambda: render_highlight_request(message, auth_read),
+    )
+
 
+def render_highlight_request(message, auth_read):
     real_content = unify(message.get_real_content())
     redacted_content = unify(message.get_content())
 
@@ -149,7 +159,13 @@ def render_message_content(message, authenticated_read=False, render_footer=True
 @register.simple_tag
 def redact_message(message, request):
     authenticated_read = is_authenticated_read(message, request)
-    content = render_message_content(message, authenticated_read=authenticated_read)
+    content = fragment_cache.render(
+        message.request,
+        "message",
+        message.id,
+        authenticated_read,
+        lambda: render_message_content(message, authenticated_read=authenticated_read),
+    )
 
     return content
 
@@ -160,17 +176,19 @@ def redact_request_description(
 ) -> SafeString:
     authenticated_read = can_read_foirequest_authenticated(foirequest, request)
 
-    real_content = unify(foirequest.description)
-    redacted_content = unify(foirequest.get_description())
+    def render_description():
+        real_content = unify(foirequest.description)
+        redacted_content = unify(foirequest.get_description())
+        return mark_redacted(
+            real_content,
+            redacted_content,
+            authenticated_read=authenticated_read,
+        )
 
-    content = mark_redacted(
-        real_content,
-        redacted_content,
-        authenticated_read=authenticated_read,
+    return fragment_cache.render(
+        foirequest, "description", foirequest.id, authenticated_read, render_description
     )
 
-    return content
-
 
 @register.simple_tag
 def redact_message_short(message, request):
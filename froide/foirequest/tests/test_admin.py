@@ -1,23 +1,76 @@
 from typing import Callable
+from unittest import mock
 
 from django.contrib.admin.sites import AdminSite
 from django.contrib.auth import get_user_model
 from django.contrib.messages.storage import default_storage
-from django.db.models import Model
+from django.core.cache import cache
+from django.db.models import Count, Model
 from django.test import TestCase
 from django.test.client import RequestFactory
+from django.urls import reverse
 
 from froide.foirequest.admin import (
     DeferredMessageAdmin,
     FoiAttachmentAdmin,
     FoiRequestAdmin,
+    FoiRequestChangeList,
 )
+from froide.foirequest.admin_stats import request_stats
 from froide.foirequest.models import DeferredMessage, FoiAttachment, FoiRequest
 from froide.foirequest.tests import factories
 
 User = get_user_model()
 
 
+class RequestChangeListStatsTest(TestCase):
+    def setUp(self):
+        self.site = factories.make_world()
+        self.client.login(email="superuser@fragdenstaat.de", password="froide")
+        cache.clear()
+
+    def test_stats_loaded_after_page(self):
+        params = {"is_foi__exact": "1"}
+        response = self.client.get(
+            reverse("admin:foirequest_foirequest_changelist"), params
+        )
+        self.assertEqual(response.status_code, 200)
+        cl = response.context["cl"]
+        self.assertIsNone(cl.stats)
+        self.assertContains(response, cl.get_stats_url())
+
+        with mock.patch.object(FoiRequestChangeList, "get_results") as get_results:
+            response = self.client.get(
+                reverse("admin:foirequest-foirequest-stats"), params
+            )
+        self.assertEqual(response.status_code, 200)
+        # No result page is counted or fetched for the stats
+        get_results.assert_not_called()
+        counts = FoiRequest.objects.filter(is_foi=True).aggregate(
+            user_count=Count("user", distinct=True),
+            publicbody_count=Count("public_body", distinct=True),
+            jurisdiction_count=Count("jurisdiction", distinct=True),
+            campaign_count=Count("campaign", distinct=True),
+        )
+        self.assertEqual(response.json(), {"counts": counts, "approximate": False})
+
+        with self.assertNumQueries(0):
+            # Cached for the same filters
+            stats = request_stats.get_available(cl.get_stats_signature(), True)
+        self.assertEqual(stats.counts, counts)
+
+        response = self.client.get(
+            reverse("admin:foirequest_foirequest_changelist"), params
+        )
+        self.assertEqual(response.context["cl"].stats.counts, counts)
+
+    def test_stats_bad_filter(self):
+        response = self.client.get(
+            reverse("admin:foirequest-foirequest-stats"), {"is_foi__exact": "x"}
+        )
+        self.assertEqual(response.status_code, 400)
+
+
 class AdminActionTest(TestCase):
     def setUp(self):
         self.site = factories.make_world()
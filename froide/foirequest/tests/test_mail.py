@@ -1,5 +1,5 @@
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 from datetime import timezone as dt_timezone
 
 from django.conf import settings
@@ -11,6 +11,13 @@ from django.utils.translation import gettext_lazy as _
 import pytest
 
 from froide.foirequest.foi_mail import add_message_from_email
+from froide.foirequest.mail_store import (
+    get_mail_digest,
+    iter_stored_mails,
+    load_mail,
+    remove_stale_mails,
+    store_mail,
+)
 from froide.foirequest.models import DeferredMessage, FoiMessage, FoiRequest
 from froide.foirequest.services import BOUNCE_TAG
 from froide.foirequest.tasks import process_mail
@@ -335,6 +342,72 @@ def test_deferred(deferred_message_setup):
     assert dm.request == req
 
 
+@pytest.mark.django_db
+def test_deferred_stores_mail(deferred_message_setup):
+    name, domain = deferred_message_setup["req"].secret_address.split("@")
+    bad_mail = "@".join((name + "x", domain))
+    with open(p("test_mail_01.txt"), "rb") as f:
+        mail = f.read().decode("ascii")
+    mail = mail.replace(deferred_message_setup["secret_address"], bad_mail)
+    mail_bytes = mail.encode("ascii")
+    process_mail.delay(mail_key=store_mail(mail_bytes))
+    dm = DeferredMessage.objects.get(recipient=bad_mail)
+    assert dm.mail == ""
+    assert dm.mail_digest == get_mail_digest(mail_bytes)
+    assert dm.encoded_mail() == mail_bytes
+
+    dm.delete()
+    with pytest.raises(FileNotFoundError):
+        load_mail(get_mail_digest(mail_bytes))
+
+
+@pytest.mark.django_db
+def test_stored_mail_per_task(
+    deferred_message_setup, django_capture_on_commit_callbacks
+):
+    with open(p("test_mail_01.txt"), "rb") as f:
+        mail_bytes = f.read()
+    req = deferred_message_setup["req"]
+    count_messages = len(req.get_messages())
+    first_key = store_mail(mail_bytes)
+    second_key = store_mail(mail_bytes)
+    assert first_key != second_key
+
+    with django_capture_on_commit_callbacks(execute=True):
+        process_mail.delay(mail_key=first_key)
+    with pytest.raises(FileNotFoundError):
+        load_mail(first_key)
+    # Same mail of another task is still there
+    assert load_mail(second_key) == mail_bytes
+
+    # A repeated task of a delivered mail does nothing
+    process_mail.delay(mail_key=first_key)
+    req = FoiRequest.objects.get(id=req.id)
+    assert len(req.get_messages()) == count_messages + 1
+
+
+@pytest.mark.django_db
+def test_remove_stale_mails(deferred_message_setup):
+    name, domain = deferred_message_setup["req"].secret_address.split("@")
+    bad_mail = "@".join((name + "x", domain))
+    with open(p("test_mail_01.txt"), "rb") as f:
+        mail = f.read().decode("ascii")
+    mail_bytes = mail.replace(deferred_message_setup["secret_address"], bad_mail)
+    mail_bytes = mail_bytes.encode("ascii")
+    process_mail.delay(mail_key=store_mail(mail_bytes))
+    unfinished_key = store_mail(mail_bytes)
+    keys = {key for key, _name in iter_stored_mails()}
+    assert unfinished_key in keys
+    assert get_mail_digest(mail_bytes) in keys
+
+    assert remove_stale_mails(timedelta(days=1)) == 0
+    remove_stale_mails(timedelta(0))
+    keys = {key for key, _name in iter_stored_mails()}
+    assert unfinished_key not in keys
+    # Mails of existing deferred messages are kept
+    assert DeferredMessage.objects.get(recipient=bad_mail).encoded_mail() == mail_bytes
+
+
 @pytest.mark.django_db
 def test_double_deferred(deferred_message_setup):
     count_messages = len(deferred_message_setup["req"].get_messages())
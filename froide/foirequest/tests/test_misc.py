@@ -1,24 +1,41 @@
+import tempfile
 from datetime import timedelta
+from io import BytesIO
+from pathlib import Path
+from unittest import mock
 
+from django.contrib.auth.models import AnonymousUser
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.sites.models import Site
 from django.core import mail
-from django.test import TestCase
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
 from django.utils import timezone
 from django.utils.safestring import SafeString
 
 import pytest
+from pypdf import PdfReader, PdfWriter
 
+from froide.campaign.matcher import get_campaign_matcher
+from froide.campaign.models import Campaign
+from froide.campaign.validators import validate_not_campaign
 from froide.comments.models import FroideComment
+from froide.foirequest.fragment_cache import fragment_cache
 from froide.foirequest.models import FoiMessage, FoiRequest
 from froide.foirequest.notifications import batch_update_requester
+from froide.foirequest.ocr import OCRChunkJob
 from froide.foirequest.tasks import (
     classification_reminder,
     detect_asleep,
     detect_overdue,
+    ocr_pdf_chunk_task,
+    ocr_pdf_merge_task,
+    ocr_pdf_watchdog_task,
 )
 from froide.foirequest.templatetags.foirequest_tags import (
     check_same_request,
+    redact_message,
     render_message_content,
 )
 from froide.foirequest.tests import factories
@@ -198,6 +215,86 @@ class RenderMessageContentTest(TestCase):
         self.assertEqual(render_message_content(msg), expected)
 
 
+class RequestFragmentCacheTest(TestCase):
+    def setUp(self):
+        self.site = factories.make_world()
+        self.req = factories.FoiRequestFactory.create(site=self.site)
+        self.request = RequestFactory().get("/")
+        self.request.user = AnonymousUser()
+        self.request.session = {}
+
+    def get_message(self, msg):
+        # Fresh objects like on a new page view
+        msg = FoiMessage.objects.get(id=msg.id)
+        msg.request = FoiRequest.objects.get(id=self.req.id)
+        return msg
+
+    def test_message_fragment(self):
+        msg = factories.FoiMessageFactory.create(
+            request=self.req, plaintext="aaaaa", plaintext_redacted="aaaaa"
+        )
+        self.assertEqual(redact_message(self.get_message(msg), self.request), "aaaaa")
+        hits = fragment_cache.get_stats().get("hit", 0)
+        self.assertEqual(redact_message(self.get_message(msg), self.request), "aaaaa")
+        self.assertEqual(fragment_cache.get_stats()["hit"], hits + 1)
+
+        msg.plaintext_redacted = "[redacted]"
+        msg.clear_render_cache()
+        msg.save()
+        self.assertEqual(
+            redact_message(self.get_message(msg), self.request),
+            '<span class="redacted">[redacted]</span>',
+        )
+
+
+@pytest.mark.django_db
+def test_cache_text_redactions_command(foi_message_factory, tmp_path):
+    text = "x" * (FoiMessage.CONTENT_CACHE_THRESHOLD + 1)
+    messages = [
+        foi_message_factory(plaintext=text, plaintext_redacted=text) for _ in range(3)
+    ]
+    checkpoint = tmp_path / "checkpoint"
+
+    call_command("cache_text_redactions", chunk_size=2, checkpoint=str(checkpoint))
+
+    assert checkpoint.read_text() == str(messages[-1].id)
+    for message in messages:
+        message.refresh_from_db()
+        assert message.redacted_content_anon is not None
+        assert message.content_rendered_auth is not None
+
+    # Resumes after the last finished message
+    FoiMessage.objects.update(content_rendered_auth=None)
+    call_command("cache_text_redactions", checkpoint=str(checkpoint))
+    assert not FoiMessage.objects.filter(content_rendered_auth__isnull=False).exists()
+
+
+@pytest.mark.django_db
+def test_cache_text_redactions_command_celery(foi_message_factory, tmp_path):
+    text = "x" * (FoiMessage.CONTENT_CACHE_THRESHOLD + 1)
+    messages = [
+        foi_message_factory(plaintext=text, plaintext_redacted=text) for _ in range(3)
+    ]
+    checkpoint = tmp_path / "checkpoint"
+
+    with mock.patch(
+        "froide.foirequest.tasks.cache_text_redactions_task.delay"
+    ) as delay:
+        call_command(
+            "cache_text_redactions",
+            chunk_size=2,
+            celery=True,
+            checkpoint=str(checkpoint),
+        )
+
+    assert [call.args[0] for call in delay.call_args_list] == [
+        [messages[0].id, messages[1].id],
+        [messages[2].id],
+    ]
+    # Enqueued chunks may still fail, they must not be skipped on resume
+    assert not checkpoint.exists()
+
+
 @pytest.mark.django_db
 @pytest.mark.parametrize("auth", [True, False])
 def test_redacted_content_cache(foi_message_factory, django_assert_num_queries, auth):
@@ -263,3 +360,137 @@ def test_cached_rendered_content(
         redacted_content = render_message_content(redacted_foi_message, auth)
         assert redacted_content == expected_redacted_content[auth]
         assert redacted_content == expected_redacted_content[auth]
+
+
+@pytest.mark.django_db
+def test_campaign_matcher_invalidated_on_save(django_assert_num_queries):
+    campaign = Campaign.objects.create(
+        name="Campaign",
+        slug="campaign",
+        ident="campaign",
+        public=True,
+        active=True,
+        request_match="Frag den\nAusschuss",
+        request_hint="Use the campaign",
+    )
+    data = {"subject": "Frag den Staat", "body": "Sitzungen im Ausschuss"}
+    with pytest.raises(ValidationError, match="Use the campaign"):
+        validate_not_campaign(data)
+    with django_assert_num_queries(0):
+        validate_not_campaign({"subject": "Other", "body": "Request"})
+        assert get_campaign_matcher().get_campaign_id("other") is None
+    assert get_campaign_matcher().get_campaign_id("campaign") == campaign.id
+
+    campaign.active = False
+    campaign.save()
+    validate_not_campaign(data)
+
+
+class OCRChunkJobTest(TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_path = Path(temp_dir.name)
+        media_root = self.temp_path / "media"
+        media_root.mkdir()
+        settings_override = override_settings(MEDIA_ROOT=str(media_root))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def make_pdf(self, page_count):
+        writer = PdfWriter()
+        for i in range(page_count):
+            writer.add_blank_page(width=100 + i, height=100)
+        path = self.temp_path / "input.pdf"
+        with open(path, "wb") as f:
+            writer.write(f)
+        return path
+
+    def make_ocr_result(self, path):
+        out = BytesIO()
+        writer = PdfWriter()
+        writer.append(path)
+        writer.add_metadata({"/Title": "ocr"})
+        writer.write(out)
+        return out.getvalue()
+
+    def test_split_and_merge(self):
+        job = OCRChunkJob.create(1, self.make_pdf(5), 2)
+        self.assertEqual(job.chunk_count, 3)
+        self.assertEqual(len(PdfReader(job.get_input_path(2)).pages), 1)
+        self.assertFalse(job.is_complete())
+        self.assertIsNone(job.merge())
+
+        job.save_result(0, self.make_ocr_result(job.get_input_path(0)))
+        job.mark_failed(1)
+        self.assertFalse(job.is_complete())
+        job.save_result(2, self.make_ocr_result(job.get_input_path(2)))
+        self.assertTrue(job.is_complete())
+
+        self.assertTrue(job.claim_merge())
+        self.assertFalse(job.claim_merge())
+
+        merged = PdfReader(BytesIO(job.merge()))
+        widths = [int(page.mediabox.width) for page in merged.pages]
+        # Failed chunk keeps its original pages in order
+        self.assertEqual(widths, [100, 101, 102, 103, 104])
+
+        job.cleanup()
+        self.assertFalse(job.has_result(0))
+        self.assertFalse(job.has_inputs())
+        # Late chunk tasks cannot merge again
+        self.assertFalse(job.claim_merge())
+
+        # A new run starts with a new claim
+        job = OCRChunkJob.create(1, self.make_pdf(5), 2)
+        self.assertTrue(job.claim_merge())
+
+    def test_fail_missing(self):
+        job = OCRChunkJob.create(1, self.make_pdf(5), 2)
+        job.save_result(0, self.make_ocr_result(job.get_input_path(0)))
+        self.assertEqual(job.get_done_count(), 1)
+        job.fail_missing()
+        self.assertTrue(job.is_complete())
+        self.assertTrue(job.has_result(0))
+        self.assertTrue(job.has_failed(2))
+
+    @mock.patch("froide.foirequest.tasks.ocr_pdf_merge_task.delay")
+    @mock.patch("filingcabinet.pdf_utils.run_ocr", side_effect=OSError("broken"))
+    def test_chunk_task_error(self, run_ocr, merge_delay):
+        job = OCRChunkJob.create(1, self.make_pdf(3), 2)
+        on_done = {"mode": "redact"}
+        ocr_pdf_chunk_task.apply((1, 0, 2, on_done))
+        # Errors are retried before the chunk counts as failed
+        self.assertEqual(run_ocr.call_count, 3)
+        self.assertTrue(job.has_failed(0))
+        merge_delay.assert_not_called()
+
+        ocr_pdf_chunk_task.apply((1, 1, 2, on_done))
+        merge_delay.assert_called_once_with(1, 2, on_done)
+
+    @mock.patch("froide.foirequest.tasks.ocr_pdf_merge_task.delay")
+    def test_watchdog_task(self, merge_delay):
+        job = OCRChunkJob.create(1, self.make_pdf(5), 2)
+        on_done = {"mode": "redact"}
+        job.save_result(0, self.make_ocr_result(job.get_input_path(0)))
+        with mock.patch(
+            "froide.foirequest.tasks.ocr_pdf_watchdog_task.apply_async"
+        ) as watchdog:
+            # Chunks finished since the last check, wait again
+            ocr_pdf_watchdog_task(1, 3, on_done)
+            watchdog.assert_called_once()
+            merge_delay.assert_not_called()
+
+            # No progress, missing chunks count as failed
+            ocr_pdf_watchdog_task(1, 3, on_done, done_count=1)
+        self.assertTrue(job.has_failed(1))
+        self.assertTrue(job.has_failed(2))
+        merge_delay.assert_called_once_with(1, 3, on_done)
+
+    def test_merge_task_after_merge(self):
+        job = OCRChunkJob.create(1, self.make_pdf(3), 2)
+        job.claim_merge()
+        job.cleanup()
+        # Does not look up or delete the target attachment
+        with self.assertNumQueries(0):
+            ocr_pdf_merge_task(1, 2, {"mode": "redact"})
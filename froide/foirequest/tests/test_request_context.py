@@ -0,0 +1,134 @@
+import gc
+import random
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from django.test import SimpleTestCase
+
+import pytest
+
+from froide.foirequest.views.request import (
+    can_see_attachment,
+    prepare_message_attachments,
+    prepare_message_events,
+)
+
+START = datetime(2020, 1, 1)
+
+
+def make_request_data(message_count, attachments_per_message, events_per_message):
+    rand = random.Random(message_count)
+    messages = [
+        SimpleNamespace(
+            id=i,
+            timestamp=START + timedelta(hours=i),
+            can_edit=rand.random() < 0.1,
+        )
+        for i in range(message_count)
+    ]
+    attachments = []
+    for i in range(message_count * attachments_per_message):
+        attachments.append(
+            SimpleNamespace(
+                id=i,
+                belongs_to_id=rand.randrange(message_count),
+                approved=rand.random() < 0.5,
+                redacted_id=i if rand.random() < 0.2 else None,
+                converted_id=None,
+                is_irrelevant=rand.random() < 0.2,
+                can_edit=rand.random() < 0.3,
+            )
+        )
+    events = sorted(
+        (
+            SimpleNamespace(
+                id=i,
+                timestamp=START + timedelta(minutes=rand.randrange(message_count * 60)),
+            )
+            for i in range(message_count * events_per_message)
+        ),
+        key=lambda ev: ev.timestamp,
+    )
+    return messages, attachments, events
+
+
+def get_expected_attachments(message, attachments, can_write):
+    listed = [
+        a
+        for a in attachments
+        if a.belongs_to_id == message.id and can_see_attachment(a, can_write)
+    ]
+    hidden = [a for a in listed if a.is_irrelevant]
+    return {
+        "all": [a for a in attachments if a.belongs_to_id == message.id],
+        "listed": listed,
+        "hidden": hidden,
+        "approved": [a for a in listed if a.approved and a not in hidden],
+        "unapproved": [a for a in listed if not a.approved and a not in hidden],
+        "can_edit": message.can_edit or any(a.can_edit for a in listed),
+    }
+
+
+def get_expected_events(messages, events):
+    expected = {}
+    last_index = len(events)
+    for message in reversed(messages):
+        expected[message.id] = [
+            ev for ev in events[:last_index] if ev.timestamp >= message.timestamp
+        ]
+        last_index -= len(expected[message.id])
+    return expected
+
+
+class RequestContextTest(SimpleTestCase):
+    def test_prepare_message_attachments(self):
+        messages, attachments, _events = make_request_data(50, 4, 0)
+        for can_write in (True, False):
+            prepare_message_attachments(messages, attachments, can_write)
+            for message in messages:
+                expected = get_expected_attachments(message, attachments, can_write)
+                self.assertEqual(message.all_attachments, expected["all"])
+                self.assertEqual(message.listed_attachments, expected["listed"])
+                self.assertEqual(message.hidden_attachments, expected["hidden"])
+                self.assertEqual(message.approved_attachments, expected["approved"])
+                self.assertEqual(message.unapproved_attachments, expected["unapproved"])
+                self.assertEqual(message.can_edit_attachments, expected["can_edit"])
+                for att in message.all_attachments:
+                    self.assertIs(att.belongs_to, message)
+
+    def test_prepare_message_events(self):
+        messages, _attachments, events = make_request_data(50, 0, 5)
+        # Events before the first message belong to no message
+        events.insert(0, SimpleNamespace(id=-1, timestamp=START - timedelta(days=1)))
+        prepare_message_events(messages, events)
+        expected = get_expected_events(messages, events)
+        for message in messages:
+            self.assertEqual(message.events, expected[message.id])
+
+
+def run_prepare(message_count):
+    messages, attachments, events = make_request_data(message_count, 10, 5)
+    # Garbage collection time grows with all objects alive
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        prepare_message_attachments(messages, attachments, True)
+        prepare_message_events(messages, events)
+        return time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+@pytest.mark.benchmark
+def test_prepare_request_context_scales_linearly():
+    """
+    Preparing eight times as many messages, attachments and events must
+    not take much more than eight times as long.
+    """
+    small, large = 100, 800
+    small_time = min(run_prepare(small) for _ in range(3))
+    large_time = min(run_prepare(large) for _ in range(3))
+    ratio = large_time / small_time
+    # A quadratic implementation has a ratio of about 64
+    assert ratio < 32
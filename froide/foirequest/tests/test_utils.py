@@ -1,7 +1,7 @@
 from django.test import TestCase
 
 from froide.foirequest.tests import factories
-from froide.foirequest.utils import get_publicbody_for_email
+from froide.foirequest.utils import get_address_book, get_publicbody_for_email
 from froide.publicbody.factories import FoiLawFactory, PublicBodyFactory
 
 
@@ -38,3 +38,35 @@ class FoiRequestPublicBodyInfoTest(TestCase):
 
         pb = get_publicbody_for_email(self.mediator.email, self.req)
         self.assertEqual(pb, self.mediator)
+
+    def test_get_publicbody_for_email_domain(self):
+        other = PublicBodyFactory(
+            email="info@ministry.example.org",
+            alternative_emails={"IFG": "foi@Agency.example.net"},
+        )
+        pb = get_publicbody_for_email("clerk@agency.example.net", self.req)
+        self.assertEqual(pb, other)
+
+        other.alternative_emails = None
+        other.save()
+        pb = get_publicbody_for_email("clerk@agency.example.net", self.req)
+        self.assertIsNone(pb)
+        pb = get_publicbody_for_email("clerk@ministry.example.org", self.req)
+        self.assertEqual(pb, other)
+
+    def test_address_book_memoized(self):
+        book = get_address_book(self.req)
+        self.assertIs(get_address_book(self.req), book)
+        self.assertEqual(book.get(self.pb1_alt_email.upper()).publicbody, self.pb1)
+
+        factories.FoiMessageFactory(
+            request=self.req,
+            is_response=True,
+            sender_public_body=None,
+            sender_email="clerk@other.example.org",
+        )
+        self.req._messages = None
+        new_book = get_address_book(self.req)
+        self.assertIsNot(new_book, book)
+        self.assertIsNotNone(new_book.get("clerk@other.example.org"))
+        self.assertIsNone(new_book.get_publicbody("clerk@other.example.org"))
@@ -5,10 +5,11 @@ from dataclasses import dataclass
 from datetime import timedelta
 from io import BytesIO
 from pathlib import PurePath
-from typing import Iterator, List, Optional, Tuple, Union
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 
 from django import forms
 from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.core.files import File
 from django.core.mail import mail_managers
@@ -34,12 +35,13 @@ from froide.helper.text_utils import (
     redact_user_strings,
 )
 from froide.proof.models import ProofAttachment
-from froide.publicbody.models import FoiLaw, PublicBody
+from froide.publicbody.models import FoiLaw, PublicBody, PublicBodyEmail
 
 from .models import FoiAttachment, FoiRequest
 
 MAX_ATTACHMENT_SIZE = settings.FROIDE_CONFIG["max_attachment_size"]
 RECIPIENT_BLOCKLIST = settings.FROIDE_CONFIG.get("recipient_blocklist_regex", None)
+MESSAGE_ADDRESSES_CACHE_TIMEOUT = 60 * 60 * 24 * 7
 
 
 @dataclass
@@ -302,9 +304,7 @@ def get_publicbody_for_email(
     if not email:
         return None
 
-    pb_info_list = list(get_emails_from_request(foirequest))
-
-    pb = compare_publicbody_email(email, pb_info_list)
+    pb = get_address_book(foirequest).get_publicbody(email)
     if pb:
         return pb
 
@@ -312,7 +312,7 @@ def get_publicbody_for_email(
     email_host = get_host(email)
     if email_host is None:
         return None
-    pbs = PublicBody.objects.filter(email__endswith=email_host)
+    pbs = PublicBodyEmail.objects.get_publicbodies_for_host(email_host)
     if len(pbs) == 1:
         return pbs[0]
     elif foirequest.public_body in pbs:
@@ -370,10 +370,9 @@ def send_request_user_email(
 
 
 def get_info_for_email(foirequest, email):
-    email = email.lower()
-    for email_info in get_emails_from_request(foirequest):
-        if email == email_info.email.lower():
-            return email_info
+    email_info = get_address_book(foirequest).get(email)
+    if email_info is not None:
+        return email_info
     return PublicBodyEmailInfo(email="", name="")
 
 
@@ -421,8 +420,9 @@ def get_emails_from_request_iterator(
 
     # Get emails from response messages,
     domains = tuple(get_foi_mail_domains())
-    messages = foirequest.response_messages()
-    for message in reversed(messages):
+    messages = list(reversed(foirequest.response_messages()))
+    addresses = get_message_addresses(foirequest, messages)
+    for message in messages:
         email = message.sender_email
         if not email and message.sender_public_body:
             email = message.sender_public_body.email
@@ -435,19 +435,18 @@ def get_emails_from_request_iterator(
             )
 
     # Get emails from response messages other recipients
-    for message in reversed(messages):
-        if message.email_headers:
-            for email in get_emails_from_message_headers(message.email_headers):
-                if email.endswith(domains):
-                    continue
-                yield PublicBodyEmailInfo(
-                    email=email,
-                    name="",
-                    publicbody=None,
-                )
+    for message in messages:
+        for email in addresses[message.id][0]:
+            if email.endswith(domains):
+                continue
+            yield PublicBodyEmailInfo(
+                email=email,
+                name="",
+                publicbody=None,
+            )
 
-    for message in reversed(messages):
-        for email in find_all_emails(message.plaintext):
+    for message in messages:
+        for email in addresses[message.id][1]:
             if email.endswith(domains):
                 continue
             yield PublicBodyEmailInfo(email=email, name=email, publicbody=None)
@@ -461,24 +460,129 @@ def get_emails_from_request_iterator(
         )
 
 
-def get_emails_from_request(
+def get_message_addresses(
+    foirequest: FoiRequest, messages
+) -> Dict[int, Tuple[List[str], List[str]]]:
+    """
+    Returns header and text email addresses by message id.
+    They are cached per request and only extracted again for new
+    or modified messages.
+    """
+    cache_key = "foirequest:{}:message_addresses".format(foirequest.id)
+    cached = cache.get(cache_key) or {}
+    entries = {}
+    for message in messages:
+        version = message.last_modified_at
+        entry = cached.get(message.id)
+        if entry is None or entry[0] != version:
+            header_emails = []
+            if message.email_headers:
+                header_emails = list(
+                    get_emails_from_message_headers(message.email_headers)
+                )
+            entry = (version, header_emails, find_all_emails(message.plaintext))
+        entries[message.id] = entry
+    if entries != cached:
+        cache.set(cache_key, entries, MESSAGE_ADDRESSES_CACHE_TIMEOUT)
+    return {
+        message_id: (header_emails, text_emails)
+        for message_id, (_v, header_emails, text_emails) in entries.items()
+    }
+
+
+EMAIL_TRANSFORMS = (str.lower, get_host, get_domain)
+
+
+class RequestAddressBook:
+    """
+    Deduplicated email addresses of a request with their public bodies.
+
+    Public bodies are indexed by full address, host and domain so that a
+    lookup gives the same result as compare_publicbody_email on the
+    address list without scanning it.
+    """
+
+    def __init__(self, pb_info_list: List[PublicBodyEmailInfo]):
+        self.entries: List[PublicBodyEmailInfo] = []
+        self.by_email: Dict[str, PublicBodyEmailInfo] = {}
+
+        # Addresses without public body are resolved against all
+        # addresses that have one, including those resolved before
+        self.publicbodies = self.make_index(pb_info_list)
+        for index, pb_info in enumerate(pb_info_list):
+            email = pb_info.email.lower()
+            if email in self.by_email:
+                continue
+            if not pb_info.publicbody:
+                pb = self.get_publicbody(email, compare_tld=False)
+                if pb:
+                    pb_info.publicbody = pb
+                    self.add_to_index(self.publicbodies, index, pb_info)
+            self.entries.append(pb_info)
+            self.by_email[email] = pb_info
+
+        self.publicbodies = self.make_index(self.entries)
+
+    @classmethod
+    def make_index(cls, pb_info_list):
+        index = tuple({} for _t in EMAIL_TRANSFORMS)
+        for position, pb_info in enumerate(pb_info_list):
+            if pb_info.publicbody:
+                cls.add_to_index(index, position, pb_info)
+        return index
+
+    @staticmethod
+    def add_to_index(index, position, pb_info):
+        # Keep the first matching address like a list scan would
+        for transform, lookup in zip(EMAIL_TRANSFORMS, index):
+            key = transform(pb_info.email)
+            existing = lookup.get(key)
+            if existing is None or position < existing[0]:
+                lookup[key] = (position, pb_info.publicbody)
+
+    def get(self, email: str) -> Optional[PublicBodyEmailInfo]:
+        return self.by_email.get(email.lower())
+
+    def get_publicbody(self, email: str, compare_tld=True) -> Optional[PublicBody]:
+        transforms = EMAIL_TRANSFORMS if compare_tld else EMAIL_TRANSFORMS[:2]
+        for transform, lookup in zip(transforms, self.publicbodies):
+            match = lookup.get(transform(email))
+            if match is not None:
+                return match[1]
+        return None
+
+
+def get_address_book(
     foirequest: FoiRequest, include_mediator: bool = True
-) -> Iterator[PublicBodyEmailInfo]:
-    already = set()
-    pb_info_list = list(
-        get_emails_from_request_iterator(foirequest, include_mediator=include_mediator)
+) -> RequestAddressBook:
+    """
+    Address book of the request, memoized on the instance until its
+    public body or response messages change.
+    """
+    version = (
+        foirequest.public_body_id,
+        tuple((m.id, m.last_modified_at) for m in foirequest.response_messages()),
     )
+    if not hasattr(foirequest, "_address_books"):
+        foirequest._address_books = {}
+    books = foirequest._address_books
+    book_version, book = books.get(include_mediator, (None, None))
+    if book is None or book_version != version:
+        book = RequestAddressBook(
+            list(
+                get_emails_from_request_iterator(
+                    foirequest, include_mediator=include_mediator
+                )
+            )
+        )
+        books[include_mediator] = (version, book)
+    return book
 
-    for pb_info in pb_info_list:
-        email = pb_info.email.lower()
-        if email in already:
-            continue
-        if not pb_info.publicbody:
-            pb = compare_publicbody_email(email, pb_info_list, compare_tld=False)
-            if pb:
-                pb_info.publicbody = pb
-        yield pb_info
-        already.add(email)
+
+def get_emails_from_request(
+    foirequest: FoiRequest, include_mediator: bool = True
+) -> Iterator[PublicBodyEmailInfo]:
+    yield from get_address_book(foirequest, include_mediator=include_mediator).entries
 
 
 def get_emails_from_message_headers(email_headers):
@@ -778,13 +882,14 @@ def export_user_data(user):
                 ).encode("utf-8"),
             )
         for attachment in all_attachments:
-            try:
-                yield (
-                    "requests/%s/%s/%s" % (foirequest.id, message.id, attachment.name),
-                    attachment.get_bytes(),
-                )
-            except IOError:
-                pass
+            if not attachment.file:
+                continue
+            if not attachment.file.storage.exists(attachment.file.name):
+                continue
+            yield (
+                "requests/%s/%s/%s" % (foirequest.id, message.id, attachment.name),
+                attachment.get_chunks(),
+            )
 
     drafts = user.requestdraft_set.all()
     if drafts:
@@ -43,6 +43,7 @@ class BaseListRequestView(BaseSearchView):
 
 class ListRequestView(BaseListRequestView):
     feed = None
+    cache_results = True
     search_manager_kwargs = {
         "filter_order": FILTER_ORDER,
         "sub_filters": SUB_FILTERS,
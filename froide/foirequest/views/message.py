@@ -5,7 +5,7 @@ from functools import partial
 from django.conf import settings
 from django.contrib import messages
 from django.db import transaction
-from django.http import Http404, HttpResponse, JsonResponse
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.utils.translation import gettext as _
@@ -593,10 +593,12 @@ def download_message_letter_pdf(request, foirequest, message_id):
 
 @allow_read_foirequest_authenticated
 def download_message_package(request, foirequest, message_id):
-    from ..foi_mail import package_message
+    from ..foi_mail import package_message_file
 
     message = get_object_or_404(FoiMessage, request=foirequest, pk=message_id)
-    response = HttpResponse(package_message(message), content_type="application/zip")
+    response = FileResponse(
+        package_message_file(message), content_type="application/zip"
+    )
     name = "%s-%s" % (
         foirequest.slug,
         message.pk,
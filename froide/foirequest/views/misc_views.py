@@ -1,6 +1,6 @@
 from django.conf import settings
 from django.contrib.sitemaps import Sitemap
-from django.http import HttpResponse
+from django.http import FileResponse, HttpResponse
 from django.shortcuts import render
 
 from froide.frontpage.models import FeaturedRequest
@@ -8,7 +8,7 @@ from froide.helper.cache import cache_anonymous_page
 from froide.publicbody.models import PublicBody
 
 from ..decorators import allow_read_foirequest_authenticated
-from ..foi_mail import package_foirequest
+from ..foi_mail import package_foirequest_file
 from ..models import FoiRequest
 from ..pdf_generator import FoiRequestPDFGenerator
 
@@ -33,8 +33,8 @@ def index(request):
 
 @allow_read_foirequest_authenticated
 def download_foirequest_zip(request, foirequest):
-    response = HttpResponse(
-        package_foirequest(foirequest), content_type="application/zip"
+    response = FileResponse(
+        package_foirequest_file(foirequest), content_type="application/zip"
     )
     name = "%s-%s" % (
         foirequest.slug,
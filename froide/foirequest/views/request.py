@@ -1,4 +1,6 @@
 import json
+from bisect import bisect_left
+from collections import defaultdict
 from urllib.parse import quote
 
 from django.shortcuts import get_object_or_404, redirect, render
@@ -51,6 +53,55 @@ def can_see_attachment(att, can_write):
     return True
 
 
+def prepare_message_attachments(messages, attachments, can_write):
+    """
+    Set attachment lists on messages after grouping all attachments of
+    the request by message in one pass.
+    """
+    by_message = defaultdict(list)
+    for att in attachments:
+        by_message[att.belongs_to_id].append(att)
+
+    for message in messages:
+        message.all_attachments = by_message.get(message.id, [])
+
+        # Preempt attribute access
+        for att in message.all_attachments:
+            att.belongs_to = message
+
+        message.listed_attachments = []
+        message.hidden_attachments = []
+        message.approved_attachments = []
+        message.unapproved_attachments = []
+        can_edit_attachments = False
+        for att in message.all_attachments:
+            if not can_see_attachment(att, can_write):
+                continue
+            message.listed_attachments.append(att)
+            can_edit_attachments = can_edit_attachments or att.can_edit
+            if att.is_irrelevant:
+                message.hidden_attachments.append(att)
+            elif att.approved:
+                message.approved_attachments.append(att)
+            else:
+                message.unapproved_attachments.append(att)
+        message.can_edit_attachments = message.can_edit or can_edit_attachments
+
+
+def prepare_message_events(messages, events):
+    """
+    Give every message the events from its timestamp up to the events
+    of the next message. Events must be ordered by timestamp.
+    """
+    events = list(events)
+    timestamps = [ev.timestamp for ev in events]
+    last_index = len(events)
+    for message in reversed(messages):
+        start = bisect_left(timestamps, message.timestamp, 0, last_index)
+        message.events = events[start:last_index]
+        last_index = start
+
+
 def show_foirequest(
     request, obj, template_name="foirequest/show.html", context=None, status=200
 ):
@@ -136,49 +187,14 @@ def get_foirequest_context(request, obj):
 
     for message in messages:
         message.request = obj
-        message.all_attachments = [
-            a for a in all_attachments if a.belongs_to_id == message.id
-        ]
-
-        # Preempt attribute access
-        for att in message.all_attachments:
-            att.belongs_to = message
-
-        message.listed_attachments = [
-            a
-            for a in all_attachments
-            if a.belongs_to_id == message.id and can_see_attachment(a, can_write)
-        ]
-        message.hidden_attachments = [
-            a for a in message.listed_attachments if a.is_irrelevant
-        ]
-        message.can_edit_attachments = message.can_edit or bool(
-            [a for a in message.listed_attachments if a.can_edit]
-        )
-        message.approved_attachments = [
-            a
-            for a in message.listed_attachments
-            if a.approved and a not in message.hidden_attachments
-        ]
-        message.unapproved_attachments = [
-            a
-            for a in message.listed_attachments
-            if not a.approved and a not in message.hidden_attachments
-        ]
+    prepare_message_attachments(messages, all_attachments, can_write)
 
     events = (
         FoiEvent.objects.filter(request=obj)
         .select_related("user", "request", "public_body")
         .order_by("timestamp")
     )
-
-    event_count = len(events)
-    last_index = event_count
-    for message in reversed(obj.messages):
-        message.events = [
-            ev for ev in events[:last_index] if ev.timestamp >= message.timestamp
-        ]
-        last_index = last_index - len(message.events)
+    prepare_message_events(obj.messages, events)
 
     # TODO: remove active_tab
     active_tab = "info"
@@ -205,6 +221,10 @@ def get_foirequest_context(request, obj):
     context["show_withdrawal_popup"] = (
         request.session.pop("show_withdrawal_popup", None) == obj.id
     )
+    if not context["show_withdrawal_popup"]:
+        return context
+
+    # Only the withdrawal popup uses the rendered withdrawal message
     context["default_withdrawal_message"] = quote(
         json.dumps(
             {
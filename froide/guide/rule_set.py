@@ -0,0 +1,245 @@
+import logging
+import re
+import time
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from django.db.models import Prefetch
+
+from .models import Action, Rule
+
+logger = logging.getLogger(__name__)
+
+REGEX_SPECIAL = set(".^$*+?{}[]\\|()")
+
+RuleMatch = Tuple[Rule, Optional[re.Match], Optional[re.Match]]
+
+
+def get_pattern_lines(text: str) -> List[str]:
+    # Same line splitting as models.compile_text
+    return [s.strip() for s in text.splitlines() if s.strip()]
+
+
+def get_literals(text: str) -> Optional[List[str]]:
+    """
+    Returns the alternatives of a rule pattern if they are all plain
+    strings without regex syntax, otherwise None.
+    """
+    lines = get_pattern_lines(text)
+    if not lines:
+        return None
+    if any(REGEX_SPECIAL.intersection(line) for line in lines):
+        return None
+    return lines
+
+
+class LiteralMatcher:
+    """
+    Finds the first position of many literal strings in one pass.
+
+    All literals are combined into one lookahead alternation, longest
+    first, so the regex engine reports the longest literal at every
+    position. Shorter literals starting at the same position are
+    prefixes of it and are derived from a precomputed prefix table.
+    """
+
+    def __init__(self, literals: Iterable[str]):
+        self.literals = sorted(set(literals), key=lambda x: (-len(x), x))
+        self.pattern = None
+        if self.literals:
+            self.pattern = re.compile(
+                "(?=({}))".format("|".join(re.escape(x) for x in self.literals))
+            )
+        self.prefixes: Dict[str, List[str]] = {
+            literal: [
+                other
+                for other in self.literals
+                if other != literal and literal.startswith(other)
+            ]
+            for literal in self.literals
+        }
+
+    def find_first(self, text: str) -> Dict[str, int]:
+        positions: Dict[str, int] = {}
+        if self.pattern is None:
+            return positions
+        for match in self.pattern.finditer(text):
+            literal = match.group(1)
+            if literal in positions:
+                continue
+            start = match.start()
+            positions[literal] = start
+            for prefix in self.prefixes[literal]:
+                positions.setdefault(prefix, start)
+            if len(positions) == len(self.literals):
+                break
+        return positions
+
+
+class CompiledRule:
+    def __init__(self, rule: Rule):
+        self.rule = rule
+        self.id = rule.id
+        self.includes_re = rule.includes_re
+        self.excludes_re = rule.excludes_re
+        self.references_re = rule.references_re
+        self.include_literals = get_literals(rule.includes)
+        self.exclude_literals = get_literals(rule.excludes)
+        self.jurisdiction_ids = {x.id for x in rule.jurisdictions.all()}
+        self.publicbody_ids = {x.id for x in rule.publicbodies.all()}
+        self.category_ids = {x.id for x in rule.categories.all()}
+
+    @staticmethod
+    def search(
+        regex: re.Pattern, literals: Optional[List[str]], found: Dict[str, int], text
+    ) -> Optional[re.Match]:
+        if literals is None:
+            return regex.search(text)
+        positions = [found[x] for x in literals if x in found]
+        if not positions:
+            return None
+        # Leftmost literal hit is where the full pattern matches first
+        return regex.search(text, min(positions))
+
+    def match(
+        self, tags: Set[int], text: str, found: Dict[str, int]
+    ) -> Optional[Tuple[Optional[re.Match], Optional[re.Match]]]:
+        rule = self.rule
+        if rule.has_tag_id and rule.has_tag_id not in tags:
+            return None
+        if rule.has_no_tag_id and rule.has_no_tag_id in tags:
+            return None
+
+        include_match = None
+        if self.includes_re:
+            include_match = self.search(
+                self.includes_re, self.include_literals, found, text
+            )
+            if include_match is None:
+                return None
+        exclude_match = None
+        if self.excludes_re:
+            exclude_match = self.search(
+                self.excludes_re, self.exclude_literals, found, text
+            )
+            if exclude_match is not None:
+                return None
+        return (include_match, exclude_match)
+
+
+class RuleSet:
+    """
+    All rules loaded once with precompiled patterns, indexed by
+    jurisdiction, public body and category. Used when guidance runs over
+    many messages so that every message does not query and compile the
+    rules again.
+    """
+
+    def __init__(self, rules: Iterable[Rule]):
+        self.rules: List[CompiledRule] = [CompiledRule(rule) for rule in rules]
+        self.any_jurisdiction: Set[int] = set()
+        self.any_publicbody: Set[int] = set()
+        self.any_category: Set[int] = set()
+        self.by_jurisdiction: Dict[int, Set[int]] = defaultdict(set)
+        self.by_publicbody: Dict[int, Set[int]] = defaultdict(set)
+        self.by_category: Dict[int, Set[int]] = defaultdict(set)
+        literals = set()
+        for index, compiled in enumerate(self.rules):
+            self._add_to_index(
+                index,
+                compiled.jurisdiction_ids,
+                self.any_jurisdiction,
+                self.by_jurisdiction,
+            )
+            self._add_to_index(
+                index,
+                compiled.publicbody_ids,
+                self.any_publicbody,
+                self.by_publicbody,
+            )
+            self._add_to_index(
+                index, compiled.category_ids, self.any_category, self.by_category
+            )
+            literals.update(compiled.include_literals or ())
+            literals.update(compiled.exclude_literals or ())
+        self.literal_matcher = LiteralMatcher(literals)
+        self.publicbody_categories: Dict[int, Set[int]] = {}
+        self.timings: Counter = Counter()
+        self.stats: Counter = Counter()
+
+    @staticmethod
+    def _add_to_index(index, ids, any_set, index_map):
+        if not ids:
+            any_set.add(index)
+        for obj_id in ids:
+            index_map[obj_id].add(index)
+
+    @classmethod
+    def load(cls, active_only: bool = True) -> "RuleSet":
+        rules = Rule.objects.all()
+        if active_only:
+            rules = rules.filter(is_active=True)
+        rules = rules.order_by("priority", "name", "id").prefetch_related(
+            "jurisdictions",
+            "publicbodies",
+            "categories",
+            Prefetch("actions", queryset=Action.objects.select_related("tag")),
+        )
+        return cls(rules)
+
+    def get_category_ids(self, public_body) -> Set[int]:
+        if public_body.id not in self.publicbody_categories:
+            self.publicbody_categories[public_body.id] = set(
+                public_body.categories.all().values_list("id", flat=True)
+            )
+        return self.publicbody_categories[public_body.id]
+
+    def get_candidates(self, foirequest) -> List[CompiledRule]:
+        candidates = self.any_jurisdiction | self.by_jurisdiction.get(
+            foirequest.jurisdiction_id, set()
+        )
+        public_body = foirequest.public_body
+        if public_body is None:
+            return [
+                self.rules[i]
+                for i in sorted(candidates & self.any_publicbody & self.any_category)
+            ]
+        candidates &= self.any_publicbody | self.by_publicbody.get(
+            public_body.id, set()
+        )
+        category_rules = set(self.any_category)
+        for category_id in self.get_category_ids(public_body):
+            category_rules |= self.by_category.get(category_id, set())
+        candidates &= category_rules
+        # Indexes are in rule priority order
+        return [self.rules[i] for i in sorted(candidates)]
+
+    def match(self, foirequest, tags: Set[int], text: str) -> Iterator[RuleMatch]:
+        found = None
+        for compiled in self.get_candidates(foirequest):
+            if compiled.references_re:
+                if not compiled.references_re.search(foirequest.reference):
+                    continue
+            if found is None:
+                start = time.perf_counter()
+                found = self.literal_matcher.find_first(text)
+                self.timings[None] += time.perf_counter() - start
+            start = time.perf_counter()
+            result = compiled.match(tags, text, found)
+            self.timings[compiled.id] += time.perf_counter() - start
+            self.stats["evaluated"] += 1
+            if not result:
+                continue
+            self.stats["matched"] += 1
+            yield (compiled.rule, result[0], result[1])
+
+    def get_stats(self):
+        """
+        Returns match counts and the slowest rules by total match time.
+        The literal pre-pass is reported as rule None.
+        """
+        stats = dict(self.stats)
+        stats["rules"] = len(self.rules)
+        stats["literals"] = len(self.literal_matcher.literals)
+        stats["slowest"] = self.timings.most_common(10)
+        return stats
@@ -0,0 +1,121 @@
+from django.test import SimpleTestCase, TestCase
+
+from froide.foirequest.models import MessageTag
+from froide.foirequest.tests import factories
+from froide.publicbody.factories import CategoryFactory, JurisdictionFactory
+
+from ..models import Rule
+from ..rule_set import LiteralMatcher, RuleSet, get_literals
+from ..utils import GuidanceApplicator
+
+TEXTS = [
+    "Für die Auskunft werden Gebühren erhoben, siehe Kostenbescheid.",
+    "Der Kostenbescheid folgt. Die Kosten betragen 50 Euro.",
+    "Wir lehnen den Antrag ab, da Betriebsgeheimnisse betroffen sind.",
+    "Die Gebuehr entfällt, der Antrag ist gebührenfrei.",
+    "Sehr geehrte Damen und Herren, anbei die Unterlagen.",
+    "",
+]
+
+
+class LiteralsTest(SimpleTestCase):
+    def test_get_literals(self):
+        self.assertEqual(get_literals(" Kosten \n\nGebühr\n"), ["Kosten", "Gebühr"])
+        self.assertIsNone(get_literals("Geb(ü|ue)hr"))
+        self.assertIsNone(get_literals("Kosten\nGeb.hr"))
+        self.assertIsNone(get_literals(""))
+
+    def test_find_first(self):
+        matcher = LiteralMatcher(["Kosten", "Kostenbescheid", "Gebühr", "fehlt"])
+        self.assertEqual(
+            matcher.find_first("Gebühr und Kosten, Kostenbescheid, Gebühr"),
+            {"Gebühr": 0, "Kosten": 11, "Kostenbescheid": 19},
+        )
+        # Shorter literals are found at the start of longer ones
+        self.assertEqual(
+            matcher.find_first("Kostenbescheid"), {"Kostenbescheid": 0, "Kosten": 0}
+        )
+        self.assertEqual(LiteralMatcher([]).find_first("Kosten"), {})
+
+
+class RuleSetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = CategoryFactory()
+        cls.foirequest = factories.FoiRequestFactory()
+        cls.foirequest.public_body.categories.add(cls.category)
+        cls.tag = MessageTag.objects.create(name="Costs", slug="costs")
+        cls.messages = [
+            factories.FoiMessageFactory(request=cls.foirequest, plaintext=text)
+            for text in TEXTS
+        ]
+        cls.rules = [
+            # Literal includes, also prefixes of each other
+            Rule.objects.create(name="literal", includes="Kosten\nKostenbescheid"),
+            # Regular expression includes
+            Rule.objects.create(name="regex", priority=2, includes=r"Geb(ü|ue)hr"),
+            # Literal includes and excludes
+            Rule.objects.create(
+                name="exclude",
+                priority=3,
+                includes="Gebühr\nAntrag",
+                excludes="gebührenfrei",
+            ),
+            # Regular expression excludes
+            Rule.objects.create(
+                name="regex exclude", priority=4, includes="Antrag", excludes=r"\bab\b"
+            ),
+            # No patterns, only a tag condition
+            Rule.objects.create(name="tag", priority=5, has_tag=cls.tag),
+            Rule.objects.create(name="no tag", priority=6, has_no_tag=cls.tag),
+            Rule.objects.create(name="inactive", includes="Kosten", is_active=False),
+        ]
+        rule = Rule.objects.create(name="category", priority=7, includes="Unterlagen")
+        rule.categories.add(cls.category)
+        rule = Rule.objects.create(name="jurisdiction", priority=8, includes="Kosten")
+        rule.jurisdictions.add(JurisdictionFactory())
+        rule = Rule.objects.create(name="public body", priority=9, includes="Kosten")
+        rule.publicbodies.add(cls.foirequest.public_body)
+
+    def get_matches(self, message, tags, rule_set=None):
+        applicator = GuidanceApplicator(message, rule_set=rule_set)
+        return [
+            (
+                rule.id,
+                include_match.span() if include_match else None,
+                exclude_match.span() if exclude_match else None,
+            )
+            for rule, include_match, exclude_match in applicator.match_rules(
+                set(tags), message.plaintext
+            )
+        ]
+
+    def test_same_matches_as_rules(self):
+        rule_set = RuleSet.load()
+        for message in self.messages:
+            for tags in ([], [self.tag.id]):
+                with self.subTest(text=message.plaintext, tags=tags):
+                    self.assertEqual(
+                        self.get_matches(message, tags, rule_set=rule_set),
+                        self.get_matches(message, tags),
+                    )
+        stats = rule_set.get_stats()
+        self.assertEqual(stats["rules"], 9)
+        self.assertGreater(stats["matched"], 0)
+
+    def test_literal_match_position(self):
+        rule_set = RuleSet.load()
+        matches = self.get_matches(self.messages[1], [], rule_set=rule_set)
+        # Leftmost hit of the pattern, not of the longest literal
+        self.assertIn((self.rules[0].id, (4, 10), None), matches)
+
+    def test_candidates(self):
+        rule_set = RuleSet.load()
+        names = [c.rule.name for c in rule_set.get_candidates(self.foirequest)]
+        self.assertNotIn("inactive", names)
+        self.assertNotIn("jurisdiction", names)
+        self.assertIn("category", names)
+        self.assertIn("public body", names)
+        self.assertIn(
+            "inactive", [r.name for r in RuleSet.load(active_only=False).rules]
+        )
@@ -0,0 +1,115 @@
+from django.test import TestCase
+
+from froide.account.factories import UserFactory
+from froide.foirequest.models import FoiMessage, MessageTag
+from froide.foirequest.models.message import TaggedMessage
+from froide.foirequest.tests import factories
+
+from ..models import Action, Guidance, Rule
+from ..utils import apply_guidance_batch_generator, run_guidance
+
+TEXTS = [
+    "Für die Auskunft werden Kosten erhoben.",
+    "Die Kosten und die Gebühr werden erlassen.",
+    "Die Gebühr beträgt 50 Euro.",
+    "Anbei die Unterlagen.",
+]
+
+
+class GuidanceBatchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        foirequest = factories.FoiRequestFactory()
+        cls.costs_tag = MessageTag.objects.create(name="Costs", slug="costs")
+        cls.fee_tag = MessageTag.objects.create(name="Fee", slug="fee")
+        cls.costs_action = Action.objects.create(name="costs", label="Costs")
+        cls.tag_action = Action.objects.create(name="tag", tag=cls.costs_tag)
+        cls.fee_action = Action.objects.create(name="fee", label="Fee", tag=cls.fee_tag)
+        cls.costs_rule = Rule.objects.create(name="costs", includes="Kosten")
+        cls.costs_rule.actions.add(cls.costs_action, cls.tag_action)
+        # Depends on the tag of the previous rule in the same run
+        cls.fee_rule = Rule.objects.create(
+            name="fee", priority=2, includes="Gebühr", has_tag=cls.costs_tag
+        )
+        cls.fee_rule.actions.add(cls.fee_action)
+        cls.messages = [
+            factories.FoiMessageFactory(request=foirequest, plaintext=text)
+            for text in TEXTS
+        ]
+        # Guidance only runs on responses
+        factories.FoiMessageFactory(
+            request=foirequest, plaintext=TEXTS[1], sender_user=foirequest.user
+        )
+
+    def get_queryset(self):
+        return FoiMessage.objects.all().order_by("id")
+
+    def get_state(self):
+        guidances = sorted(
+            (g.message_id, g.action_id, g.rule_id, g.label, g.matches)
+            for g in Guidance.objects.all()
+        )
+        tags = sorted(TaggedMessage.objects.values_list("content_object_id", "tag_id"))
+        return guidances, tags
+
+    def run_single(self):
+        results = {}
+        for message in self.get_queryset():
+            result = run_guidance(message)
+            if result is not None:
+                results[message.id] = (result.created, result.deleted)
+        return results
+
+    def run_batch(self):
+        return {
+            message.id: (result.created, result.deleted)
+            for message, result in apply_guidance_batch_generator(
+                self.get_queryset(), batch_size=3
+            )
+        }
+
+    def test_same_as_single_messages(self):
+        single_results = self.run_single()
+        single_state = self.get_state()
+        Guidance.objects.all().delete()
+        TaggedMessage.objects.all().delete()
+
+        batch_results = self.run_batch()
+        self.assertEqual(batch_results, single_results)
+        self.assertEqual(self.get_state(), single_state)
+
+        guidances, tags = single_state
+        self.assertEqual(len(guidances), 3)
+        self.assertIn((self.messages[1].id, self.fee_tag.id), tags)
+        self.assertNotIn((self.messages[2].id, self.fee_tag.id), tags)
+
+    def test_rerun(self):
+        self.run_batch()
+        guidance_ids = set(Guidance.objects.values_list("id", flat=True))
+        state = self.get_state()
+
+        # Existing guidance is kept
+        results = self.run_batch()
+        self.assertEqual(set(results.values()), {(0, 0)})
+        self.assertEqual(
+            set(Guidance.objects.values_list("id", flat=True)), guidance_ids
+        )
+        self.assertEqual(self.get_state(), state)
+
+        # Guidance of rules that no longer match is deleted, custom is kept
+        message = self.messages[0]
+        custom = Guidance.objects.create(
+            message=message, label="Custom", user=UserFactory()
+        )
+        Rule.objects.filter(id=self.costs_rule.id).update(includes="Nichts")
+        results = self.run_batch()
+        self.assertEqual(results[message.id], (0, 1))
+        self.assertEqual(results[self.messages[1].id], (0, 1))
+        self.assertEqual(set(Guidance.objects.filter(message=message)), {custom})
+        self.assertTrue(
+            Guidance.objects.filter(
+                message=self.messages[1], action=self.fee_action
+            ).exists()
+        )
+        # Single message guidance finds nothing left to change
+        self.assertEqual(set(self.run_single().values()), {(0, 0)})
@@ -1,16 +1,22 @@
+import logging
 import re
 from collections import defaultdict, namedtuple
-from typing import Any, Iterator, List, Optional, Set, Tuple
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
 
+from django.db import transaction
 from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
 
-from froide.foirequest.models.message import FoiMessage
+from froide.foirequest.models.message import FoiMessage, TaggedMessage
 from froide.helper.admin_utils import make_choose_object_action
 from froide.helper.email_sending import mail_registry
 from froide.helper.text_utils import split_text_by_separator
 
 from .models import Action, Guidance, Rule
+from .rule_set import RuleSet
+
+logger = logging.getLogger(__name__)
 
 guidance_notification_mail = mail_registry.register(
     "guide/emails/new_guidance",
@@ -31,6 +37,9 @@ WS = re.compile(r"\s+")
 
 RuleMatch = Optional[Tuple[Optional[re.Match], Optional[re.Match]]]
 
+# Messages per chunk when running guidance over a queryset
+GUIDANCE_BATCH_SIZE = 500
+
 
 def prepare_text(text: str) -> str:
     text, _1 = split_text_by_separator(text)
@@ -39,11 +48,17 @@ def prepare_text(text: str) -> str:
 
 
 class GuidanceApplicator:
-    def __init__(self, message: FoiMessage, active_only: bool = True) -> None:
+    def __init__(
+        self,
+        message: FoiMessage,
+        active_only: bool = True,
+        rule_set: Optional[RuleSet] = None,
+    ) -> None:
         self.message = message
         self.created_count = 0
         self.deleted_count = 0
         self.active_only = active_only
+        self.rule_set = rule_set
 
     def filter_rules(self, rules: None = None) -> None:
         foirequest = self.message.request
@@ -91,18 +106,25 @@ class GuidanceApplicator:
                 return
         return (include_match, exclude_match)
 
-    def apply_rules_generator(self) -> Iterator[Guidance]:
-        rules = self.filter_rules()
+    def match_rules(self, tags: Set[int], text: str):
+        if self.rule_set is not None:
+            yield from self.rule_set.match(self.message.request, tags, text)
+            return
+        for rule in self.filter_rules():
+            result = self.match_rule(rule, tags, text)
+            if not result:
+                continue
+            yield (rule, result[0], result[1])
+
+    def get_tag_ids(self) -> Set[int]:
+        return set(self.message.tags.all().values_list("id", flat=True))
 
+    def apply_rules_generator(self) -> Iterator[Guidance]:
         message = self.message
-        tags = set(message.tags.all().values_list("id", flat=True))
+        tags = self.get_tag_ids()
         text = prepare_text(message.plaintext)
 
-        for rule in rules:
-            result = self.match_rule(rule, tags, text)
-            if not result:
-                continue
-            include_match, exclude_match = result
+        for rule, include_match, exclude_match in self.match_rules(tags, text):
             # Rule applies
             ctx = {"includes": include_match, "excludes": exclude_match, "tags": tags}
             yield from self.apply_rule(rule, **ctx)
@@ -149,13 +171,124 @@ class GuidanceApplicator:
         return GuidanceResult(guidances, self.created_count, self.deleted_count)
 
 
+class BatchGuidanceApplicator(GuidanceApplicator):
+    """
+    Applies rules to one message of a GuidanceBatch. Tags and guidances
+    are recorded on the batch instead of being written immediately.
+    """
+
+    def __init__(self, message: FoiMessage, batch: "GuidanceBatch") -> None:
+        super().__init__(message, rule_set=batch.rule_set)
+        self.batch = batch
+
+    def get_tag_ids(self) -> Set[int]:
+        return self.batch.tags[self.message.id]
+
+    def apply_action(self, action, tags=None, rule=None, includes=None):
+        guidance = self.batch.apply_action(
+            self.message, action, rule=rule, includes=includes
+        )
+        if guidance is not None and guidance.created:
+            self.created_count += 1
+        return guidance
+
+
+class GuidanceBatch:
+    """
+    Runs guidance over a chunk of messages with the tags and guidances of
+    the chunk loaded up front and all writes done in bulk.
+    """
+
+    def __init__(self, messages: List[FoiMessage], rule_set: RuleSet) -> None:
+        self.messages = [m for m in messages if m.is_response]
+        self.rule_set = rule_set
+        message_ids = [m.id for m in self.messages]
+
+        self.tags: Dict[int, Set[int]] = defaultdict(set)
+        tagged = TaggedMessage.objects.filter(content_object_id__in=message_ids)
+        for message_id, tag_id in tagged.values_list("content_object_id", "tag_id"):
+            self.tags[message_id].add(tag_id)
+
+        self.guidances: Dict[int, List[Guidance]] = defaultdict(list)
+        self.action_guidances: Dict[Tuple[int, int], Guidance] = {}
+        existing = Guidance.objects.filter(message_id__in=message_ids)
+        for guidance in existing.select_related("action").order_by("id"):
+            self.guidances[guidance.message_id].append(guidance)
+            if guidance.action_id is not None:
+                key = (guidance.message_id, guidance.action_id)
+                self.action_guidances.setdefault(key, guidance)
+
+        self.new_tags: List[TaggedMessage] = []
+        self.new_guidances: List[Guidance] = []
+
+    def apply_action(self, message, action, rule=None, includes=None):
+        tags = self.tags[message.id]
+        if action.tag_id and action.tag_id not in tags:
+            tags.add(action.tag_id)
+            self.new_tags.append(
+                TaggedMessage(content_object_id=message.id, tag_id=action.tag_id)
+            )
+        if not action.label:
+            return
+        key = (message.id, action.id)
+        guidance = self.action_guidances.get(key)
+        if guidance is not None:
+            guidance.created = False
+            return guidance
+        matches = None
+        if includes:
+            matches = {"span": list(includes.span())}
+        guidance = Guidance(message=message, action=action, rule=rule, matches=matches)
+        guidance.created = True
+        self.action_guidances[key] = guidance
+        self.new_guidances.append(guidance)
+        return guidance
+
+    def run(self) -> List[Tuple[FoiMessage, GuidanceResult]]:
+        applied = []
+        for message in self.messages:
+            applicator = BatchGuidanceApplicator(message, self)
+            applied.append((message, applicator, applicator.apply_rules()))
+
+        # Remove guidances that were there before but are not returned,
+        # keep custom guidances
+        results = []
+        delete_ids = []
+        for message, applicator, guidances in applied:
+            keep = {id(g) for g in guidances}
+            deleted = [
+                g.id
+                for g in self.guidances[message.id]
+                if g.user_id is None and id(g) not in keep
+            ]
+            delete_ids.extend(deleted)
+            results.append(
+                (
+                    message,
+                    GuidanceResult(guidances, applicator.created_count, len(deleted)),
+                )
+            )
+
+        with transaction.atomic():
+            if self.new_tags:
+                TaggedMessage.objects.bulk_create(self.new_tags)
+            if self.new_guidances:
+                Guidance.objects.bulk_create(self.new_guidances)
+            if delete_ids:
+                Guidance.objects.filter(id__in=delete_ids).delete()
+        return results
+
+
 def run_guidance(
-    message: FoiMessage, active_only: bool = True, notify: bool = False
+    message: FoiMessage,
+    active_only: bool = True,
+    notify: bool = False,
+    rule_set: Optional[RuleSet] = None,
 ) -> GuidanceResult:
     if not message.is_response:
         return
 
-    applicator = GuidanceApplicator(message, active_only=active_only)
+    applicator = GuidanceApplicator(message, active_only=active_only, rule_set=rule_set)
     result = applicator.run()
 
     if notify:
@@ -163,18 +296,41 @@ def run_guidance(
     return result
 
 
-def apply_guidance_generator(queryset):
+def apply_guidance_generator(queryset, rule_set=None):
+    if rule_set is None:
+        rule_set = RuleSet.load()
     for message in queryset:
-        result = run_guidance(message)
+        result = run_guidance(message, rule_set=rule_set)
         if result is None:
             continue
         yield message, result
+    logger.debug("Guidance rule set stats: %s", rule_set.get_stats())
+
+
+def apply_guidance_batch_generator(queryset, batch_size=GUIDANCE_BATCH_SIZE):
+    rule_set = RuleSet.load()
+    messages = queryset.iterator(chunk_size=batch_size)
+    while True:
+        chunk = list(islice(messages, batch_size))
+        if not chunk:
+            break
+        yield from GuidanceBatch(chunk, rule_set).run()
+    logger.debug("Guidance rule set stats: %s", rule_set.get_stats())
+
+
+def run_guidance_on_queryset(queryset, notify=False, batch_size=GUIDANCE_BATCH_SIZE):
+    """
+    Runs guidance on all messages of the queryset. With a batch_size
+    messages are processed in chunks with bulk writes, otherwise one by one.
+    """
+    queryset = queryset.order_by("request__user_id").select_related(
+        "request", "request__public_body"
+    )
 
-
-def run_guidance_on_queryset(queryset, notify=False):
-    queryset = queryset.order_by("request__user_id")
-
-    gen = apply_guidance_generator(queryset)
+    if batch_size:
+        gen = apply_guidance_batch_generator(queryset, batch_size=batch_size)
+    else:
+        gen = apply_guidance_generator(queryset)
     if notify:
         gen = notify_users_generator(gen)
 
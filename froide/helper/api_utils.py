@@ -3,9 +3,11 @@ from collections import OrderedDict
 
 from django.conf import settings
 from django.utils.html import format_html
+from django.utils.translation import gettext_lazy as _
 
 from elasticsearch_dsl.query import Q
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.renderers import JSONRenderer
 from rest_framework.request import Request
@@ -13,9 +15,20 @@ from rest_framework.response import Response
 from rest_framework.reverse import reverse
 from rest_framework.serializers import ListSerializer
 from rest_framework.test import APIRequestFactory
+from rest_framework.throttling import UserRateThrottle
 from rest_framework.utils.serializer_helpers import ReturnDict
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 from rest_framework_jsonp.renderers import JSONPRenderer
 
+from .search.cursor import (
+    CURSOR_PARAM,
+    InvalidCursor,
+    SearchCursor,
+    close_point_in_time,
+    get_cursor_salt,
+    open_point_in_time,
+)
+
 
 def get_fake_api_context(url="/"):
     factory = APIRequestFactory()
@@ -77,14 +90,63 @@ class CustomLimitOffsetPagination(LimitOffsetPagination):
         )
 
 
+class PointInTimeThrottle(UserRateThrottle):
+    """
+    Limits how many points in time a user opens, they hold resources
+    on the cluster until they expire.
+    """
+
+    scope = "search_point_in_time"
+    rate = "30/minute"
+
+
+class SearchExportThrottle(UserRateThrottle):
+    """
+    Limits exports of search results, every export walks the whole
+    result set with a point in time.
+    """
+
+    scope = "search_export"
+    rate = "10/hour"
+
+
 class ElasticLimitOffsetPagination(CustomLimitOffsetPagination):
+    """
+    Limit/offset pagination for search results. Offsets are capped by
+    Elasticsearch, passing a cursor parameter (empty to start) switches
+    to search_after pagination that reaches all results.
+    """
+
+    cursor_query_param = CURSOR_PARAM
+    invalid_cursor_message = _("Invalid cursor")
+    point_in_time_throttle_class = PointInTimeThrottle
+    cursor = None
+    cursor_salt = None
+    next_cursor = None
+
+    def get_cursor(self, request):
+        if self.cursor_query_param not in request.query_params:
+            return None
+        try:
+            return SearchCursor.decode(
+                request.query_params[self.cursor_query_param], self.cursor_salt
+            )
+        except InvalidCursor:
+            raise NotFound(self.invalid_cursor_message)
+
     def paginate_queryset(self, queryset, request, view=None):
         self.limit = self.get_limit(request)
         if self.limit is None:
             return None
 
-        self.offset = self.get_offset(request)
         self.request = request
+        self.view = view
+        self.cursor_salt = get_cursor_salt(queryset.sqs._index)
+        self.cursor = self.get_cursor(request)
+        if self.cursor is not None:
+            return self.paginate_cursor(queryset)
+
+        self.offset = self.get_offset(request)
 
         # Set offset limit on sqs before calling count!
         queryset = queryset[self.offset : self.offset + self.limit]
@@ -100,6 +162,47 @@ class ElasticLimitOffsetPagination(CustomLimitOffsetPagination):
         # Do not return anything
         return None
 
+    def should_open_point_in_time(self):
+        # Anonymous clients page without a consistent view of the index
+        if not self.request.user.is_authenticated:
+            return False
+        throttle = self.point_in_time_throttle_class()
+        return throttle.allow_request(self.request, self.view)
+
+    def paginate_cursor(self, queryset):
+        self.offset = 0
+        search = queryset.sqs
+        if not self.cursor.search_after and not self.cursor.pit_id:
+            if self.should_open_point_in_time():
+                # Keep a consistent view of the index while walking the results
+                self.cursor.pit_id = open_point_in_time(search)
+        queryset.apply_cursor(self.cursor, self.limit)
+        self.count = self.get_count(queryset)
+        self.next_cursor = queryset.get_next_cursor(self.cursor, self.limit)
+        if self.next_cursor is None and self.cursor.pit_id:
+            # Last page, release the point in time right away
+            response = getattr(queryset.response, "_d_", {})
+            close_point_in_time(search, response.get("pit_id", self.cursor.pit_id))
+        return None
+
+    def get_next_link(self):
+        if self.cursor is None:
+            return super().get_next_link()
+        if self.next_cursor is None:
+            return None
+        url = remove_query_param(
+            self.request.build_absolute_uri(), self.offset_query_param
+        )
+        return replace_query_param(
+            url, self.cursor_query_param, self.next_cursor.encode(self.cursor_salt)
+        )
+
+    def get_previous_link(self):
+        if self.cursor is not None:
+            # search_after only walks forward
+            return None
+        return super().get_previous_link()
+
 
 class OpenRefineReconciliationMixin(object):
     class RECONCILIATION_META:
@@ -1,4 +1,7 @@
+import time
+
 from django.contrib.messages import get_messages
+from django.core.cache import cache as default_cache
 from django.middleware.cache import CacheMiddleware
 from django.utils.decorators import decorator_from_middleware_with_args
 
@@ -31,3 +34,30 @@ def cache_page(timeout, cache=None, key_prefix=None):
     return decorator_from_middleware_with_args(MessageAwareCacheMiddleware)(
         cache_timeout=timeout, cache_alias=cache, key_prefix=key_prefix
     )
+
+
+def get_generation_key(name):
+    return "cache_generation:%s" % name
+
+
+def get_cache_generation(name):
+    """
+    Returns the current generation of name to be included in cache keys.
+    Bumping the generation invalidates all keys of older generations.
+    """
+    key = get_generation_key(name)
+    generation = default_cache.get(key)
+    if generation is None:
+        # Start from the current time so that an evicted counter
+        # does not revive entries of an earlier generation
+        default_cache.add(key, time.time_ns() // 1000, timeout=None)
+        generation = default_cache.get(key)
+    return generation
+
+
+def bump_cache_generation(name):
+    key = get_generation_key(name)
+    try:
+        default_cache.incr(key)
+    except ValueError:
+        default_cache.add(key, time.time_ns() // 1000, timeout=None)
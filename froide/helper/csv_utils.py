@@ -1,10 +1,33 @@
 import csv
+import dataclasses
 import re
 from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
 
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import QuerySet
 from django.http import StreamingHttpResponse
 
 FORMULA_START = re.compile(r"^([=\+\-@])")
+# Rows loaded per database round trip
+EXPORT_CHUNK_SIZE = 2000
+# Bytes of CSV collected before they are sent
+EXPORT_BUFFER_SIZE = 64 * 1024
+
+
+@dataclasses.dataclass
+class ExportField:
+    """
+    A CSV column that declares the relations and annotations its value
+    needs, so that they are loaded together with the exported rows.
+    Without getter the value is looked up like a string field.
+    """
+
+    name: str
+    getter: Optional[Callable[[Any], Any]] = None
+    select_related: Tuple[str, ...] = ()
+    prefetch_related: Tuple[str, ...] = ()
+    annotations: Dict[str, Any] = dataclasses.field(default_factory=dict)
 
 
 def export_csv_response(generator, name="export.csv"):
@@ -18,24 +41,35 @@ class FakeFile(object):
         self._last_string = string.encode("utf-8")
 
 
+def get_field_name(field):
+    if isinstance(field, ExportField):
+        return field.name
+    if isinstance(field, tuple):
+        return field[0]
+    return field
+
+
+def get_field_value(obj, field):
+    if isinstance(field, ExportField) and field.getter is not None:
+        return field.getter(obj)
+    if isinstance(field, tuple):
+        return field[1](obj)
+    value = obj
+    for f in get_field_name(field).split("__"):
+        value = getattr(value, f, None)
+        if value is None:
+            break
+    return value
+
+
 def get_dict(obj, fields):
     d = {}
 
     for field in fields:
-        if isinstance(field, tuple):
-            field_name = field[0]
-        else:
-            field_name = field
+        field_name = get_field_name(field)
         if field_name in d:
             continue
-        if isinstance(field, tuple):
-            value = field[1](obj)
-        else:
-            value = obj
-            for f in field.split("__"):
-                value = getattr(value, f, None)
-                if value is None:
-                    break
+        value = get_field_value(obj, field)
         if value is None:
             d[field_name] = ""
         elif isinstance(value, datetime):
@@ -45,8 +79,73 @@ def get_dict(obj, fields):
     return d
 
 
-def export_csv(queryset, fields):
-    yield from dict_to_csv_stream(export_dict_stream(queryset, fields))
+def get_path_relation(model, path):
+    """
+    Returns the longest prefix of a field path that select_related
+    can follow, or None.
+    """
+    relation = []
+    for part in path.split("__")[:-1]:
+        try:
+            model_field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            break
+        if not model_field.is_relation or not (
+            model_field.many_to_one or model_field.one_to_one
+        ):
+            break
+        relation.append(part)
+        model = model_field.related_model
+    return "__".join(relation) or None
+
+
+def prepare_export_queryset(queryset, fields):
+    """
+    Adds the relations and annotations that fields need to the queryset.
+    """
+    select_related = set()
+    prefetch_related = set()
+    annotations = {}
+    for field in fields:
+        if isinstance(field, ExportField):
+            select_related.update(field.select_related)
+            prefetch_related.update(field.prefetch_related)
+            annotations.update(field.annotations)
+            if field.getter is not None:
+                continue
+        elif isinstance(field, tuple):
+            continue
+        relation = get_path_relation(queryset.model, get_field_name(field))
+        if relation is not None:
+            select_related.add(relation)
+    if select_related:
+        queryset = queryset.select_related(*sorted(select_related))
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*sorted(prefetch_related))
+    # Querysets may already come with an annotation of that name
+    annotations = {
+        k: v for k, v in annotations.items() if k not in queryset.query.annotations
+    }
+    if annotations:
+        queryset = queryset.annotate(**annotations)
+    return queryset
+
+
+def iter_export_objects(queryset, fields, chunk_size=EXPORT_CHUNK_SIZE):
+    if not isinstance(queryset, QuerySet):
+        return iter(queryset)
+    queryset = prepare_export_queryset(queryset, fields)
+    # Uses server side cursors where the database supports them
+    return queryset.iterator(chunk_size=chunk_size)
+
+
+def export_csv(
+    queryset, fields, chunk_size=EXPORT_CHUNK_SIZE, buffer_size=EXPORT_BUFFER_SIZE
+):
+    objects = iter_export_objects(queryset, fields, chunk_size=chunk_size)
+    yield from buffer_stream(
+        dict_to_csv_stream(export_dict_stream(objects, fields)), buffer_size
+    )
 
 
 def export_dict_stream(queryset, fields):
@@ -58,6 +157,24 @@ def export_dict_stream(queryset, fields):
         yield d
 
 
+def buffer_stream(stream, buffer_size=EXPORT_BUFFER_SIZE):
+    """
+    Joins small byte strings of a stream into blocks of at least
+    buffer_size bytes.
+    """
+    buffer = []
+    size = 0
+    for chunk in stream:
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= buffer_size:
+            yield b"".join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield b"".join(buffer)
+
+
 def sanitize_row(row):
     for k, v in row.items():
         row[k] = FORMULA_START.sub("'\\1", str(v))
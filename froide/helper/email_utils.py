@@ -5,7 +5,7 @@ from collections import defaultdict, namedtuple
 from dataclasses import dataclass
 from email.message import EmailMessage
 from enum import Enum
-from typing import Iterator, Optional, Tuple, Union
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
 
 from django.conf import settings
 from django.utils import timezone
@@ -81,6 +81,7 @@ GENERIC_ERROR = DsnStatus(5, 0, 0)
 MAILBOX_FULL = DsnStatus(5, 5, 2)
 
 UID_RE = re.compile(r"UID\s+(?P<uid>\d+)")
+SIZE_RE = re.compile(r"RFC822\.SIZE\s+(?P<size>\d+)")
 
 
 def get_imap_message_uid(flag_bytes):
@@ -118,6 +119,99 @@ def get_unread_mails(
     mailbox.close()
 
 
+def make_uid_set(uids: Sequence[str]) -> str:
+    """
+    Compress UIDs into an IMAP sequence set, e.g. 1:3,7,9:10
+    """
+    numbers = sorted(set(int(uid) for uid in uids))
+    ranges = []
+    for number in numbers:
+        if ranges and ranges[-1][1] == number - 1:
+            ranges[-1][1] = number
+        else:
+            ranges.append([number, number])
+    return ",".join(
+        str(start) if start == end else "%d:%d" % (start, end) for start, end in ranges
+    )
+
+
+def parse_fetch_response(data) -> Iterator[Tuple[Optional[str], bytes]]:
+    for part in data:
+        # Literal responses come as (header, body) tuples,
+        # closing parentheses as plain bytes
+        if isinstance(part, tuple):
+            yield get_imap_message_uid(part[0]), part[1]
+
+
+def get_unread_mail_uids(mailbox: Union[imaplib.IMAP4_SSL, imaplib.IMAP4]) -> List[str]:
+    typ, data = mailbox.uid("SEARCH", None, "UNSEEN")
+    return [uid.decode() for uid in data[0].split()]
+
+
+def get_mail_sizes(
+    mailbox: Union[imaplib.IMAP4_SSL, imaplib.IMAP4], uids: Sequence[str]
+) -> Dict[str, int]:
+    typ, data = mailbox.uid("FETCH", make_uid_set(uids), "(RFC822.SIZE)")
+    sizes = {}
+    for line in data:
+        if isinstance(line, tuple):
+            line = line[0]
+        if not line:
+            continue
+        line = line.decode()
+        uid_match = UID_RE.search(line)
+        size_match = SIZE_RE.search(line)
+        if uid_match is None or size_match is None:
+            continue
+        sizes[uid_match.group("uid")] = int(size_match.group("size"))
+    return sizes
+
+
+def chunk_mail_uids(
+    uids: Sequence[str], sizes: Dict[str, int], chunk_size: int, max_bytes: int
+) -> Iterator[List[str]]:
+    """
+    Group UIDs into chunks of at most chunk_size mails and max_bytes total.
+    A single mail larger than max_bytes gets a chunk of its own.
+    """
+    chunk: List[str] = []
+    chunk_bytes = 0
+    for uid in uids:
+        size = sizes.get(uid, 0)
+        if chunk and (len(chunk) >= chunk_size or chunk_bytes + size > max_bytes):
+            yield chunk
+            chunk = []
+            chunk_bytes = 0
+        chunk.append(uid)
+        chunk_bytes += size
+    if chunk:
+        yield chunk
+
+
+def get_unread_mail_batches(
+    mailbox: Union[imaplib.IMAP4_SSL, imaplib.IMAP4],
+    flag=False,
+    chunk_size=50,
+    max_bytes=20 * 1024 * 1024,
+) -> Iterator[List[Tuple[Optional[str], bytes]]]:
+    """
+    Like get_unread_mails, but fetches and flags mails with one
+    UID FETCH/STORE round-trip per chunk of mails.
+    """
+    status, count = mailbox.select("Inbox")
+    uids = get_unread_mail_uids(mailbox)
+    if uids:
+        sizes = get_mail_sizes(mailbox, uids)
+        for uid_chunk in chunk_mail_uids(uids, sizes, chunk_size, max_bytes):
+            uid_set = make_uid_set(uid_chunk)
+            status, data = mailbox.uid("FETCH", uid_set, "(BODY[] UID)")
+            if flag:
+                mailbox.uid("STORE", uid_set, "+FLAGS", "\\Flagged")
+            yield list(parse_fetch_response(data))
+
+    mailbox.close()
+
+
 def delete_mails_by_recipient(
     mailbox: Union[imaplib.IMAP4_SSL, imaplib.IMAP4],
     recipient_mail: str,
@@ -177,8 +271,12 @@ def retrieve_mail_by_message_id(
 
 
 def unflag_mail(mailbox, uid):
+    unflag_mails(mailbox, [uid])
+
+
+def unflag_mails(mailbox, uids: Sequence[str]):
     status, count = mailbox.select("Inbox")
-    mailbox.uid("STORE", uid, "-FLAGS", "\\Flagged")
+    mailbox.uid("STORE", make_uid_set(uids), "-FLAGS", "\\Flagged")
     mailbox.close()
 
 
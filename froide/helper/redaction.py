@@ -1,10 +1,15 @@
 import base64
 import io
 import logging
+import multiprocessing
 import os
 import shutil
 import tempfile
 import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
 
 import PIL.Image as PILImage
 from filingcabinet.pdf_utils import (
@@ -26,6 +31,27 @@ from wand.image import Image
 
 logger = logging.getLogger(__name__)
 
+INVISIBLE_FONT_NAME = "invisible"
+
+
+def get_redaction_workers():
+    """
+    Number of parallel page workers, defaults to the usable CPU cores
+    """
+    workers = settings.FROIDE_CONFIG.get("redaction_workers")
+    if workers is not None:
+        return workers
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def get_page_executor(workers):
+    if multiprocessing.current_process().daemon:
+        # Daemonic processes (e.g. pool workers) cannot have children
+        return ThreadPoolExecutor(max_workers=workers)
+    return ProcessPoolExecutor(max_workers=workers, initializer=load_invisible_font)
+
 
 def rewrite_pdf(pdf_file, instructions):
     password = instructions.get("password")
@@ -129,25 +155,32 @@ def _redact_file(pdf_file, outpath, instructions, tries=0):
     ]
     image_generator = get_images_from_pdf(pdf_reader, pdf_file.name, page_image_numbers)
 
-    def get_page_iterator(page_instructions, image_generator):
-        for page_idx, instr in enumerate(page_instructions):
-            if instr["rects"]:
-                image_filename = next(image_generator)[1]
-                yield page_idx, instr, image_filename
-            else:
-                yield page_idx, instr, None
-
-    page_iterator = get_page_iterator(page_instructions, image_generator)
-    for page_idx, instr, image_filename in page_iterator:
-        instr["width"] = float(instr["width"])
-        try:
-            if not image_filename:
-                page = pdf_reader.pages[page_idx]
-            else:
-                page = get_redacted_page(image_filename, instr, dpi)
-        except (WandError, DelegateError, ValueError) as e:
-            raise PDFException(e, "rewrite")
+    try:
+        for instr in page_instructions:
+            instr["width"] = float(instr["width"])
+    except ValueError as e:
+        raise PDFException(e, "rewrite")
 
+    workers = min(get_redaction_workers(), len(page_image_numbers))
+    if workers > 1:
+        try:
+            redacted_pages = get_redacted_pages_parallel(
+                page_instructions, image_generator, dpi, workers, outpath
+            )
+        except BrokenProcessPool:
+            logger.warning("Redaction process pool broken, retrying sequentially")
+            image_generator = get_images_from_pdf(
+                pdf_reader, pdf_file.name, page_image_numbers
+            )
+            redacted_pages = get_redacted_pages(page_instructions, image_generator, dpi)
+    else:
+        redacted_pages = get_redacted_pages(page_instructions, image_generator, dpi)
+
+    for page_idx in range(num_pages):
+        if page_idx in redacted_pages:
+            page = PdfReader(io.BytesIO(redacted_pages[page_idx])).pages[0]
+        else:
+            page = pdf_reader.pages[page_idx]
         output.add_page(page)
 
     output_filename = os.path.join(outpath, "final.pdf")
@@ -156,8 +189,77 @@ def _redact_file(pdf_file, outpath, instructions, tries=0):
     return output_filename
 
 
+def iter_page_images(page_instructions, image_generator):
+    for page_idx, instr in enumerate(page_instructions):
+        if instr["rects"]:
+            image_filename = next(image_generator)[1]
+            yield page_idx, instr, image_filename
+
+
+def get_redacted_pages(page_instructions, image_generator, dpi):
+    redacted_pages = {}
+    for page_idx, instr, image_filename in iter_page_images(
+        page_instructions, image_generator
+    ):
+        try:
+            redacted_pages[page_idx] = render_redacted_page(image_filename, instr, dpi)
+        except (WandError, DelegateError, ValueError) as e:
+            raise PDFException(e, "rewrite")
+    return redacted_pages
+
+
+def keep_image_file(image_filename, outpath, page_idx):
+    """
+    Link page image into our directory as the image
+    generator may clean up its files while we still need them
+    """
+    _, ext = os.path.splitext(image_filename)
+    kept_filename = os.path.join(outpath, "page-%d%s" % (page_idx, ext))
+    try:
+        os.link(image_filename, kept_filename)
+    except OSError:
+        shutil.copyfile(image_filename, kept_filename)
+    return kept_filename
+
+
+def get_redacted_pages_parallel(
+    page_instructions, image_generator, dpi, workers, outpath
+):
+    """
+    Redact pages in a pool while further page images are still extracted
+    """
+    with get_page_executor(workers) as executor:
+        futures = {
+            page_idx: executor.submit(
+                render_redacted_page,
+                keep_image_file(image_filename, outpath, page_idx),
+                instr,
+                dpi,
+            )
+            for page_idx, instr, image_filename in iter_page_images(
+                page_instructions, image_generator
+            )
+        }
+        try:
+            return {page_idx: future.result() for page_idx, future in futures.items()}
+        except (WandError, DelegateError, ValueError) as e:
+            for future in futures.values():
+                future.cancel()
+            raise PDFException(e, "rewrite")
+
+
 def get_redacted_page(image_filename, instr, dpi):
+    writer = io.BytesIO(render_redacted_page(image_filename, instr, dpi))
+    temp_reader = PdfReader(writer)
+    return temp_reader.pages[0]
+
+
+def render_redacted_page(image_filename, instr, dpi):
+    """
+    Returns bytes of a one-page PDF with the redacted page image
+    """
     logger.debug("Redacting page %s", image_filename)
+    load_invisible_font()
     writer = io.BytesIO()
     pdf = canvas.Canvas(writer)
     with Image(filename=image_filename, resolution=dpi) as image:
@@ -195,16 +297,14 @@ def get_redacted_page(image_filename, instr, dpi):
         pdf.showPage()
         pdf.save()
 
-    writer.seek(0)
-    temp_reader = PdfReader(writer)
-    return temp_reader.pages[0]
+    return writer.getvalue()
 
 
 def add_text_on_pdf(pdf, text_obj, dpi, scale, height):
     raw_text = text_obj["text"]
     if not raw_text:
         return
-    font_name = "invisible"
+    font_name = INVISIBLE_FONT_NAME
     font_size = text_obj["fontSize"].replace("px", "")
     font_size = int(float(font_size) * 0.75)
     font_width = pdf.stringWidth(raw_text, font_name, font_size)
@@ -228,6 +328,8 @@ def add_text_on_pdf(pdf, text_obj, dpi, scale, height):
 # http://www.angelfire.com/pr/pgpf/if.html, which says:
 # 'Invisible font' is unrestricted freeware. Enjoy, Improve, Distribute freely
 def load_invisible_font():
+    if INVISIBLE_FONT_NAME in pdfmetrics.getRegisteredFontNames():
+        return
     font = """
 eJzdlk1sG0UUx/+zs3btNEmrUKpCPxikSqRS4jpfFURUagmkEQQoiRXgAl07Y3vL2mvt2ml8APXG
 hQPiUEGEVDhWVHyIC1REPSAhBOWA+BCgSoULUqsKcWhVBKjhzfPU+VCi3Flrdn7vzZv33ryZ3TUE
@@ -255,4 +357,4 @@ CMGjwvxTsr74/f/F95m3TH9x8o0/TU//N+7/D/ScVcA=
     uncompressed = bytearray(zlib.decompress(base64.decodebytes(font)))
     ttf = io.BytesIO(uncompressed)
     ttf.name = "(invisible.ttf)"
-    pdfmetrics.registerFont(TTFont("invisible", ttf))
+    pdfmetrics.registerFont(TTFont(INVISIBLE_FONT_NAME, ttf))
@@ -1,10 +1,15 @@
+from django.http import StreamingHttpResponse
+
 from django_filters import rest_framework as filters
 from elasticsearch_dsl.query import Q as ESQ
+from rest_framework.exceptions import NotAuthenticated
+from rest_framework.utils.encoders import JSONEncoder
 
 from froide.team.models import Team
 
-from ..api_utils import ElasticLimitOffsetPagination
+from ..api_utils import ElasticLimitOffsetPagination, SearchExportThrottle
 from . import SearchQuerySetWrapper
+from .cursor import iter_search_pages
 
 
 class ESQueryFilterBackend(filters.DjangoFilterBackend):
@@ -19,7 +24,12 @@ class ESQueryMixin:
     searchfilter_backend = ESQueryFilterBackend()
     searchfilterset_class = None
 
-    def search_view(self, request):
+    export_batch_size = 200
+    # Exports end after this many results
+    export_max_hits = 10000
+    export_throttle_class = SearchExportThrottle
+
+    def get_filtered_searchqueryset(self, request):
         self.sqs = self.get_searchqueryset()
 
         if self.searchfilterset_class is not None:
@@ -33,6 +43,10 @@ class ESQueryMixin:
             self.sqs.sqs = self.sqs.sqs.sort("_score")
 
         self.override_sqs()
+        return self.sqs
+
+    def search_view(self, request):
+        self.get_filtered_searchqueryset(request)
 
         paginator = ElasticLimitOffsetPagination()
         paginator.paginate_queryset(self.sqs, self.request, view=self)
@@ -45,6 +59,45 @@ class ESQueryMixin:
 
         return paginator.get_paginated_response(data)
 
+    def export_view(self, request):
+        """
+        Streams search results as newline delimited JSON, up to
+        export_max_hits results. Only for authenticated users.
+        """
+        if not request.user.is_authenticated:
+            raise NotAuthenticated()
+        throttle = self.export_throttle_class()
+        if not throttle.allow_request(request, self):
+            self.throttled(request, throttle.wait())
+
+        sqs = self.get_filtered_searchqueryset(request)
+        response = StreamingHttpResponse(
+            self.iter_export(sqs), content_type="application/x-ndjson"
+        )
+        response["Content-Disposition"] = 'attachment; filename="export.ndjson"'
+        response["X-Export-Max-Hits"] = str(self.export_max_hits)
+        return response
+
+    def iter_export(self, sqs):
+        serializer_class = self.get_serializer_class()
+        # Base context, facets are not part of exports
+        context = {"request": self.request, "format": None, "view": self}
+        encoder = JSONEncoder()
+        remaining = self.export_max_hits
+        pages = iter_search_pages(sqs, min(self.export_batch_size, remaining))
+        try:
+            for page in pages:
+                qs = self.optimize_query(page.to_queryset())
+                for obj in page.wrap_queryset(qs):
+                    data = serializer_class(obj, context=context).data
+                    yield encoder.encode(data) + "\n"
+                    remaining -= 1
+                    if remaining <= 0:
+                        return
+        finally:
+            # Closes the point in time when the export ends early
+            pages.close()
+
     def override_sqs(self):
         pass
 
@@ -0,0 +1,155 @@
+import copy
+import logging
+from dataclasses import dataclass
+from typing import Iterator, List, Optional
+
+from django.core import signing
+
+from elasticsearch_dsl.connections import get_connection
+
+logger = logging.getLogger(__name__)
+
+CURSOR_PARAM = "cursor"
+PIT_KEEP_ALIVE = "2m"
+# Without point in time results are ordered by index order on ties.
+# Search indexes have a single shard, see get_index.
+TIEBREAKER_SORT = "_doc"
+CURSOR_SALT = "froide.helper.search.cursor"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+@dataclass
+class SearchCursor:
+    """
+    Position after the last hit of a page for search_after pagination,
+    optionally bound to a point in time.
+    """
+
+    search_after: Optional[List] = None
+    pit_id: Optional[str] = None
+
+    def encode(self, salt: str) -> str:
+        data = {"a": self.search_after}
+        if self.pit_id:
+            data["p"] = self.pit_id
+        return signing.dumps(data, salt=salt, compress=True)
+
+    @classmethod
+    def decode(cls, value: str, salt: str) -> "SearchCursor":
+        if not value:
+            # Empty cursor starts from the beginning
+            return cls()
+        try:
+            data = signing.loads(value, salt=salt)
+        except signing.BadSignature as e:
+            raise InvalidCursor(str(e))
+        if not isinstance(data, dict):
+            raise InvalidCursor("Invalid cursor")
+        search_after = data.get("a")
+        pit_id = data.get("p")
+        if search_after is not None and not isinstance(search_after, list):
+            raise InvalidCursor("Invalid cursor")
+        if pit_id is not None and not isinstance(pit_id, str):
+            raise InvalidCursor("Invalid cursor")
+        return cls(search_after=search_after, pit_id=pit_id)
+
+
+def get_cursor_salt(indexes) -> str:
+    """
+    Cursors are signed per index so that positions and point in time
+    ids cannot be forged or replayed against other indexes.
+    """
+    return "{}:{}".format(CURSOR_SALT, ",".join(sorted(indexes or [])))
+
+
+def open_point_in_time(search, keep_alive=PIT_KEEP_ALIVE) -> Optional[str]:
+    """
+    Returns a point in time id for the indexes of the search or None
+    if the cluster does not support it.
+    """
+    indexes = search._index
+    if not indexes:
+        return None
+    try:
+        es = get_connection(search._using)
+        result = es.open_point_in_time(index=",".join(indexes), keep_alive=keep_alive)
+    except Exception as e:
+        logger.warning("Could not open point in time: %s", e)
+        return None
+    return result["id"]
+
+
+def close_point_in_time(search, pit_id):
+    if not pit_id:
+        return
+    try:
+        get_connection(search._using).close_point_in_time(id=pit_id)
+    except Exception as e:
+        logger.warning("Could not close point in time: %s", e)
+
+
+def add_tiebreaker(search):
+    sort = list(search._sort) or ["_score"]
+    if TIEBREAKER_SORT not in sort:
+        sort.append(TIEBREAKER_SORT)
+    return search.sort(*sort)
+
+
+def apply_cursor(search, cursor: SearchCursor, size: int, keep_alive=PIT_KEEP_ALIVE):
+    """
+    Returns the search for the page of size hits after cursor.
+    """
+    extra = {"size": size, "from": 0}
+    if cursor.pit_id:
+        # Searches with point in time must not name indexes and get
+        # an implicit _shard_doc tiebreaker
+        search = search.index()
+        extra["pit"] = {"id": cursor.pit_id, "keep_alive": keep_alive}
+        if not search._sort:
+            search = search.sort("_score")
+    else:
+        search = add_tiebreaker(search)
+    if cursor.search_after:
+        extra["search_after"] = cursor.search_after
+    return search.extra(**extra)
+
+
+def get_next_cursor(
+    response, cursor: SearchCursor, size: int
+) -> Optional[SearchCursor]:
+    hits = list(response)
+    if len(hits) < size:
+        return None
+    sort_values = getattr(hits[-1].meta, "sort", None)
+    if sort_values is None:
+        return None
+    # Point in time ids can change with every response
+    pit_id = getattr(response, "_d_", {}).get("pit_id", cursor.pit_id)
+    return SearchCursor(search_after=list(sort_values), pit_id=pit_id)
+
+
+def iter_search_pages(sqs, size: int, keep_alive=PIT_KEEP_ALIVE) -> Iterator:
+    """
+    Walks all hits of a SearchQuerySetWrapper page by page with
+    search_after and yields a wrapper for every page.
+    """
+    base_search = sqs.sqs
+    pit_id = open_point_in_time(base_search, keep_alive=keep_alive)
+    cursor = SearchCursor(pit_id=pit_id)
+    try:
+        while cursor is not None:
+            page = copy.copy(sqs)
+            page.sqs = base_search
+            page.aggregations = []
+            page.apply_cursor(cursor, size, keep_alive=keep_alive)
+            yield page
+            if page.broken_query:
+                break
+            cursor = page.get_next_cursor(cursor, size)
+            if cursor is not None:
+                pit_id = cursor.pit_id
+    finally:
+        close_point_in_time(base_search, pit_id)
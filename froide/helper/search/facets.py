@@ -1,6 +1,19 @@
+import re
+import threading
+import time
+from typing import Dict, Iterable
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
 from django.urls import NoReverseMatch, reverse
 from django.utils.http import urlencode
 
+FACET_CACHE_TIMEOUT = 60 * 60 * 24
+# Objects kept per model in the process before starting over
+FACET_LOCAL_MAX_SIZE = 10000
+FACET_URL_MARKER = "facetvaluemarker"
+URL_SAFE_VALUE = re.compile(r"^[A-Za-z0-9_.~-]+$")
+
 
 def key_getter(item):
     return item["key"]
@@ -11,6 +24,95 @@ class FakeObject:
         return ""
 
 
+class FacetObjectCache:
+    """
+    Caches objects that label facet buckets per model and pk in the
+    process and in the shared cache.
+
+    A version per model in the shared cache is bumped when an object of
+    the model is saved or deleted, which invalidates both levels in all
+    processes. Apps watch their facet models on ready so that saves in
+    any process bump the version.
+    """
+
+    def __init__(self):
+        self.local: Dict[str, tuple] = {}
+        self.lock = threading.Lock()
+
+    def get_label(self, model):
+        # Proxy models share the objects of their concrete model
+        return model._meta.concrete_model._meta.label_lower
+
+    def get_version_key(self, label):
+        return "facet-version:{}".format(label)
+
+    def get_version(self, label):
+        key = self.get_version_key(label)
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, int(time.time() * 1000), timeout=None)
+            version = cache.get(key)
+        return version
+
+    def get_object_key(self, label, version, pk):
+        return "facet-object:{}:{}:{}".format(label, version, pk)
+
+    def watch(self, model):
+        # Connecting clears the receiver cache of the signals,
+        # only call on app ready
+        uid = "facet-cache-{}".format(model._meta.label_lower)
+        post_save.connect(self.invalidate, sender=model, dispatch_uid=uid)
+        post_delete.connect(self.invalidate, sender=model, dispatch_uid=uid)
+
+    def invalidate(self, sender, **kwargs):
+        label = self.get_label(sender)
+        key = self.get_version_key(label)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, int(time.time() * 1000), timeout=None)
+        with self.lock:
+            self.local.pop(label, None)
+
+    def get_objects(self, model, pks: Iterable) -> Dict[str, object]:
+        label = self.get_label(model)
+        version = self.get_version(label)
+        pks = {str(pk) for pk in pks}
+
+        with self.lock:
+            local_version, objects = self.local.get(label, (None, {}))
+            if local_version != version or len(objects) > FACET_LOCAL_MAX_SIZE:
+                objects = {}
+                self.local[label] = (version, objects)
+            result = {pk: objects[pk] for pk in pks if pk in objects}
+
+        missing = pks - set(result)
+        if missing:
+            keys = {self.get_object_key(label, version, pk): pk for pk in missing}
+            for key, obj in cache.get_many(keys).items():
+                result[keys[key]] = obj
+            missing -= set(result)
+        if missing:
+            fetched = {
+                str(o.pk): o for o in model._default_manager.filter(pk__in=missing)
+            }
+            cache.set_many(
+                {
+                    self.get_object_key(label, version, pk): obj
+                    for pk, obj in fetched.items()
+                },
+                FACET_CACHE_TIMEOUT,
+            )
+            result.update(fetched)
+
+        with self.lock:
+            objects.update(result)
+        return result
+
+
+facet_object_cache = FacetObjectCache()
+
+
 class SearchManager:
     def __init__(
         self,
@@ -102,7 +204,7 @@ class SearchManager:
         if queryset is not None:
             objs = {str(o.pk): o for o in queryset.filter(pk__in=pks)}
         elif model is not None:
-            objs = {str(o.pk): o for o in model._default_manager.filter(pk__in=pks)}
+            objs = facet_object_cache.get_objects(model, pks)
 
         if objs is not None:
             for item in info["buckets"]:
@@ -111,16 +213,35 @@ class SearchManager:
                     item["object"] = objs[item_key]
                 else:
                     item["object"] = FakeObject()
+        d = self.filter_data.copy()
+        d.pop(query_key, None)
+        clear_url = self.make_filter_url(d)
+        url_template = self.make_filter_url_template(query_key)
         for item in info["buckets"]:
-            item["active"] = getter(item) == self.filter_data.get(query_key)
+            value = getter(item)
+            item["active"] = value == self.filter_data.get(query_key)
             item["label"] = label_getter(item)
-            d = self.filter_data.copy()
-            d[query_key] = getter(item)
-            item["url"] = self.make_filter_url(d)
-            d.pop(query_key)
-            item["clear_url"] = self.make_filter_url(d)
+            if url_template and isinstance(value, str) and URL_SAFE_VALUE.match(value):
+                item["url"] = url_template.replace(FACET_URL_MARKER, value)
+            else:
+                d = self.filter_data.copy()
+                d[query_key] = value
+                item["url"] = self.make_filter_url(d)
+            item["clear_url"] = clear_url
         return info
 
+    def make_filter_url_template(self, query_key):
+        """
+        Filter URL with a marker in place of the facet value. Values that
+        need no quoting can be put in without reversing the URL again.
+        """
+        d = self.filter_data.copy()
+        d[query_key] = FACET_URL_MARKER
+        template = self.make_filter_url(d)
+        if template.count(FACET_URL_MARKER) != 1:
+            return None
+        return template
+
 
 def get_active_filters(data, filter_order, sub_filters=None):
     if not filter_order:
@@ -5,6 +5,8 @@ from django.utils.safestring import mark_safe
 from elasticsearch_dsl import A
 from elasticsearch_dsl.query import Q
 
+from .cursor import apply_cursor, get_next_cursor
+
 logger = logging.getLogger(__name__)
 
 
@@ -153,6 +155,13 @@ class SearchQuerySetWrapper(object):
         self.sqs = self.sqs[key]
         return self
 
+    def apply_cursor(self, cursor, size, **kwargs):
+        self.sqs = apply_cursor(self.sqs, cursor, size, **kwargs)
+        return self
+
+    def get_next_cursor(self, cursor, size):
+        return get_next_cursor(self.response, cursor, size)
+
     def __iter__(self):
         return iter(self.sqs)
 
@@ -0,0 +1,98 @@
+import hashlib
+import json
+import logging
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from ..cache import get_cache_generation
+from ..tasks import get_search_generation_name
+from .cursor import SearchCursor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SEARCH_RESULT_CACHE_CONFIG = {
+    "enabled": True,
+    # Seconds a result page is kept if its index is not updated before
+    "timeout": 5 * 60,
+}
+
+
+def get_search_result_cache_config():
+    config = dict(DEFAULT_SEARCH_RESULT_CACHE_CONFIG)
+    config.update(settings.FROIDE_CONFIG.get("search_result_cache") or {})
+    return config
+
+
+@dataclass
+class CachedSearchResult:
+    objects: List[Any]
+    count: int
+    has_more: bool
+    number: int
+    is_paginated: bool
+    facets: Dict[str, Any]
+    next_cursor: Optional[SearchCursor] = None
+
+
+class CachedResultList(list):
+    """
+    Result objects of a cached page that paginate like the search
+    queryset they were loaded from.
+    """
+
+    def __init__(self, result: CachedSearchResult):
+        super().__init__(result.objects)
+        self.result = result
+
+    def count(self):
+        return self.result.count
+
+    def has_more(self):
+        return self.result.has_more
+
+
+class SearchResultCache:
+    """
+    Result pages of searches keyed on their normalized parameters and the
+    generation of the search index. Indexing any document bumps the
+    generation, so pages are never served from before an index update.
+    """
+
+    def __init__(self):
+        self.stats = Counter()
+        self.lock = threading.Lock()
+
+    def get_key(self, name: str, index_name: str, params: Dict[str, str]) -> str:
+        generation = get_cache_generation(get_search_generation_name(index_name))
+        data = json.dumps(sorted(params.items()), separators=(",", ":"))
+        digest = hashlib.sha1(data.encode("utf-8")).hexdigest()
+        return "search_result:{}:{}:{}".format(name, generation, digest)
+
+    def get(self, key: str) -> Optional[CachedSearchResult]:
+        result = cache.get(key)
+        with self.lock:
+            self.stats["hit" if result is not None else "miss"] += 1
+        return result
+
+    def set(self, key: str, result: CachedSearchResult, timeout=None):
+        if timeout is None:
+            timeout = get_search_result_cache_config()["timeout"]
+        cache.set(key, result, timeout=timeout)
+        with self.lock:
+            self.stats["set"] += 1
+        logger.debug("Search result cache stats: %s", self.get_stats())
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+        lookups = stats.get("hit", 0) + stats.get("miss", 0)
+        stats["hit_ratio"] = stats.get("hit", 0) / lookups if lookups else 0.0
+        return stats
+
+
+search_result_cache = SearchResultCache()
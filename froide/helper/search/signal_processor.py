@@ -1,13 +1,37 @@
+import logging
+import threading
+from collections import Counter
 from contextlib import contextmanager
 from functools import partial
 
-from django.db import models, transaction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, models, transaction
 
 from django_elasticsearch_dsl.registries import registry
 from django_elasticsearch_dsl.signals import RealTimeSignalProcessor
 from elasticsearch_dsl.connections import connections
 
-from ..tasks import search_instance_delete, search_instance_save
+from ..tasks import (
+    get_search_debounce_key,
+    search_instance_delete,
+    search_instance_save,
+    search_instances_save,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COALESCE_CONFIG = {
+    "enabled": True,
+    # Seconds to wait for more saves of the same objects before indexing
+    "window": 5,
+}
+
+
+def get_coalesce_config():
+    config = dict(DEFAULT_COALESCE_CONFIG)
+    config.update(settings.FROIDE_CONFIG.get("search_index_coalesce") or {})
+    return config
 
 
 @contextmanager
@@ -18,6 +42,88 @@ def realtime_search(testcase, test=True):
     signal_processor.teardown()
 
 
+class PendingIndexBatch:
+    def __init__(self):
+        self.items = set()
+        self.received = 0
+        self.flushed = False
+        self.callback = None
+
+
+class SearchIndexQueue:
+    """
+    Collects (model label, pk) pairs to index per transaction and flushes
+    them on commit as one bulk index task. Objects that already have an
+    index task scheduled within the coalesce window are skipped.
+    """
+
+    def __init__(self):
+        self.local = threading.local()
+        self.stats = Counter()
+        self.lock = threading.Lock()
+
+    def _get_active_batch(self, using):
+        batches = getattr(self.local, "batches", None)
+        if batches is None:
+            batches = self.local.batches = {}
+        batch = batches.get(using)
+        if batch is None or batch.flushed:
+            return None
+        connection = transaction.get_connection(using)
+        # Callback is gone if the transaction was rolled back
+        if not any(x[1] is batch.callback for x in connection.run_on_commit):
+            return None
+        return batch
+
+    def add(self, model_name, pk, using=None):
+        if pk is None:
+            return
+        using = using or DEFAULT_DB_ALIAS
+        batch = self._get_active_batch(using)
+        is_new = batch is None
+        if is_new:
+            batch = PendingIndexBatch()
+            batch.callback = partial(self.flush, batch)
+            self.local.batches[using] = batch
+        batch.received += 1
+        batch.items.add((model_name, pk))
+        if is_new:
+            # Runs immediately when not in an atomic block
+            transaction.on_commit(batch.callback, using=using)
+
+    def flush(self, batch):
+        batch.flushed = True
+        items = sorted(batch.items)
+        window = get_coalesce_config()["window"]
+        if window:
+            items = [
+                x
+                for x in items
+                if cache.add(get_search_debounce_key(*x), 1, timeout=window + 60)
+            ]
+        with self.lock:
+            self.stats["received"] += batch.received
+            self.stats["unique"] += len(batch.items)
+            self.stats["scheduled"] += len(items)
+            self.stats["batches"] += 1
+        if not items:
+            return
+        search_instances_save.apply_async((items,), countdown=window or None)
+        logger.debug("Search index queue stats: %s", self.get_stats())
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+        received = stats.get("received", 0)
+        stats["coalesce_ratio"] = (
+            1 - stats.get("scheduled", 0) / received if received else 0.0
+        )
+        return stats
+
+
+search_index_queue = SearchIndexQueue()
+
+
 class CelerySignalProcessor(RealTimeSignalProcessor):
     def setup(self):
         for doc in registry.get_documents():
@@ -47,6 +153,11 @@ class CelerySignalProcessor(RealTimeSignalProcessor):
         Given an individual model instance, update the object in the index.
         Update the related objects either.
         """
+        if get_coalesce_config()["enabled"]:
+            search_index_queue.add(
+                instance._meta.label_lower, instance.pk, using=kwargs.get("using")
+            )
+            return
         transaction.on_commit(
             partial(search_instance_save.delay, instance._meta.label_lower, instance.pk)
         )
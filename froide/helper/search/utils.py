@@ -3,9 +3,13 @@ from functools import partial
 from django.db import transaction
 
 from ..tasks import search_instance_save
+from .signal_processor import get_coalesce_config, search_index_queue
 
 
 def trigger_search_index_update(instance):
+    if get_coalesce_config()["enabled"]:
+        search_index_queue.add(instance._meta.label_lower, instance.pk)
+        return
     transaction.on_commit(
         partial(search_instance_save.delay, instance._meta.label_lower, instance.pk)
     )
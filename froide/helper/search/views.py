@@ -3,10 +3,23 @@ from django.urls import reverse
 from django.utils.functional import cached_property
 from django.views.generic import ListView
 
+from .cursor import (
+    CURSOR_PARAM,
+    InvalidCursor,
+    SearchCursor,
+    add_tiebreaker,
+    get_cursor_salt,
+)
 from .facets import SearchManager
 from .filters import BaseSearchFilterSet
 from .paginator import ElasticsearchPaginator
 from .queryset import SearchQuerySetWrapper
+from .result_cache import (
+    CachedResultList,
+    CachedSearchResult,
+    get_search_result_cache_config,
+    search_result_cache,
+)
 
 
 class BaseSearchView(ListView):
@@ -29,10 +42,16 @@ class BaseSearchView(ListView):
     search_url_name = ""
     search_manager_kwargs = {}
     object_template = None
+    cursor_kwarg = CURSOR_PARAM
+    cursor = None
+    next_cursor = None
+    # Cache result pages of anonymous users
+    cache_results = False
 
     def get_search_manager(self):
         get_data = dict(self.request.GET.items())
         get_data.pop(self.page_kwarg, None)
+        get_data.pop(self.cursor_kwarg, None)
         return SearchManager(
             self.facet_config,
             self.kwargs,
@@ -107,12 +126,102 @@ class BaseSearchView(ListView):
             sqs = sqs.add_aggregation(list(self.facet_config.keys()))
         return sqs
 
+    def get_cursor_salt(self):
+        return get_cursor_salt([self.document._index._name])
+
+    def get_cursor(self):
+        if self.cursor_kwarg not in self.request.GET:
+            return None
+        try:
+            return SearchCursor.decode(
+                self.request.GET[self.cursor_kwarg], self.get_cursor_salt()
+            )
+        except InvalidCursor:
+            raise Http404
+
+    def get_result_cache_key(self, page_size):
+        if not self.cache_results or self.request.user.is_authenticated:
+            return None
+        if not get_search_result_cache_config()["enabled"]:
+            return None
+        params = {k: v for k, v in self.search_manager.filter_data.items() if v}
+        if self.form is not None:
+            # Parameters that are not filters do not change results
+            params = {k: v for k, v in params.items() if k in self.form.fields}
+        page = (
+            self.kwargs.get(self.page_kwarg)
+            or self.request.GET.get(self.page_kwarg)
+            or 1
+        )
+        params[self.page_kwarg] = str(page)
+        params["page_size"] = str(page_size)
+        if self.cursor_kwarg in self.request.GET:
+            params[self.cursor_kwarg] = self.request.GET[self.cursor_kwarg]
+        return search_result_cache.get_key(
+            self.search_name, self.document._index._name, params
+        )
+
     def paginate_queryset(self, sqs, page_size):
+        cache_key = self.get_result_cache_key(page_size)
+        if cache_key is not None:
+            result = search_result_cache.get(cache_key)
+            if result is not None:
+                return self.paginate_cached_result(result, page_size)
+
+        paginator, page, queryset, is_paginated = self.paginate_search(sqs, page_size)
+        if cache_key is not None and not sqs.broken_query:
+            result = CachedSearchResult(
+                objects=list(queryset),
+                count=paginator.count,
+                has_more=paginator.has_more,
+                number=page.number,
+                is_paginated=is_paginated,
+                facets=self.facets,
+                next_cursor=self.next_cursor,
+            )
+            search_result_cache.set(cache_key, result)
+        return (paginator, page, queryset, is_paginated)
+
+    def paginate_cached_result(self, result, page_size):
+        self.cursor = self.get_cursor()
+        self.next_cursor = result.next_cursor
+        self.count = result.count
+        self.facets = result.facets
+        object_list = CachedResultList(result)
+        paginator = self.get_paginator(object_list, page_size)
+        page = paginator._get_page(object_list, result.number, paginator)
+        return (paginator, page, object_list, result.is_paginated)
+
+    def paginate_search(self, sqs, page_size):
         """
         Paginate with SearchQuerySet, but return queryset
         """
+        # Unique sort values allow continuing after any page with a cursor
+        sqs.sqs = add_tiebreaker(sqs.sqs)
+        self.cursor = self.get_cursor()
+        if self.cursor is not None:
+            return self.paginate_cursor(sqs, page_size)
+
         paginator, page, sqs, is_paginated = super().paginate_queryset(sqs, page_size)
+        if paginator.has_more and page.number * page_size >= paginator.MAX_ES_OFFSET:
+            # Pages beyond the offset limit are reached by cursor
+            self.next_cursor = sqs.get_next_cursor(SearchCursor(), page_size)
+
+        return (paginator, page, self.get_result_queryset(sqs), is_paginated)
 
+    def paginate_cursor(self, sqs, page_size):
+        """
+        Results after the cursor with search_after. Cursors for HTML
+        pages are not bound to a point in time as they can be followed
+        much later.
+        """
+        sqs.apply_cursor(self.cursor, page_size)
+        paginator = self.get_paginator(sqs, page_size)
+        page = paginator._get_page(sqs, 1, paginator)
+        self.next_cursor = sqs.get_next_cursor(self.cursor, page_size)
+        return (paginator, page, self.get_result_queryset(sqs), False)
+
+    def get_result_queryset(self, sqs):
         self.count = sqs.count()
         qs = sqs.to_queryset()
         if self.select_related:
@@ -128,7 +237,7 @@ class BaseSearchView(ListView):
             # Empty facets
             self.facets = {k: {"buckets": []} for k in self.facet_config}
 
-        return (paginator, page, queryset, is_paginated)
+        return queryset
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -148,6 +257,13 @@ class BaseSearchView(ListView):
                 "is_filtered": bool(set(self.search_manager.filter_data) - {"q"}),
                 "getvars": self.search_manager.get_pagination_vars(),
                 "filtered_objects": self.filtered_objs,
+                "is_cursor_page": self.cursor is not None,
+                "next_cursor": (
+                    self.next_cursor.encode(self.get_cursor_salt())
+                    if self.next_cursor
+                    else None
+                ),
+                "cursor_kwarg": self.cursor_kwarg,
             }
         )
         return context
@@ -0,0 +1,160 @@
+import logging
+import os
+import smtplib
+import ssl
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+PoolKey = Tuple
+
+DEFAULT_POOL_CONFIG = {
+    "enabled": True,
+    # Seconds a connection may sit unused before it is dropped
+    "idle_timeout": 30,
+    # Messages after which a connection is retired and replaced
+    "max_messages": 100,
+    # Idle connections kept around per key
+    "max_idle": 2,
+}
+
+
+def get_pool_config():
+    config = dict(DEFAULT_POOL_CONFIG)
+    config.update(settings.FROIDE_CONFIG.get("smtp_connection_pool") or {})
+    return config
+
+
+@dataclass
+class PooledConnection:
+    connection: smtplib.SMTP
+    key: PoolKey
+    created: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+    message_count: int = 0
+
+
+def quit_connection(connection):
+    try:
+        connection.quit()
+    except (ssl.SSLError, smtplib.SMTPServerDisconnected, OSError):
+        connection.close()
+    except smtplib.SMTPException:
+        logger.warning("Error closing pooled SMTP connection", exc_info=True)
+        connection.close()
+
+
+class SMTPConnectionPool:
+    """
+    Keeps authenticated SMTP connections open per worker process so that
+    consecutive sends to the same server skip TCP/TLS setup and AUTH.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.idle: Dict[PoolKey, List[PooledConnection]] = defaultdict(list)
+        self.stats: Counter = Counter()
+        self.lock = threading.Lock()
+        self.pid = os.getpid()
+
+    def _check_fork(self):
+        # Sockets inherited from a parent process must not be shared
+        if self.pid != os.getpid():
+            self.idle = defaultdict(list)
+            self.stats = Counter()
+            self.pid = os.getpid()
+
+    def _is_expired(self, pooled: PooledConnection, config) -> bool:
+        if self.clock() - pooled.last_used > config["idle_timeout"]:
+            return True
+        return pooled.message_count >= config["max_messages"]
+
+    def acquire(
+        self, key: PoolKey, connect: Callable[[], Optional[smtplib.SMTP]]
+    ) -> Optional[PooledConnection]:
+        config = get_pool_config()
+        expired = []
+        reused = None
+        with self.lock:
+            self._check_fork()
+            while self.idle[key]:
+                pooled = self.idle[key].pop()
+                if not self._is_expired(pooled, config):
+                    self.stats["reused"] += 1
+                    pooled.last_used = self.clock()
+                    reused = pooled
+                    break
+                self.stats["expired"] += 1
+                expired.append(pooled)
+        for pooled in expired:
+            quit_connection(pooled.connection)
+        if reused is not None:
+            return reused
+
+        connection = connect()
+        if connection is None:
+            return None
+        with self.lock:
+            self.stats["opened"] += 1
+        return PooledConnection(
+            connection=connection,
+            key=key,
+            created=self.clock(),
+            last_used=self.clock(),
+        )
+
+    def release(self, pooled: PooledConnection):
+        config = get_pool_config()
+        pooled.last_used = self.clock()
+        with self.lock:
+            self._check_fork()
+            idle = self.idle[pooled.key]
+            if (
+                pooled.message_count < config["max_messages"]
+                and len(idle) < config["max_idle"]
+            ):
+                idle.append(pooled)
+                return
+            self.stats["retired"] += 1
+        quit_connection(pooled.connection)
+        logger.debug("SMTP connection pool stats: %s", self.get_stats())
+
+    def discard(self, pooled: PooledConnection):
+        """
+        Drop a connection that errored instead of returning it to the pool
+        """
+        with self.lock:
+            self.stats["discarded"] += 1
+        pooled.connection.close()
+
+    def record_sent(self, pooled: PooledConnection):
+        pooled.message_count += 1
+        with self.lock:
+            self.stats["messages"] += 1
+
+    def close_all(self):
+        with self.lock:
+            idle = self.idle
+            self.idle = defaultdict(list)
+        for pooled_list in idle.values():
+            for pooled in pooled_list:
+                quit_connection(pooled.connection)
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+            stats["idle"] = sum(len(x) for x in self.idle.values())
+        connections = stats.get("opened", 0) + stats.get("reused", 0)
+        stats["reuse_ratio"] = (
+            stats.get("reused", 0) / connections if connections else 0.0
+        )
+        return stats
+
+
+connection_pool = SMTPConnectionPool()
@@ -1,13 +1,18 @@
 import logging
-from typing import Optional
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
 
 from django.apps import apps
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
 from django.db import models
 
+from django_elasticsearch_dsl.apps import DEDConfig
 from django_elasticsearch_dsl.registries import registry
 from elasticsearch.exceptions import ConnectionTimeout
 
 from froide.celery import app as celery_app
+from froide.helper.cache import bump_cache_generation
 from froide.helper.email_log_parsing import check_delivery_from_log
 
 logger = logging.getLogger(__name__)
@@ -21,6 +26,24 @@ def get_instance(model_name: str, pk: int) -> Optional[models.Model]:
         return None
 
 
+def get_search_generation_name(index_name: str) -> str:
+    return "search_index:%s" % index_name
+
+
+def bump_search_generations(docs) -> None:
+    """
+    Invalidate cached search results of the indexes of these documents
+    """
+    for index_name in {doc._index._name for doc in docs}:
+        bump_cache_generation(get_search_generation_name(index_name))
+
+
+def get_instance_documents(instance: models.Model) -> List[type]:
+    docs = list(registry.get_documents(models=[instance.__class__]))
+    docs.extend(registry._get_related_doc(instance))
+    return docs
+
+
 @celery_app.task(autoretry_for=(ConnectionTimeout,), retry_backoff=True)
 def search_instance_save(model_name: str, pk: int) -> None:
     instance = get_instance(model_name, pk)
@@ -31,6 +54,100 @@ def search_instance_save(model_name: str, pk: int) -> None:
         registry.update_related(instance)
     except Exception as e:
         logger.exception(e)
+    bump_search_generations(get_instance_documents(instance))
+
+
+def get_search_debounce_key(model_name: str, pk: int) -> str:
+    return "search_index_pending:%s:%s" % (model_name, pk)
+
+
+def collect_search_updates(
+    instance: models.Model, doc_objects: Dict[type, Dict[int, models.Model]]
+) -> None:
+    """
+    Collect the documents that registry.update and registry.update_related
+    would index for this instance, deduplicated per document class.
+    """
+    for doc in registry.get_documents(models=[instance.__class__]):
+        if not doc.django.ignore_signals:
+            doc_objects[doc][instance.pk] = instance
+
+    for doc in registry._get_related_doc(instance):
+        try:
+            related = doc().get_instances_from_related(instance)
+        except ObjectDoesNotExist:
+            related = None
+        if related is None:
+            continue
+        if isinstance(related, models.Model):
+            related = [related]
+        for obj in related:
+            doc_objects[doc][obj.pk] = obj
+
+
+def get_search_actions(doc, objects: List[models.Model]) -> List[dict]:
+    """
+    Prepare index actions of the objects, skipping objects that fail
+    to prepare so that they do not break the whole bulk request.
+    """
+    actions = []
+    for obj in objects:
+        try:
+            if doc.should_index_object(obj):
+                actions.append(doc._prepare_action(obj, "index"))
+        except Exception:
+            logger.exception(
+                "Could not prepare %s %s for %s",
+                obj._meta.label,
+                obj.pk,
+                doc.__class__.__name__,
+            )
+    return actions
+
+
+def bulk_index_documents(doc_objects: Dict[type, Dict[int, models.Model]]) -> None:
+    for doc_class, objects in doc_objects.items():
+        doc = doc_class()
+        actions = get_search_actions(doc, list(objects.values()))
+        if not actions:
+            continue
+        kwargs = {}
+        if doc_class.django.auto_refresh:
+            kwargs["refresh"] = True
+        # Sends the post_index signal like registry.update
+        _success, errors = doc.bulk(actions, raise_on_error=False, **kwargs)
+        for error in errors:
+            logger.warning("Could not index %s: %s", doc_class.__name__, error)
+
+
+@celery_app.task(autoretry_for=(ConnectionTimeout,), retry_backoff=True)
+def search_instances_save(instances: List[Tuple[str, int]]) -> None:
+    """
+    Index many (model label, pk) pairs with one bulk request per document
+    """
+    # Remove pending markers before loading the objects so
+    # that saves from now on schedule a new task
+    cache.delete_many([get_search_debounce_key(*x) for x in instances])
+    if not DEDConfig.autosync_enabled():
+        return
+
+    pks_by_model = defaultdict(set)
+    for model_name, pk in instances:
+        pks_by_model[model_name].add(pk)
+
+    doc_objects: Dict[type, Dict[int, models.Model]] = defaultdict(dict)
+    for model_name, pks in pks_by_model.items():
+        model = apps.get_model(model_name)
+        for instance in model._default_manager.filter(pk__in=pks):
+            try:
+                collect_search_updates(instance, doc_objects)
+            except Exception as e:
+                logger.exception(e)
+
+    if not doc_objects:
+        return
+    bulk_index_documents(doc_objects)
+    bump_search_generations(doc_objects)
 
 
 @celery_app.task
@@ -42,6 +159,7 @@ def search_instance_pre_delete(model_name: str, pk: int) -> None:
         registry.delete_related(instance)
     except Exception as e:
         logger.exception(e)
+    bump_search_generations(get_instance_documents(instance))
 
 
 @celery_app.task(autoretry_for=(ConnectionTimeout,), retry_backoff=True)
@@ -53,6 +171,7 @@ def search_instance_delete(model_name: str, pk: Optional[int]) -> None:
     instance.pk = pk
     instance.id = pk
     registry.delete(instance, raise_on_error=False)
+    bump_search_generations(registry.get_documents(models=[model]))
 
 
 @celery_app.task(expires=60)
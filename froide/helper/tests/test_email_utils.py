@@ -0,0 +1,71 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from ..email_utils import (
+    chunk_mail_uids,
+    get_unread_mail_batches,
+    make_uid_set,
+    unflag_mails,
+)
+
+
+class TestUidSets(SimpleTestCase):
+    def test_make_uid_set(self):
+        self.assertEqual(make_uid_set(["1", "2", "3", "7", "9", "10"]), "1:3,7,9:10")
+        self.assertEqual(make_uid_set(["5"]), "5")
+        self.assertEqual(make_uid_set(["3", "1", "2", "2"]), "1:3")
+
+    def test_chunk_by_count(self):
+        uids = [str(i) for i in range(1, 6)]
+        chunks = list(chunk_mail_uids(uids, {}, chunk_size=2, max_bytes=100))
+        self.assertEqual(chunks, [["1", "2"], ["3", "4"], ["5"]])
+
+    def test_chunk_by_size(self):
+        uids = ["1", "2", "3", "4"]
+        sizes = {"1": 40, "2": 40, "3": 500, "4": 10}
+        chunks = list(chunk_mail_uids(uids, sizes, chunk_size=10, max_bytes=100))
+        self.assertEqual(chunks, [["1", "2"], ["3"], ["4"]])
+
+
+class TestBatchedFetch(SimpleTestCase):
+    def make_mailbox(self):
+        mailbox = mock.Mock()
+
+        def uid(command, *args):
+            if command == "SEARCH":
+                return "OK", [b"4 5 6"]
+            if command == "FETCH" and args[1] == "(RFC822.SIZE)":
+                return "OK", [
+                    b"1 (UID 4 RFC822.SIZE 10)",
+                    b"2 (UID 5 RFC822.SIZE 10)",
+                    b"3 (UID 6 RFC822.SIZE 10)",
+                ]
+            if command == "FETCH":
+                uids = {"4:5": ["4", "5"], "6": ["6"]}[args[0]]
+                data = []
+                for i, uid_str in enumerate(uids):
+                    header = ("%d (UID %s BODY[] {4}" % (i + 1, uid_str)).encode()
+                    data.append((header, b"mail"))
+                    data.append(b")")
+                return "OK", data
+            return "OK", [None]
+
+        mailbox.uid.side_effect = uid
+        mailbox.select.return_value = ("OK", [b"3"])
+        return mailbox
+
+    def test_batches(self):
+        mailbox = self.make_mailbox()
+        batches = list(get_unread_mail_batches(mailbox, flag=True, chunk_size=2))
+        self.assertEqual(batches, [[("4", b"mail"), ("5", b"mail")], [("6", b"mail")]])
+        store_calls = [c for c in mailbox.uid.call_args_list if c.args[0] == "STORE"]
+        self.assertEqual(len(store_calls), 2)
+        self.assertEqual(store_calls[0].args[1], "4:5")
+        mailbox.close.assert_called_once_with()
+
+    def test_unflag_mails(self):
+        mailbox = mock.Mock()
+        mailbox.select.return_value = ("OK", [b"3"])
+        unflag_mails(mailbox, ["4", "6", "5"])
+        mailbox.uid.assert_called_once_with("STORE", "4:6", "-FLAGS", "\\Flagged")
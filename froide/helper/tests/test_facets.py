@@ -0,0 +1,51 @@
+from django.core.cache import cache
+from django.db.models.signals import post_save
+from django.test import TestCase
+
+from taggit.models import Tag
+
+from ..search.facets import FacetObjectCache, SearchManager
+
+
+class TestFacetObjectCache(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.cache = FacetObjectCache()
+        self.cache.watch(Tag)
+        self.tags = [Tag.objects.create(name=n, slug=n) for n in ("a", "b")]
+
+    def test_cached_until_save(self):
+        pks = [t.pk for t in self.tags]
+        with self.assertNumQueries(1):
+            objs = self.cache.get_objects(Tag, pks)
+        self.assertEqual(objs[str(pks[0])].name, "a")
+        with self.assertNumQueries(0):
+            self.cache.get_objects(Tag, pks)
+
+        # Another process only has the shared cache
+        with self.assertNumQueries(0):
+            FacetObjectCache().get_objects(Tag, pks)
+
+        self.tags[0].name = "changed"
+        self.tags[0].save()
+        with self.assertNumQueries(1):
+            objs = self.cache.get_objects(Tag, pks)
+        self.assertEqual(objs[str(pks[0])].name, "changed")
+
+    def test_lookup_does_not_connect_receivers(self):
+        receivers = list(post_save.receivers)
+        FacetObjectCache().get_objects(Tag, [t.pk for t in self.tags])
+        self.assertEqual(post_save.receivers, receivers)
+
+
+class TestFacetUrls(TestCase):
+    def test_url_template_matches_reverse(self):
+        manager = SearchManager({}, {}, {"q": "test"}, search_url_name="")
+        manager.make_filter_url = lambda d: "/search/?" + "&".join(
+            "{}={}".format(k, v) for k, v in sorted(d.items())
+        )
+        info = {"buckets": [{"key": "one"}, {"key": "two words"}]}
+        manager.resolve_facet("tag", info)
+        self.assertEqual(info["buckets"][0]["url"], "/search/?q=test&tag=one")
+        self.assertEqual(info["buckets"][1]["url"], "/search/?q=test&tag=two words")
+        self.assertEqual(info["buckets"][0]["clear_url"], "/search/?q=test")
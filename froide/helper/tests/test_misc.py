@@ -1,15 +1,19 @@
 import re
+import tempfile
+import zipfile
 from datetime import datetime, timedelta
+from pathlib import Path
 
 from django.test import TestCase
 from django.test.utils import override_settings
 
-from ..csv_utils import dict_to_csv_stream
+from ..csv_utils import buffer_stream, dict_to_csv_stream
 from ..date_utils import calc_easter, calculate_month_range_de
 from ..email_sending import mail_registry
 from ..storage import make_unique_filename
 from ..text_diff import mark_differences
 from ..text_utils import remove_closing, replace_email_name, split_text_by_separator
+from ..zip_utils import make_spooled_zip
 
 
 def rec(x):
@@ -203,6 +207,16 @@ class TestCSVFormulaEscape(TestCase):
         )
 
 
+class TestCSVBuffer(TestCase):
+    def test_buffer_stream(self):
+        rows = [{"col": "x" * 10} for _ in range(100)]
+        csv_bytes = list(dict_to_csv_stream(rows))
+        blocks = list(buffer_stream(iter(csv_bytes), buffer_size=100))
+        self.assertEqual(b"".join(blocks), b"".join(csv_bytes))
+        self.assertTrue(all(len(block) >= 100 for block in blocks[:-1]))
+        self.assertLess(len(blocks), len(csv_bytes))
+
+
 class TestUniqueFilename(TestCase):
     def test_should_return_filename_when_it_does_not_exist_yet(self):
         filename = "test123.pdf"
@@ -228,3 +242,28 @@ class TestUniqueFilename(TestCase):
         actual_new_filename = make_unique_filename(filename, [filename, filename_2])
 
         self.assertEqual(actual_new_filename, "test123_2.pdf")
+
+
+class TestStreamingZip(TestCase):
+    def test_zip_sources(self):
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(b"file content")
+            f.flush()
+            entries = [
+                ("a/bytes.txt", b"bytes content"),
+                ("a/path.txt", Path(f.name)),
+                ("a/chunks.txt", iter([b"chunk1", b"chunk2"])),
+                ("a/text.txt", "text content ä"),
+            ]
+            zip_file = make_spooled_zip(entries, max_size=10)
+
+        with zipfile.ZipFile(zip_file) as zfile:
+            self.assertEqual(
+                zfile.namelist(),
+                ["a/bytes.txt", "a/path.txt", "a/chunks.txt", "a/text.txt"],
+            )
+            self.assertEqual(zfile.read("a/bytes.txt"), b"bytes content")
+            self.assertEqual(zfile.read("a/path.txt"), b"file content")
+            self.assertEqual(zfile.read("a/chunks.txt"), b"chunk1chunk2")
+            # Strings are content, not paths
+            self.assertEqual(zfile.read("a/text.txt"), "text content ä".encode("utf-8"))
@@ -0,0 +1,115 @@
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import TestCase
+
+from elasticsearch_dsl import Search
+from elasticsearch_dsl.response import Response
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from ..api_utils import ElasticLimitOffsetPagination
+from ..search.cursor import (
+    InvalidCursor,
+    SearchCursor,
+    apply_cursor,
+    get_cursor_salt,
+    get_next_cursor,
+)
+
+
+class TestSearchCursor(TestCase):
+    def test_encode_decode(self):
+        salt = get_cursor_salt(["froide_foirequest"])
+        cursor = SearchCursor(search_after=["2024-01-01", 42], pit_id="abc==")
+        self.assertEqual(SearchCursor.decode(cursor.encode(salt), salt), cursor)
+        self.assertEqual(SearchCursor.decode("", salt), SearchCursor())
+        for value in ("not-base64!", "bnVsbA", "eyJhIjoxfQ"):
+            with self.assertRaises(InvalidCursor):
+                SearchCursor.decode(value, salt)
+
+    def test_cursor_signed_per_index(self):
+        salt = get_cursor_salt(["froide_foirequest"])
+        value = SearchCursor(search_after=[1], pit_id="pit").encode(salt)
+        with self.assertRaises(InvalidCursor):
+            SearchCursor.decode(value, get_cursor_salt(["froide_publicbody"]))
+        # Tampering with a signed cursor invalidates it
+        with self.assertRaises(InvalidCursor):
+            SearchCursor.decode("x" + value, salt)
+
+    def test_apply_cursor(self):
+        search = Search(index="froide_foirequest").sort("-last_message")
+
+        data = apply_cursor(search, SearchCursor(), 10).to_dict()
+        self.assertEqual(data["sort"], [{"last_message": {"order": "desc"}}, "_doc"])
+        self.assertNotIn("search_after", data)
+        self.assertEqual(data["size"], 10)
+
+        cursor = SearchCursor(search_after=[5, 3], pit_id="pit")
+        pit_search = apply_cursor(search, cursor, 10)
+        data = pit_search.to_dict()
+        self.assertEqual(data["search_after"], [5, 3])
+        self.assertEqual(data["pit"]["id"], "pit")
+        self.assertEqual(data["sort"], [{"last_message": {"order": "desc"}}])
+        self.assertIsNone(pit_search._index)
+
+    def test_next_cursor(self):
+        search = Search()
+        hits = [
+            {"_id": str(i), "_index": "x", "_source": {}, "sort": [i, i]}
+            for i in range(3)
+        ]
+        response = Response(
+            search, {"hits": {"hits": hits, "total": 3}, "pit_id": "new"}
+        )
+        cursor = get_next_cursor(response, SearchCursor(pit_id="old"), 3)
+        self.assertEqual(cursor, SearchCursor(search_after=[2, 2], pit_id="new"))
+        self.assertIsNone(get_next_cursor(response, SearchCursor(), 4))
+
+
+class TestCursorPagination(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def paginate(self, user, next_cursor=None):
+        request = Request(APIRequestFactory().get("/", {"cursor": "", "limit": 3}))
+        request.user = user
+        queryset = mock.Mock(sqs=Search(index="froide_foirequest"))
+        queryset.count.return_value = 3
+        queryset.get_next_cursor.return_value = next_cursor
+        queryset.response._d_ = {"pit_id": "pit-2"}
+        paginator = ElasticLimitOffsetPagination()
+        paginator.paginate_queryset(queryset, request)
+        return paginator
+
+    @mock.patch("froide.helper.api_utils.close_point_in_time")
+    @mock.patch("froide.helper.api_utils.open_point_in_time", return_value="pit-1")
+    def test_point_in_time_only_for_users(self, open_pit, close_pit):
+        paginator = self.paginate(AnonymousUser())
+        open_pit.assert_not_called()
+        close_pit.assert_not_called()
+        self.assertIsNone(paginator.cursor.pit_id)
+
+        user = mock.Mock(pk=1, is_authenticated=True)
+        next_cursor = SearchCursor(search_after=[1], pit_id="pit-2")
+        paginator = self.paginate(user, next_cursor=next_cursor)
+        open_pit.assert_called_once()
+        close_pit.assert_not_called()
+        self.assertEqual(paginator.cursor.pit_id, "pit-1")
+
+    @mock.patch("froide.helper.api_utils.close_point_in_time")
+    @mock.patch("froide.helper.api_utils.open_point_in_time", return_value="pit-1")
+    def test_point_in_time_closed_on_last_page(self, open_pit, close_pit):
+        self.paginate(mock.Mock(pk=1, is_authenticated=True))
+        close_pit.assert_called_once_with(mock.ANY, "pit-2")
+
+    @mock.patch("froide.helper.api_utils.open_point_in_time", return_value="pit-1")
+    def test_point_in_time_throttled(self, open_pit):
+        user = mock.Mock(pk=1, is_authenticated=True)
+        next_cursor = SearchCursor(search_after=[1], pit_id="pit-1")
+        with mock.patch("froide.helper.api_utils.PointInTimeThrottle.rate", "1/minute"):
+            self.paginate(user, next_cursor=next_cursor)
+            paginator = self.paginate(user, next_cursor=next_cursor)
+        open_pit.assert_called_once()
+        self.assertIsNone(paginator.cursor.pit_id)
@@ -0,0 +1,76 @@
+import json
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import TestCase
+
+from rest_framework import serializers, viewsets
+from rest_framework.exceptions import NotAuthenticated, Throttled
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from ..search.api_views import ESQueryMixin
+
+
+class ItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+
+
+class FakePage:
+    def __init__(self, objects):
+        self.objects = objects
+
+    def to_queryset(self):
+        return self.objects
+
+    def wrap_queryset(self, qs):
+        return qs
+
+
+class ExportViewSet(ESQueryMixin, viewsets.GenericViewSet):
+    serializer_class = ItemSerializer
+    export_max_hits = 3
+
+    def get_filtered_searchqueryset(self, request):
+        return mock.Mock()
+
+    def optimize_query(self, qs):
+        return qs
+
+
+def iter_pages(sqs, size):
+    for start in range(0, 10, 2):
+        yield FakePage([mock.Mock(id=i) for i in range(start, start + 2)])
+
+
+class TestSearchExport(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def export(self, user):
+        request = Request(APIRequestFactory().get("/export/"))
+        request.user = user
+        view = ExportViewSet()
+        view.request = request
+        view.format_kwarg = None
+        return view.export_view(request)
+
+    def test_requires_authentication(self):
+        with self.assertRaises(NotAuthenticated):
+            self.export(AnonymousUser())
+
+    @mock.patch("froide.helper.search.api_views.iter_search_pages", iter_pages)
+    def test_export_capped(self):
+        response = self.export(mock.Mock(pk=1, is_authenticated=True))
+        lines = b"".join(response.streaming_content).decode("utf-8").splitlines()
+        self.assertEqual([json.loads(line)["id"] for line in lines], [0, 1, 2])
+        self.assertEqual(response["X-Export-Max-Hits"], "3")
+
+    @mock.patch("froide.helper.search.api_views.iter_search_pages", iter_pages)
+    def test_export_throttled(self):
+        user = mock.Mock(pk=1, is_authenticated=True)
+        with mock.patch("froide.helper.api_utils.SearchExportThrottle.rate", "1/hour"):
+            self.export(user)
+            with self.assertRaises(Throttled):
+                self.export(user)
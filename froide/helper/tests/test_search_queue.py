@@ -0,0 +1,73 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from ..search.signal_processor import SearchIndexQueue
+from ..tasks import bulk_index_documents
+
+
+class TestSearchIndexQueue(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.queue = SearchIndexQueue()
+
+    @mock.patch("froide.helper.search.signal_processor.search_instances_save")
+    def test_coalesce_in_transaction(self, task):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.queue.add("foirequest.foirequest", 1)
+            self.queue.add("foirequest.foimessage", 2)
+            self.queue.add("foirequest.foirequest", 1)
+            self.queue.add("foirequest.foimessage", 2)
+        task.apply_async.assert_called_once()
+        args, kwargs = task.apply_async.call_args
+        self.assertEqual(
+            args[0], ([("foirequest.foimessage", 2), ("foirequest.foirequest", 1)],)
+        )
+        stats = self.queue.get_stats()
+        self.assertEqual(stats["received"], 4)
+        self.assertEqual(stats["scheduled"], 2)
+        self.assertEqual(stats["coalesce_ratio"], 0.5)
+
+    @mock.patch("froide.helper.search.signal_processor.search_instances_save")
+    def test_debounce_across_transactions(self, task):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.queue.add("foirequest.foirequest", 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.queue.add("foirequest.foirequest", 1)
+            self.queue.add("foirequest.foirequest", 3)
+        self.assertEqual(task.apply_async.call_count, 2)
+        args, kwargs = task.apply_async.call_args
+        self.assertEqual(args[0], ([("foirequest.foirequest", 3)],))
+
+
+class TestBulkIndexDocuments(TestCase):
+    def make_doc_class(self, errors=()):
+        doc_class = mock.Mock(__name__="Document")
+        doc_class.django.auto_refresh = False
+        doc = doc_class.return_value
+        doc.should_index_object.side_effect = lambda obj: obj.pk != 3
+
+        def prepare(obj, action):
+            if obj.pk == 2:
+                raise ValueError("broken")
+            return {"_id": obj.pk}
+
+        doc._prepare_action.side_effect = prepare
+        doc.bulk.return_value = (1, list(errors))
+        return doc_class
+
+    def test_skip_broken_objects(self):
+        doc_class = self.make_doc_class(errors=[{"index": {"_id": 1}}])
+        objects = {pk: mock.Mock(pk=pk) for pk in (1, 2, 3)}
+        with self.assertLogs("froide.helper.tasks") as logs:
+            bulk_index_documents({doc_class: objects})
+        doc_class.return_value.bulk.assert_called_once_with(
+            [{"_id": 1}], raise_on_error=False
+        )
+        self.assertEqual(len(logs.records), 2)
+
+    def test_nothing_to_index(self):
+        doc_class = self.make_doc_class()
+        bulk_index_documents({doc_class: {3: mock.Mock(pk=3)}})
+        doc_class.return_value.bulk.assert_not_called()
@@ -0,0 +1,81 @@
+import pickle
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from ..cache import bump_cache_generation, get_cache_generation
+from ..search.cursor import SearchCursor
+from ..search.paginator import ElasticsearchPaginator
+from ..search.result_cache import (
+    CachedResultList,
+    CachedSearchResult,
+    SearchResultCache,
+)
+from ..tasks import get_search_generation_name
+
+
+class TestSearchResultCache(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_generation(self):
+        generation = get_cache_generation("test")
+        self.assertEqual(get_cache_generation("test"), generation)
+        bump_cache_generation("test")
+        self.assertEqual(get_cache_generation("test"), generation + 1)
+
+        cache.clear()
+        bump_cache_generation("test")
+        self.assertIsNotNone(get_cache_generation("test"))
+
+    def test_key_normalization(self):
+        result_cache = SearchResultCache()
+        key = result_cache.get_key("foirequest", "idx", {"q": "a", "page": "1"})
+        self.assertEqual(
+            result_cache.get_key("foirequest", "idx", {"page": "1", "q": "a"}), key
+        )
+        self.assertNotEqual(
+            result_cache.get_key("foirequest", "idx", {"q": "a", "page": "2"}), key
+        )
+        bump_cache_generation(get_search_generation_name("idx"))
+        self.assertNotEqual(
+            result_cache.get_key("foirequest", "idx", {"q": "a", "page": "1"}), key
+        )
+
+    def test_hit_miss(self):
+        result_cache = SearchResultCache()
+        key = result_cache.get_key("foirequest", "idx", {"page": "1"})
+        self.assertIsNone(result_cache.get(key))
+        result = CachedSearchResult(
+            objects=["a", "b"],
+            count=30,
+            has_more=False,
+            number=2,
+            is_paginated=True,
+            facets={},
+            next_cursor=SearchCursor(search_after=[1]),
+        )
+        result_cache.set(key, result)
+        self.assertEqual(result_cache.get(key), result)
+        stats = result_cache.get_stats()
+        self.assertEqual(stats["hit"], 1)
+        self.assertEqual(stats["miss"], 1)
+        self.assertEqual(stats["hit_ratio"], 0.5)
+
+    def test_cached_result_list(self):
+        result = CachedSearchResult(
+            objects=["a", "b"],
+            count=27,
+            has_more=True,
+            number=2,
+            is_paginated=True,
+            facets={},
+        )
+        object_list = pickle.loads(pickle.dumps(CachedResultList(result)))
+        paginator = ElasticsearchPaginator(object_list, 25)
+        page = paginator._get_page(object_list, result.number, paginator)
+        self.assertEqual(paginator.count, 27)
+        self.assertEqual(paginator.num_pages, 2)
+        self.assertEqual(paginator.formatted_count, "27+")
+        self.assertEqual(list(page), ["a", "b"])
+        self.assertFalse(page.has_next())
@@ -0,0 +1,71 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from ..smtp_pool import SMTPConnectionPool
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSMTPConnectionPool(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.pool = SMTPConnectionPool(clock=self.clock)
+        self.key = ("smtp.example.com", 587, "user", True, False, None, None)
+
+    def test_connection_is_reused(self):
+        connect = mock.Mock(side_effect=lambda: mock.Mock())
+        pooled = self.pool.acquire(self.key, connect)
+        self.pool.record_sent(pooled)
+        self.pool.release(pooled)
+
+        pooled_again = self.pool.acquire(self.key, connect)
+        self.assertIs(pooled.connection, pooled_again.connection)
+        self.assertEqual(connect.call_count, 1)
+        stats = self.pool.get_stats()
+        self.assertEqual(stats["opened"], 1)
+        self.assertEqual(stats["reused"], 1)
+        self.assertEqual(stats["reuse_ratio"], 0.5)
+
+    def test_different_keys_do_not_share(self):
+        connect = mock.Mock(side_effect=lambda: mock.Mock())
+        pooled = self.pool.acquire(self.key, connect)
+        self.pool.release(pooled)
+        other_key = ("smtp.example.org",) + self.key[1:]
+        pooled_other = self.pool.acquire(other_key, connect)
+        self.assertIsNot(pooled.connection, pooled_other.connection)
+        self.assertEqual(connect.call_count, 2)
+
+    def test_idle_timeout(self):
+        connect = mock.Mock(side_effect=lambda: mock.Mock())
+        pooled = self.pool.acquire(self.key, connect)
+        self.pool.release(pooled)
+        self.clock.now += 3600
+        pooled_again = self.pool.acquire(self.key, connect)
+        self.assertIsNot(pooled.connection, pooled_again.connection)
+        pooled.connection.quit.assert_called_once_with()
+        self.assertEqual(self.pool.get_stats()["expired"], 1)
+
+    def test_max_messages(self):
+        connect = mock.Mock(side_effect=lambda: mock.Mock())
+        pooled = self.pool.acquire(self.key, connect)
+        with self.settings(FROIDE_CONFIG={"smtp_connection_pool": {"max_messages": 2}}):
+            self.pool.record_sent(pooled)
+            self.pool.record_sent(pooled)
+            self.pool.release(pooled)
+        pooled.connection.quit.assert_called_once_with()
+        self.assertEqual(self.pool.get_stats()["idle"], 0)
+
+    def test_discard(self):
+        connect = mock.Mock(side_effect=lambda: mock.Mock())
+        pooled = self.pool.acquire(self.key, connect)
+        self.pool.discard(pooled)
+        pooled_again = self.pool.acquire(self.key, connect)
+        self.assertIsNot(pooled.connection, pooled_again.connection)
+        self.assertEqual(self.pool.get_stats()["discarded"], 1)
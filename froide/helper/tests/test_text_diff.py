@@ -0,0 +1,133 @@
+import gc
+import random
+import re
+import time
+from difflib import SequenceMatcher
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+import pytest
+
+from .. import text_diff
+from ..text_diff import get_diff_chunks, get_differences, get_opcodes
+
+WORDS = (
+    "der die das und ist nicht wir Sie Ihre Anfrage nach dem Gesetz"
+    " Informationsfreiheit Behörde Antwort Frist Bescheid Gebühren Unterlagen"
+    " Akten Vermerk Schreiben vom zu mit für auf den im eine einen werden"
+    " wurde hat haben bitte Kenntnis Auskunft gemäß Absatz Satz Nummer Datum"
+    " Seite Anlage Ministerium Verwaltung Landkreis Stadt"
+).split()
+NAMES = ["Peter Parker", "Erika Mustermann", "Max Müller", "Anna Schmidt"]
+
+
+def make_sentence(rand):
+    words = [rand.choice(WORDS) for _ in range(rand.randint(6, 18))]
+    if rand.random() < 0.15:
+        words.insert(rand.randrange(len(words)), rand.choice(NAMES))
+    if rand.random() < 0.05:
+        words.append("%s@example.org" % rand.choice(NAMES).split()[0].lower())
+    if rand.random() < 0.03:
+        words.append("Tel. 030 %d" % rand.randint(100000, 999999))
+    return " ".join(words).capitalize() + rand.choice([".", "?", ":", ";"])
+
+
+def make_message(seed, paragraphs):
+    """
+    Reply mail with a closing and a quoted earlier mail, like long
+    responses of public bodies.
+    """
+    rand = random.Random(seed)
+    parts = ["Sehr geehrte Damen und Herren,"]
+    for _ in range(paragraphs):
+        sentences = [make_sentence(rand) for _ in range(rand.randint(2, 6))]
+        parts.append(" ".join(sentences))
+    body = "\n\n".join(parts)
+    quoted = "\n".join("> " + line for line in body.splitlines()[: paragraphs // 2])
+    closing = "\n\nMit freundlichen Grüßen\n\n{}\nTel. 030 123456\n".format(
+        rand.choice(NAMES)
+    )
+    return "{}{}\n\n-----Ursprüngliche Nachricht-----\n{}".format(body, closing, quoted)
+
+
+def redact(text):
+    for name in NAMES:
+        text = text.replace(name, "<< Name entfernt >>")
+    text = re.sub(r"[\w.]+@example\.org", "<<E-Mail-Adresse>>", text)
+    text = re.sub(r"Tel\. 030 \d+", "<< Telefonnummer >>", text)
+    # Signature is removed
+    return text.replace("Grüßen\n\n<< Name entfernt >>", "Grüßen\n\n")
+
+
+def get_sequence_matcher_differences(content_a, content_b):
+    def get_sequence_matcher_opcodes(a, b):
+        return SequenceMatcher(None, a, b, autojunk=False).get_opcodes()
+
+    with mock.patch.object(text_diff, "get_opcodes", get_sequence_matcher_opcodes):
+        return list(get_differences(content_a, content_b))
+
+
+class TextDiffTest(SimpleTestCase):
+    def test_opcodes(self):
+        a = get_diff_chunks("Hallo Peter Parker, hier die Akten. Gruß Anna")
+        b = get_diff_chunks("Hallo << Name entfernt >>, hier die Akten. Gruß")
+        with mock.patch.object(text_diff, "SMALL_DIFF_LIMIT", 0):
+            opcodes = get_opcodes(a, b)
+        self.assertEqual(
+            [(tag, "".join(a[i1:i2])) for tag, i1, i2, _j1, _j2 in opcodes],
+            [
+                ("equal", "Hallo "),
+                ("replace", "Peter"),
+                ("equal", " "),
+                ("replace", "Parker"),
+                ("equal", ", hier die Akten. Gruß"),
+                ("delete", " Anna"),
+            ],
+        )
+        self.assertEqual(
+            opcodes, SequenceMatcher(None, a, b, autojunk=False).get_opcodes()
+        )
+
+    def test_same_as_sequence_matcher(self):
+        with mock.patch.object(text_diff, "SMALL_DIFF_LIMIT", 0):
+            for seed in range(10):
+                original = make_message(seed, 8)
+                redacted = redact(original)
+                for a, b in ((original, redacted), (redacted, original)):
+                    self.assertEqual(
+                        list(get_differences(a, b)),
+                        get_sequence_matcher_differences(a, b),
+                    )
+
+    def test_unrelated_texts(self):
+        a = make_message(1, 10)
+        b = make_message(2, 10)
+        self.assertEqual("".join(x[1] for x in get_differences(a, b)), a)
+
+
+def time_differences(paragraphs):
+    original = make_message(paragraphs, paragraphs)
+    redacted = redact(original)
+    # Garbage collection time grows with all objects alive
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        list(get_differences(original, redacted))
+        return time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+@pytest.mark.benchmark
+def test_redaction_diff_scales_linearly():
+    """
+    Diffing redactions of messages with eight times as many chunks must
+    not take much more than eight times as long.
+    """
+    small, large = 100, 800
+    small_time = min(time_differences(small) for _ in range(3))
+    large_time = min(time_differences(large) for _ in range(3))
+    ratio = large_time / small_time
+    # SequenceMatcher has a ratio of about 64 on these messages
+    assert ratio < 32
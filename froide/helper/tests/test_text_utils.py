@@ -0,0 +1,153 @@
+import gc
+import random
+import re
+import time
+
+from django.test import TestCase
+
+import pytest
+
+from ..text_utils import (
+    get_user_redactor,
+    redact_content,
+    redact_user_strings,
+    replace_custom,
+    replace_email,
+    replace_email_name,
+    replace_word,
+)
+
+NAME = "<< Name removed >>"
+EMAIL = "<< Email removed >>"
+ADDRESS = "<< Address removed >>"
+
+
+def redact_sequentially(content, user_replacements):
+    # Previous implementation with one pass per replacement
+    for needle, repl in user_replacements:
+        if isinstance(needle, str):
+            content = replace_word(needle, repl, content)
+        else:
+            content = replace_custom(needle, repl, content)
+    return content
+
+
+def make_replacements(count):
+    replacements = [("Street {} Number {}".format(i, i), ADDRESS) for i in range(count)]
+    replacements.extend(
+        [
+            ("peter.parker@example.org", EMAIL),
+            (re.compile(r"Sehr geehrter? (?:Herr|Frau) ([\w\-]+)", re.U), NAME),
+            ("Parker", NAME),
+            ("Peter", NAME),
+        ]
+    )
+    return replacements
+
+
+def make_text(count, replacements):
+    rand = random.Random(count)
+    words = ["lorem", "ipsum", "dolor", "sit", "amet"]
+    # The previous implementation missed directly adjacent needles
+    needles = [needle for needle, _repl in replacements if isinstance(needle, str)]
+    lines = ["Sehr geehrte Frau Parker,"]
+    for _ in range(count):
+        line = [rand.choice(words) for _ in range(5)]
+        line.append(rand.choice(needles))
+        line.extend(rand.choice(words) for _ in range(5))
+        line.append(rand.choice(needles) + ".")
+        lines.append(" ".join(line))
+    return "\n".join(lines)
+
+
+class UserRedactorTest(TestCase):
+    def test_same_as_sequential_redaction(self):
+        replacements = make_replacements(20)
+        text = make_text(200, replacements)
+        self.assertEqual(
+            redact_user_strings(text, replacements),
+            redact_sequentially(text, replacements),
+        )
+
+    def test_replacement_order(self):
+        # Order of get_user_redactions: address, email, greetings, names
+        replacements = [
+            ("Bergstraße 12", ADDRESS),
+            ("Anna.Berg@web.de", EMAIL),
+            (re.compile(r"Sehr geehrte Frau ([\w\-]+)", re.U), NAME),
+            ("Berg", NAME),
+            ("Anna", NAME),
+        ]
+        text = "Sehr geehrte Frau Berg,\nBergstraße 12\nAnna.Berg@web.de"
+        expected = "Sehr geehrte Frau {},\n{}\n{}".format(NAME, ADDRESS, EMAIL)
+        self.assertEqual(redact_user_strings(text, replacements), expected)
+        self.assertEqual(redact_sequentially(text, replacements), expected)
+
+    def test_word_boundaries(self):
+        replacements = [("Parker", NAME)]
+        text = "Parker, parker_ Parkers SpiderParker (PARKER)"
+        self.assertEqual(
+            redact_user_strings(text, replacements),
+            "{0}, {0}_ Parkers SpiderParker ({0})".format(NAME),
+        )
+
+    def test_adjacent_words(self):
+        replacements = [("Parker", NAME)]
+        self.assertEqual(
+            redact_user_strings("Parker Parker", replacements),
+            "{0} {0}".format(NAME),
+        )
+
+    def test_longest_word_wins(self):
+        replacements = [("Parker", NAME), ("Peter Parker", EMAIL)]
+        self.assertEqual(
+            redact_user_strings("Peter Parker and Parker", replacements),
+            "{} and {}".format(EMAIL, NAME),
+        )
+
+    def test_empty_needles(self):
+        replacements = [("", NAME)]
+        self.assertEqual(redact_user_strings("a b", replacements), "a b")
+        self.assertEqual(redact_user_strings("text", []), "text")
+
+    def test_redactor_cached_by_replacements(self):
+        replacements = make_replacements(3)
+        redactor = get_user_redactor(replacements)
+        self.assertIs(get_user_redactor(list(replacements)), redactor)
+        changed = replacements + [("Spider", NAME)]
+        self.assertIsNot(get_user_redactor(changed), redactor)
+
+    def test_redact_content_emails(self):
+        text = "Mail <a.b@example.org> or c@example.com, <not mail> a@b<c@d.de>"
+        expected = replace_email(
+            replace_email_name(text, "<<name and email address>>"),
+            "<<email address>>",
+        )
+        self.assertEqual(redact_content(text), expected)
+
+
+def time_redaction(func, count):
+    replacements = make_replacements(count)
+    text = make_text(count * 10, replacements)
+    get_user_redactor(replacements)
+    # Garbage collection time grows with all objects alive
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        func(text, replacements)
+        return time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+@pytest.mark.benchmark
+def test_user_redaction_faster_than_sequential():
+    """
+    Redacting with a compiled redactor must be much faster than one
+    regular expression pass per replacement.
+    """
+    count = 200
+    sequential_time = min(time_redaction(redact_sequentially, count) for _ in range(3))
+    compiled_time = min(time_redaction(redact_user_strings, count) for _ in range(3))
+    ratio = sequential_time / compiled_time
+    assert ratio > 4
@@ -1,6 +1,7 @@
 import re
+from bisect import bisect_left
 from difflib import SequenceMatcher
-from typing import Iterator, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 
 from django.utils.html import escape
 from django.utils.safestring import SafeString, mark_safe
@@ -8,6 +9,12 @@ from django.utils.safestring import SafeString, mark_safe
 SPLITTER = r"([\u0000-\u002C\u003B-\u003F\u005B-\u005e\u0060\u007B-\u007E])"
 SPLITTER_RE = re.compile(SPLITTER)
 SPLITTER_MATCH_RE = re.compile("^%s$" % SPLITTER)
+# Chunk lists with at most this many compared pairs are diffed
+# with SequenceMatcher directly
+SMALL_DIFF_LIMIT = 250_000
+
+MatchingBlock = Tuple[int, int, int]
+Opcode = Tuple[str, int, int, int, int]
 
 
 def get_diff_chunks(content: str) -> List[str]:
@@ -18,14 +25,142 @@ def is_diff_separator(s: str) -> bool:
     return bool(SPLITTER_MATCH_RE.match(s))
 
 
+def get_unique_anchors(
+    a: Sequence[str], alo: int, ahi: int, b: Sequence[str], blo: int, bhi: int
+) -> List[Tuple[int, int]]:
+    """
+    Returns the longest increasing sequence of index pairs of chunks that
+    occur exactly once in both ranges (the anchors of patience diff).
+    """
+    a_unique: Dict[str, Optional[int]] = {}
+    for i in range(alo, ahi):
+        a_unique[a[i]] = None if a[i] in a_unique else i
+    b_unique: Dict[str, Optional[int]] = {}
+    for j in range(blo, bhi):
+        b_unique[b[j]] = None if b[j] in b_unique else j
+    # Dicts keep insertion order, so pairs are ordered by a index
+    pairs = [
+        (i, b_unique[chunk])
+        for chunk, i in a_unique.items()
+        if i is not None and b_unique.get(chunk) is not None
+    ]
+
+    tails: List[int] = []
+    tail_indexes: List[int] = []
+    previous: List[Optional[int]] = []
+    for index, (_i, j) in enumerate(pairs):
+        pos = bisect_left(tails, j)
+        previous.append(tail_indexes[pos - 1] if pos else None)
+        if pos == len(tails):
+            tails.append(j)
+            tail_indexes.append(index)
+        else:
+            tails[pos] = j
+            tail_indexes[pos] = index
+
+    anchors = []
+    index = tail_indexes[-1] if tail_indexes else None
+    while index is not None:
+        anchors.append(pairs[index])
+        index = previous[index]
+    anchors.reverse()
+    return anchors
+
+
+def get_matching_blocks(a: Sequence[str], b: Sequence[str]) -> List[MatchingBlock]:
+    """
+    Matching blocks of chunk lists in about linear time for texts that
+    differ in some replaced spans, like redacted texts.
+
+    Common prefixes and suffixes are matched directly. Remaining ranges
+    are split at chunks that are unique in both ranges. Ranges that are
+    small or have no unique chunks are matched with SequenceMatcher.
+    """
+    blocks: List[MatchingBlock] = []
+    stack = [(0, len(a), 0, len(b))]
+    while stack:
+        alo, ahi, blo, bhi = stack.pop()
+        start = 0
+        while alo + start < ahi and blo + start < bhi:
+            if a[alo + start] != b[blo + start]:
+                break
+            start += 1
+        if start:
+            blocks.append((alo, blo, start))
+            alo += start
+            blo += start
+        end = 0
+        while alo < ahi - end and blo < bhi - end:
+            if a[ahi - end - 1] != b[bhi - end - 1]:
+                break
+            end += 1
+        if end:
+            blocks.append((ahi - end, bhi - end, end))
+            ahi -= end
+            bhi -= end
+        if alo == ahi or blo == bhi:
+            continue
+
+        anchors = []
+        if (ahi - alo) * (bhi - blo) > SMALL_DIFF_LIMIT:
+            anchors = get_unique_anchors(a, alo, ahi, b, blo, bhi)
+        if not anchors:
+            matcher = SequenceMatcher(None, a[alo:ahi], b[blo:bhi], autojunk=False)
+            blocks.extend(
+                (alo + i, blo + j, size)
+                for i, j, size in matcher.get_matching_blocks()
+                if size
+            )
+            continue
+
+        for i, j in anchors:
+            stack.append((alo, i, blo, j))
+            blocks.append((i, j, 1))
+            alo, blo = i + 1, j + 1
+        stack.append((alo, ahi, blo, bhi))
+
+    blocks.sort()
+    # Join adjacent blocks like SequenceMatcher does
+    joined: List[MatchingBlock] = []
+    for i, j, size in blocks:
+        if joined:
+            last_i, last_j, last_size = joined[-1]
+            if last_i + last_size == i and last_j + last_size == j:
+                joined[-1] = (last_i, last_j, last_size + size)
+                continue
+        joined.append((i, j, size))
+    return joined
+
+
+def get_opcodes(a: Sequence[str], b: Sequence[str]) -> List[Opcode]:
+    """
+    Like SequenceMatcher.get_opcodes, but uses get_matching_blocks
+    for large inputs.
+    """
+    if len(a) * len(b) <= SMALL_DIFF_LIMIT:
+        return SequenceMatcher(None, a, b, autojunk=False).get_opcodes()
+    opcodes: List[Opcode] = []
+    i = j = 0
+    for ai, bj, size in get_matching_blocks(a, b) + [(len(a), len(b), 0)]:
+        if i < ai and j < bj:
+            opcodes.append(("replace", i, ai, j, bj))
+        elif i < ai:
+            opcodes.append(("delete", i, ai, j, bj))
+        elif j < bj:
+            opcodes.append(("insert", i, ai, j, bj))
+        if size:
+            opcodes.append(("equal", ai, ai + size, bj, bj + size))
+        i, j = ai + size, bj + size
+    return opcodes
+
+
 def get_differences_by_chunk(
     content_a: str, content_b: str
 ) -> Iterator[Tuple[bool, str]]:
     a_list = get_diff_chunks(content_a)
     b_list = get_diff_chunks(content_b)
-    matcher = SequenceMatcher(None, a_list, b_list, autojunk=False)
     last_same = False
-    for tag, i1, i2, _j1, _j2 in matcher.get_opcodes():
+    for tag, i1, i2, _j1, _j2 in get_opcodes(a_list, b_list):
         if i1 == i2:
             continue
         is_same = tag == "equal"
@@ -92,14 +92,119 @@ Replacements = List[Union[Tuple[str, str], Tuple[Pattern[str], str]]]
 ReplacementsDict = Dict[Union[str, Pattern[str]], str]
 
 
-def redact_user_strings(content: str, user_replacements: Replacements) -> str:
-    for needle, repl in user_replacements:
-        if isinstance(needle, str):
-            content = replace_word(needle, repl, content)
-        else:
-            content = replace_custom(needle, repl, content)
+# Not preceded or followed by a letter or digit, like in replace_word
+WORD_START = r"(?<![^\W_])"
+WORD_END = r"(?![^\W_])"
+USER_REDACTOR_CACHE_SIZE = 256
 
-    return content
+
+def get_trie_pattern(words: List[str]) -> str:
+    """
+    Returns a pattern that matches any of the lower case words like an
+    alternation of them, but with shared prefixes matched only once.
+    Longer words are tried first.
+    """
+    trie: Dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    return _get_node_pattern(trie)
+
+
+def _get_node_pattern(node: Dict[str, Any]) -> str:
+    branches = [
+        re.escape(char) + _get_node_pattern(child)
+        for char, child in sorted(node.items())
+        if char
+    ]
+    if not branches:
+        return ""
+    is_end = "" in node
+    if len(branches) == 1 and not is_end:
+        return branches[0]
+    return "(?:%s)%s" % ("|".join(branches), "?" if is_end else "")
+
+
+class WordReplacer:
+    """
+    Replaces a group of words in a single pass over the text.
+    The longest word wins where words overlap.
+    """
+
+    def __init__(self):
+        self.words: Dict[str, str] = {}
+        self.regex = None
+
+    def add(self, needle: str, replacement: str):
+        self.words.setdefault(needle.lower(), replacement)
+
+    def compile(self):
+        self.regex = re.compile(
+            WORD_START + get_trie_pattern(list(self.words)) + WORD_END, re.I
+        )
+
+    def replace(self, match: re.Match) -> str:
+        word = match.group(0)
+        repl = self.words.get(word.lower())
+        if repl is not None:
+            return repl
+        # Case insensitive matching folds a few characters differently
+        for needle, repl in self.words.items():
+            if re.fullmatch(re.escape(needle), word, re.I):
+                return repl
+        return word
+
+    def __call__(self, content: str) -> str:
+        return self.regex.sub(self.replace, content)
+
+
+class UserRedactor:
+    """
+    Applies user replacements in their given order. Consecutive words
+    are replaced together in one pass, patterns run where they appear.
+    """
+
+    def __init__(self, user_replacements: Replacements):
+        self.steps: List[Callable[[str], str]] = []
+        words = None
+        for needle, repl in user_replacements:
+            if not isinstance(needle, str):
+                words = None
+                # Patterns capture a string that is replaced verbatim
+                self.steps.append(functools.partial(replace_custom, needle, repl))
+            elif needle:
+                if words is None:
+                    words = WordReplacer()
+                    self.steps.append(words)
+                words.add(needle, repl)
+        for step in self.steps:
+            if isinstance(step, WordReplacer):
+                step.compile()
+
+    def redact(self, content: str) -> str:
+        for step in self.steps:
+            content = step(content)
+        return content
+
+
+@functools.lru_cache(maxsize=USER_REDACTOR_CACHE_SIZE)
+def _get_user_redactor(user_replacements: tuple) -> UserRedactor:
+    return UserRedactor(user_replacements)
+
+
+def get_user_redactor(user_replacements: Replacements) -> UserRedactor:
+    """
+    Returns a compiled redactor for the replacements. Redactors are
+    cached by their replacements, so changing a user profile gives
+    a new redactor.
+    """
+    return _get_user_redactor(tuple(user_replacements))
+
+
+def redact_user_strings(content: str, user_replacements: Replacements) -> str:
+    return get_user_redactor(user_replacements).redact(content)
 
 
 def redact_subject(
@@ -147,8 +252,11 @@ def redact_plaintext(
 
 
 def redact_content(content: Union[str, SafeString]) -> str:
-    content = replace_email_name(content, _("<<name and email address>>"))
-    content = replace_email(content, _("<<email address>>"))
+    name_replacement = str(_("<<name and email address>>"))
+    email_replacement = str(_("<<email address>>"))
+    content = EMAIL_REDACTION_RE.sub(
+        lambda m: name_replacement if m.group(1) else email_replacement, content
+    )
 
     if settings.FROIDE_CONFIG.get("custom_replacements"):
         content = replace_custom(
@@ -173,6 +281,8 @@ def replace_word(needle: str, replacement: str, content: str) -> str:
 EMAIL = r"\b[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}\b"
 EMAIL_RE = re.compile(EMAIL, flags=re.IGNORECASE)
 EMAIL_NAME_RE = re.compile("<%s>" % EMAIL, flags=re.IGNORECASE)
+# Replaces names with email addresses and plain addresses in one pass
+EMAIL_REDACTION_RE = re.compile("(<%s>)|%s" % (EMAIL, EMAIL), flags=re.IGNORECASE)
 
 
 def replace_email_name(text: str, replacement: str = "") -> str:
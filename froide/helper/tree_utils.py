@@ -1,3 +1,6 @@
+import time
+from typing import Dict, Iterable, List, Optional
+
 from treebeard.mp_tree import MP_Node
 
 
@@ -40,3 +43,52 @@ def add_children(leaf, get_children):
         child.save(update_fields=["path", "depth"])
         last_child = child
         add_children(child, get_children)
+
+
+class TreeAncestorCache:
+    """
+    In-process map of the materialized paths of a treebeard MP_Node model.
+    Looks up ancestors of nodes by id without querying per node.
+    The map is rebuilt after invalidate() or after max_age seconds.
+    """
+
+    def __init__(self, model, max_age=300):
+        self.model = model
+        self.max_age = max_age
+        self.invalidate()
+
+    def invalidate(self, **kwargs):
+        self.id_to_path: Optional[Dict[int, str]] = None
+        self.path_to_id: Dict[str, int] = {}
+        self.built = 0.0
+
+    def build(self):
+        id_to_path = dict(self.model._default_manager.values_list("id", "path"))
+        self.path_to_id = {path: pk for pk, path in id_to_path.items()}
+        self.id_to_path = id_to_path
+        self.built = time.monotonic()
+
+    def get_path(self, node_id: int) -> Optional[str]:
+        if self.id_to_path is None or time.monotonic() - self.built > self.max_age:
+            self.build()
+        path = self.id_to_path.get(node_id)
+        if path is None:
+            # Node may have been created after the map was built
+            self.build()
+            path = self.id_to_path.get(node_id)
+        return path
+
+    def get_ancestor_ids(self, node_id: int) -> List[int]:
+        """
+        Ancestor ids from the root down, like node.get_ancestors()
+        """
+        path = self.get_path(node_id)
+        if path is None:
+            return []
+        steplen = self.model.steplen
+        prefixes = (path[:i] for i in range(steplen, len(path), steplen))
+        return [self.path_to_id[p] for p in prefixes if p in self.path_to_id]
+
+    def get_ids_with_ancestors(self, node_ids: Iterable[int]) -> List[int]:
+        node_ids = list(node_ids)
+        return node_ids + [a for pk in node_ids for a in self.get_ancestor_ids(pk)]
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import zipfile
+from typing import IO, Iterable, Iterator, Tuple, Union
+
+ZIP_CHUNK_SIZE = 64 * 1024
+# Packages larger than this are spooled to disk
+ZIP_SPOOL_MAX_SIZE = 10 * 1024 * 1024
+
+# bytes, text, a file system path or an iterable of bytes chunks
+ZipSource = Union[bytes, str, os.PathLike, Iterable[bytes]]
+ZipEntry = Tuple[str, ZipSource]
+
+
+def iter_file_chunks(path, chunk_size=ZIP_CHUNK_SIZE) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def write_zip_entry(zfile: zipfile.ZipFile, arcname: str, source: ZipSource):
+    """
+    Write an entry to the zip file without holding file contents in memory.
+    Text is written UTF-8 encoded, only path-like objects are read as files.
+    """
+    if isinstance(source, str):
+        zfile.writestr(arcname, source.encode("utf-8"))
+    elif isinstance(source, (bytes, bytearray)):
+        zfile.writestr(arcname, source)
+    elif isinstance(source, os.PathLike):
+        # Copies from the file in small blocks
+        zfile.write(source, arcname)
+    else:
+        with zfile.open(arcname, "w", force_zip64=True) as entry:
+            for chunk in source:
+                entry.write(chunk)
+
+
+def write_zip(fileobj: IO[bytes], entries: Iterable[ZipEntry]):
+    with zipfile.ZipFile(fileobj, "w") as zfile:
+        for arcname, source in entries:
+            write_zip_entry(zfile, arcname, source)
+
+
+def make_spooled_zip(
+    entries: Iterable[ZipEntry], max_size=ZIP_SPOOL_MAX_SIZE
+) -> IO[bytes]:
+    """
+    Returns a temporary file positioned at the start that holds a zip
+    of all entries. It stays in memory up to max_size bytes.
+    """
+    spooled_file = tempfile.SpooledTemporaryFile(max_size=max_size)
+    try:
+        write_zip(spooled_file, entries)
+    except Exception:
+        spooled_file.close()
+        raise
+    spooled_file.seek(0)
+    return spooled_file
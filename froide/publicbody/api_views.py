@@ -547,6 +547,15 @@ class PublicBodyViewSet(
     def search(self, request):
         return self.search_view(request)
 
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="search/export",
+        url_name="search-export",
+    )
+    def search_export(self, request):
+        return self.export_view(request)
+
     @action(
         detail=False, methods=["get"], url_path="autocomplete", url_name="autocomplete"
     )
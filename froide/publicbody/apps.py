@@ -8,16 +8,43 @@ class PublicBodyConfig(AppConfig):
     verbose_name = _("Public Body")
 
     def ready(self):
+        from django.db.models.signals import post_delete, post_save
+
         from froide.account import account_merged
         from froide.account.export import registry
         from froide.helper.search import search_registry
+        from froide.helper.search.facets import facet_object_cache
 
-        from .utils import export_user_data
+        from .models import (
+            Category,
+            Classification,
+            Jurisdiction,
+            ProposedPublicBody,
+            PublicBody,
+        )
+        from .utils import (
+            category_ancestors,
+            classification_ancestors,
+            export_user_data,
+        )
 
         registry.register(export_user_data)
         account_merged.connect(merge_user)
         search_registry.register(add_search)
 
+        for model, ancestor_cache in (
+            (Classification, classification_ancestors),
+            (Category, category_ancestors),
+        ):
+            post_save.connect(ancestor_cache.invalidate, sender=model)
+            post_delete.connect(ancestor_cache.invalidate, sender=model)
+
+        for model in (PublicBody, ProposedPublicBody):
+            post_save.connect(update_email_index, sender=model)
+
+        for model in (Jurisdiction, PublicBody, ProposedPublicBody):
+            facet_object_cache.watch(model)
+
 
 def add_search(request):
     return {
@@ -27,6 +54,12 @@ def add_search(request):
     }
 
 
+def update_email_index(sender, instance=None, **kwargs):
+    from .models import PublicBodyEmail
+
+    PublicBodyEmail.objects.update_for_publicbody(instance)
+
+
 def merge_user(sender, old_user=None, new_user=None, **kwargs):
     from froide.account.utils import move_ownership
 
@@ -13,7 +13,13 @@ import requests
 from froide.georegion.models import GeoRegion
 from froide.helper.search.utils import trigger_search_index_update_qs
 from froide.helper.text_utils import slugify
-from froide.publicbody.models import Category, Classification, Jurisdiction, PublicBody
+from froide.publicbody.models import (
+    Category,
+    Classification,
+    Jurisdiction,
+    PublicBody,
+    PublicBodyEmail,
+)
 
 User = get_user_model()
 
@@ -153,6 +159,8 @@ class CSVImporter(object):
             row["_updated_by"] = self.user
             row["updated_at"] = self.import_time
             PublicBody._default_manager.filter(id=pb.id).update(**row)
+            pb.refresh_from_db()
+            PublicBodyEmail.objects.update_for_publicbody(pb)
             if row.get("jurisdiction"):
                 pb.laws.clear()
                 pb.laws.add(*row["jurisdiction"].laws)
@@ -4,6 +4,7 @@ from django_elasticsearch_dsl.registries import registry
 from froide.helper.search import get_index, get_ngram_analyzer, get_text_analyzer
 
 from .models import PublicBody
+from .utils import category_ancestors, classification_ancestors
 
 index = get_index("publicbody")
 
@@ -32,6 +33,7 @@ class PublicBodyDocument(Document):
     class Django:
         model = PublicBody
         queryset_chunk_size = 100
+        queryset_pagination = 100
 
     def get_queryset(self):
         """Not mandatory but to improve performance we can select related in one sql request"""
@@ -56,16 +58,20 @@ class PublicBodyDocument(Document):
         ] + [o.name for o in obj.categories.all()]
         return " ".join(c for c in content if c)
 
+    def get_indexing_queryset(self):
+        # Pick up tree changes once per indexing run
+        classification_ancestors.invalidate()
+        category_ancestors.invalidate()
+        return super().get_indexing_queryset()
+
     def prepare_classification(self, obj):
-        if obj.classification is None:
+        if obj.classification_id is None:
             return []
-        return [obj.classification.id] + [
-            c.id for c in obj.classification.get_ancestors()
-        ]
+        return classification_ancestors.get_ids_with_ancestors([obj.classification_id])
 
     def prepare_categories(self, obj):
         cats = obj.categories.all()
-        return [o.id for o in cats] + [c.id for o in cats for c in o.get_ancestors()]
+        return category_ancestors.get_ids_with_ancestors(o.id for o in cats)
 
     def prepare_regions(self, obj):
         regs = obj.regions.all()
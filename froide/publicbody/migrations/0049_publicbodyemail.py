@@ -0,0 +1,70 @@
+# Generated by Django 4.2.4 on 2026-10-18 10:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def index_publicbody_emails(apps, schema_editor):
+    PublicBody = apps.get_model("publicbody", "PublicBody")
+    PublicBodyEmail = apps.get_model("publicbody", "PublicBodyEmail")
+
+    batch = []
+    for pb_id, email, alternative_emails in PublicBody.objects.values_list(
+        "id", "email", "alternative_emails"
+    ).iterator():
+        emails = [email]
+        if alternative_emails:
+            emails.extend(alternative_emails.values())
+        emails = {e.strip().lower() for e in emails if e and isinstance(e, str)}
+        batch.extend(
+            PublicBodyEmail(publicbody_id=pb_id, email=e, reversed_email=e[::-1])
+            for e in emails
+        )
+        if len(batch) >= 1000:
+            PublicBodyEmail.objects.bulk_create(batch)
+            batch = []
+    PublicBodyEmail.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("publicbody", "0048_publicbodychangeproposal_reason"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PublicBodyEmail",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("email", models.CharField(max_length=255)),
+                ("reversed_email", models.CharField(db_index=True, max_length=255)),
+                (
+                    "publicbody",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="email_index",
+                        to="publicbody.publicbody",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Public body email",
+                "verbose_name_plural": "Public body emails",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="publicbodyemail",
+            constraint=models.UniqueConstraint(
+                fields=("publicbody", "email"), name="unique_publicbody_email"
+            ),
+        ),
+        migrations.RunPython(index_publicbody_emails, migrations.RunPython.noop),
+    ]
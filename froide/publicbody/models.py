@@ -20,7 +20,7 @@ from taggit.utils import edit_string_for_tags
 from treebeard.mp_tree import MP_Node, MP_NodeManager
 
 from froide.georegion.models import GeoRegion
-from froide.helper.csv_utils import export_csv
+from froide.helper.csv_utils import ExportField, export_csv
 from froide.helper.date_utils import (
     calculate_month_range_de,
     calculate_workingday_range,
@@ -557,6 +557,12 @@ class PublicBody(models.Model):
             return self.alternative_emails.get(law_type, self.email)
         return self.email
 
+    def get_all_emails(self):
+        emails = [self.email]
+        if self.alternative_emails:
+            emails.extend(self.alternative_emails.values())
+        return {normalize_email(e) for e in emails if e and isinstance(e, str)}
+
     def get_mediator(self):
         law = self.default_law
         if law is None:
@@ -607,18 +613,27 @@ class PublicBody(models.Model):
             "contact",
             "address",
             "url",
-            (
+            ExportField(
                 "classification",
                 lambda x: x.classification.name if x.classification else None,
+                select_related=("classification",),
             ),
             "jurisdiction__slug",
-            ("categories", lambda x: edit_string_for_tags(x.categories.all())),
+            ExportField(
+                "categories",
+                lambda x: edit_string_for_tags(x.categories.all()),
+                prefetch_related=("categories",),
+            ),
             "other_names",
             "website_dump",
             "description",
             "request_note",
             "parent__id",
-            ("regions", lambda obj: ",".join(str(x.id) for x in obj.regions.all())),
+            ExportField(
+                "regions",
+                lambda obj: ",".join(str(x.id) for x in obj.regions.all()),
+                prefetch_related=("regions",),
+            ),
         )
 
         return export_csv(queryset, fields)
@@ -636,6 +651,72 @@ class PublicBody(models.Model):
         return counter
 
 
+def normalize_email(email):
+    return email.strip().lower()
+
+
+def reverse_email(email):
+    return normalize_email(email)[::-1]
+
+
+class PublicBodyEmailManager(models.Manager):
+    def update_for_publicbody(self, publicbody):
+        emails = publicbody.get_all_emails()
+        indexed = set(
+            self.filter(publicbody=publicbody).values_list("email", flat=True)
+        )
+        if indexed == emails:
+            return
+        self.filter(publicbody=publicbody).exclude(email__in=emails).delete()
+        self.bulk_create(
+            [
+                PublicBodyEmail(
+                    publicbody=publicbody,
+                    email=email,
+                    reversed_email=reverse_email(email),
+                )
+                for email in emails - indexed
+            ]
+        )
+
+    def get_publicbodies_for_host(self, host):
+        """
+        Public bodies with an email address ending in host.
+        Reversed addresses turn the suffix match into an indexed prefix match.
+        """
+        matching = self.filter(reversed_email__startswith=reverse_email(host))
+        return PublicBody.objects.filter(
+            id__in=matching.values("publicbody_id")
+        ).distinct()
+
+
+class PublicBodyEmail(models.Model):
+    """
+    Email addresses of public bodies including their alternative emails,
+    kept in sync on save to match incoming mail by domain.
+    """
+
+    publicbody = models.ForeignKey(
+        PublicBody, on_delete=models.CASCADE, related_name="email_index"
+    )
+    email = models.CharField(max_length=255)
+    reversed_email = models.CharField(max_length=255, db_index=True)
+
+    objects = PublicBodyEmailManager()
+
+    class Meta:
+        verbose_name = _("Public body email")
+        verbose_name_plural = _("Public body emails")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["publicbody", "email"], name="unique_publicbody_email"
+            )
+        ]
+
+    def __str__(self):
+        return self.email
+
+
 class ProposedPublicBodyManager(CurrentSiteManager):
     def get_queryset(self):
         return super().get_queryset().filter(confirmed=False)
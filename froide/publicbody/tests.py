@@ -4,7 +4,9 @@ import tempfile
 from io import BytesIO
 
 from django.contrib.gis.geos import MultiPolygon
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from froide.foirequest.tests.factories import make_world, rebuild_index
@@ -18,7 +20,8 @@ from froide.publicbody.factories import (
 )
 
 from .csv_import import CSVImporter
-from .models import FoiLaw, Jurisdiction, PublicBody
+from .models import Category, FoiLaw, Jurisdiction, PublicBody
+from .utils import category_ancestors
 
 
 class PublicBodyTest(TestCase):
@@ -83,6 +86,19 @@ class PublicBodyTest(TestCase):
         csv = export_csv_bytes(PublicBody.export_csv(PublicBody.objects.all()))
         self.assertEqual(PublicBody.objects.all().count() + 1, len(csv.splitlines()))
 
+    def test_csv_queries_independent_of_rows(self):
+        def count_queries():
+            with CaptureQueriesContext(connection) as context:
+                export_csv_bytes(PublicBody.export_csv(PublicBody.objects.all()))
+            return len(context.captured_queries)
+
+        query_count = count_queries()
+        category = CategoryFactory.create()
+        for _ in range(5):
+            pb = PublicBodyFactory.create(parent=PublicBody.objects.first())
+            pb.categories.add(category)
+        self.assertEqual(count_queries(), query_count)
+
     def test_csv_export_import(self):
         csv = export_csv_bytes(PublicBody.export_csv(PublicBody.objects.all()))
         prev_count = PublicBody.objects.all().count()
@@ -221,6 +237,28 @@ Public Body X 76,pb-76@76.example.com,bund,,,http://example.com,,Ministry,Some c
         self.assertEqual(response.status_code, 200)
 
 
+class TreeAncestorCacheTest(TestCase):
+    def test_ancestors_match_tree(self):
+        root = Category.add_root(name="Root", slug="root")
+        child = root.add_child(name="Child", slug="child")
+        grandchild = child.add_child(name="Grandchild", slug="grandchild")
+        other = Category.add_root(name="Other", slug="other")
+
+        category_ancestors.invalidate()
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                category_ancestors.get_ancestor_ids(grandchild.id),
+                [c.id for c in grandchild.get_ancestors()],
+            )
+            self.assertEqual(
+                category_ancestors.get_ids_with_ancestors([grandchild.id, other.id]),
+                [grandchild.id, other.id, root.id, child.id],
+            )
+
+        new_child = other.add_child(name="New", slug="new")
+        self.assertEqual(category_ancestors.get_ancestor_ids(new_child.id), [other.id])
+
+
 class ApiTest(TestCase):
     def setUp(self):
         self.site = make_world()
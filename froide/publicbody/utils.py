@@ -10,8 +10,12 @@ from markdown.treeprocessors import Treeprocessor
 from markdown.util import AtomicString
 
 from froide.helper.text_utils import slugify
+from froide.helper.tree_utils import TreeAncestorCache
 
-from .models import PublicBody
+from .models import Category, Classification, PublicBody
+
+classification_ancestors = TreeAncestorCache(Classification)
+category_ancestors = TreeAncestorCache(Category)
 
 
 def export_user_data(user):
@@ -433,6 +433,10 @@ class Base(Configuration):
             "task": "froide.upload.tasks.remove_expired_uploads",
             "schedule": crontab(hour=3, minute=30),
         },
+        "stored-mail-maintenance": {
+            "task": "froide.foirequest.tasks.remove_stale_mails_task",
+            "schedule": crontab(hour=3, minute=45),
+        },
     }
 
     CELERY_TASK_ALWAYS_EAGER = values.BooleanValue(True)
@@ -440,10 +444,15 @@ class Base(Configuration):
     CELERY_TASK_ROUTES = {
         "froide.foirequest.tasks.fetch_mail": {"queue": "emailfetch"},
         "froide.foirequest.tasks.process_mail": {"queue": "email"},
+        "froide.foirequest.tasks.process_mail_batch": {"queue": "email"},
         "djcelery_email_send_multiple": {"queue": "emailsend"},
         "froide.helper.tasks.search_*": {"queue": "searchindex"},
+        "froide.document.tasks.index_document_pages": {"queue": "searchindex"},
         "froide.foirequest.tasks.redact_attachment_task": {"queue": "redact"},
         "froide.foirequest.tasks.ocr_pdf_task": {"queue": "ocr"},
+        "froide.foirequest.tasks.ocr_pdf_chunk_task": {"queue": "ocr"},
+        "froide.foirequest.tasks.ocr_pdf_merge_task": {"queue": "ocr"},
+        "froide.foirequest.tasks.ocr_pdf_watchdog_task": {"queue": "ocr"},
         "filingcabinet.tasks.*": {"queue": "document"},
         "froide.foirequest.tasks.convert_images_to_pdf_task": {"queue": "convert"},
         "froide.foirequest.tasks.convert_attachment_task": {"queue": "convert_office"},